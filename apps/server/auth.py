@@ -9,10 +9,14 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException, Header, Depends
 from typing import Dict, Optional
 
+from token_cache import TOKEN_CACHE
+from jwt_keys import load_key_ring
+
 # JWT Configuration
-JWT_SECRET = os.getenv("JWT_SECRET", secrets.token_urlsafe(32))
+KEY_RING = load_key_ring()
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "1"))  # 1 hour default
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # Enables /admin endpoints when set
 
 
 def create_jwt_token(user_id: str = "demo-user", session_id: str = None) -> str:
@@ -28,13 +32,23 @@ def create_jwt_token(user_id: str = "demo-user", session_id: str = None) -> str:
         "iss": "time-traveler-api"
     }
     
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    key = KEY_RING.active
+    return jwt.encode(payload, key.secret, algorithm=JWT_ALGORITHM, headers={"kid": key.kid})
 
 
 def validate_jwt_token(token: str) -> Dict:
     """Validate a JWT token and return payload if valid"""
+    payload = TOKEN_CACHE.get(token)
+    if payload is not None:
+        return payload
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        kid = jwt.get_unverified_header(token).get("kid")
+        secret = KEY_RING.verification_secret(kid)
+        if secret is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        payload = jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
+        # A cache hit skips the key ring, so it must not outlive the signing key's retirement
+        TOKEN_CACHE.put(token, payload, not_after=KEY_RING.verify_until(kid))
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
@@ -42,6 +56,11 @@ def validate_jwt_token(token: str) -> Dict:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+def invalidate_session_tokens(session_id: str) -> int:
+    """Hook for revoked sessions: forget their cached verified tokens"""
+    return TOKEN_CACHE.invalidate_session(session_id)
+
+
 def get_current_user(authorization: str = Header(None)) -> Dict:
     """Dependency to get current user from JWT token"""
     if not authorization or not authorization.startswith("Bearer "):
@@ -51,10 +70,20 @@ def get_current_user(authorization: str = Header(None)) -> Dict:
     return validate_jwt_token(token)
 
 
+def require_admin(x_admin_token: str = Header(None)):
+    """Dependency guarding operational endpoints with the shared ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
 def get_jwt_config() -> Dict:
     """Get JWT configuration for debugging/monitoring"""
     return {
         "algorithm": JWT_ALGORITHM,
         "expiration_hours": JWT_EXPIRATION_HOURS,
-        "secret_configured": bool(JWT_SECRET)
+        "secret_configured": KEY_RING.source != "host_key_file",
+        "keys": KEY_RING.get_stats(),
+        "verification_cache": TOKEN_CACHE.get_stats()
     }
@@ -0,0 +1,78 @@
+"""
+Benchmark: cached vs uncached JWT verification at /call-status polling rates.
+
+Simulates `--sessions` concurrent calls whose frontends each poll
+`--polls` times with the same token (e.g. a 90s call polled every 1s), and
+times every validation with plain `jwt.decode` versus the TokenCache path
+used by auth.validate_jwt_token.
+
+Usage (from apps/server):
+    python benchmarks/jwt_cache.py --sessions 200 --polls 90
+"""
+
+import argparse
+import os
+import random
+import secrets
+import sys
+import time
+
+import jwt
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from token_cache import TokenCache
+
+SECRET = secrets.token_urlsafe(32)
+ALGORITHM = "HS256"
+
+
+def _mint(session_id: str) -> str:
+    now = int(time.time())
+    payload = {"user_id": "bench", "session_id": session_id, "iat": now, "exp": now + 3600}
+    return jwt.encode(payload, SECRET, algorithm=ALGORITHM)
+
+
+def _workload(sessions: int, polls: int):
+    tokens = [_mint(f"session-{i}") for i in range(sessions)]
+    requests = [token for token in tokens for _ in range(polls)]
+    random.Random(0).shuffle(requests)  # Interleave polls from concurrent calls
+    return requests
+
+
+def _run_uncached(requests):
+    started = time.perf_counter()
+    for token in requests:
+        jwt.decode(token, SECRET, algorithms=[ALGORITHM])
+    return time.perf_counter() - started
+
+
+def _run_cached(requests, max_entries: int):
+    cache = TokenCache(max_entries)
+    started = time.perf_counter()
+    for token in requests:
+        if cache.get(token) is None:
+            cache.put(token, jwt.decode(token, SECRET, algorithms=[ALGORITHM]))
+    return time.perf_counter() - started, cache.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent calls (distinct tokens)")
+    parser.add_argument("--polls", type=int, default=90, help="polls per token")
+    parser.add_argument("--max-entries", type=int, default=4096, help="cache capacity")
+    args = parser.parse_args()
+
+    requests = _workload(args.sessions, args.polls)
+    uncached = _run_uncached(requests)
+    cached, stats = _run_cached(requests, args.max_entries)
+
+    print(f"validations: {len(requests)} ({args.sessions} tokens x {args.polls} polls)")
+    print(f"uncached: {uncached * 1e6 / len(requests):8.2f} us/validation")
+    print(f"cached:   {cached * 1e6 / len(requests):8.2f} us/validation "
+          f"(hit rate {stats['hit_rate']:.2%}, evictions {stats['evictions']})")
+    print(f"speedup:  {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: rate limit checks per second under multi-process contention.
+
+Spawns N worker processes that hammer one rate limit store for a fixed
+duration, then reports aggregate checks/sec and how many calls were admitted
+for a shared key. With the "sqlite" backend the admitted count must stay at
+the configured limit no matter how many workers run; with "memory" each
+worker has its own store, which is the N x over-admission this backend fixes.
+
+Usage (from apps/server):
+    python benchmarks/rate_limit_contention.py --backend sqlite --workers 4 --seconds 3
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from rate_limit_store import create_rate_limit_store
+
+
+def _worker(backend, path, seconds, keys, limit, window, start_event, results):
+    store = create_rate_limit_store(backend, path)
+    start_event.wait()
+    deadline = time.perf_counter() + seconds
+    checks = 0
+    shared_admitted = 0
+    while time.perf_counter() < deadline:
+        key = f"session-{checks % keys}"
+        store.check(key, limit, window)
+        if store.check("shared", limit, window)["allowed"]:
+            shared_admitted += 1
+        checks += 2
+    results.put((checks, shared_admitted))
+
+
+def run(backend: str, workers: int, seconds: float, keys: int, limit: int, window: float) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="rl-bench-"), "rate_limits.db")
+    if backend == "sqlite":
+        create_rate_limit_store(backend, path)  # create schema before workers race for it
+
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(
+            target=_worker, args=(backend, path, seconds, keys, limit, window, start_event, results)
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    start_event.set()
+    totals = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    checks = sum(t[0] for t in totals)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "seconds": seconds,
+        "checks": checks,
+        "checks_per_second": round(checks / seconds),
+        "shared_key_admitted": sum(t[1] for t in totals),
+        "shared_key_limit": limit,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--keys", type=int, default=1000, help="distinct session keys per worker loop")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--window", type=float, default=300.0)
+    args = parser.parse_args()
+
+    result = run(args.backend, args.workers, args.seconds, args.keys, args.limit, args.window)
+    for name, value in result.items():
+        print(f"{name:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Concurrent-call admission control.
+
+Caps how many calls (ElevenLabs session + Twilio media stream) run at once per
+worker and, optionally, per host. Requests beyond the cap wait in a bounded
+FIFO and are dispatched as capacity frees up; when the queue is full callers
+get a Retry-After hint instead. Capacity is held from Twilio call creation
+until the call's stop event, WebSocket error, /end-call or Twilio's status
+callback (busy, no-answer, failed: the media stream never opens) releases it.
+
+The host-wide counter is a SQLite file, so acquire/bind/release are coroutines
+that run its queries in a worker thread instead of blocking live media streams.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+# Admission Configuration
+MAX_ACTIVE_CALLS_PER_WORKER = int(os.getenv("MAX_ACTIVE_CALLS_PER_WORKER", "20"))
+MAX_ACTIVE_CALLS_PER_HOST = int(os.getenv("MAX_ACTIVE_CALLS_PER_HOST", "0"))  # 0 = no host-wide cap
+CALL_QUEUE_MAX = int(os.getenv("CALL_QUEUE_MAX", "20"))
+CALL_QUEUE_MAX_WAIT_SECONDS = float(os.getenv("CALL_QUEUE_MAX_WAIT_SECONDS", "300"))
+# Initial guess for call length; refined from observed calls (EMA)
+AVG_CALL_DURATION_SECONDS = float(os.getenv("AVG_CALL_DURATION_SECONDS", "90"))
+# Slots held longer than this are reclaimed (e.g. a call whose stop event never arrived)
+MAX_CALL_DURATION_SECONDS = float(os.getenv("MAX_CALL_DURATION_SECONDS", "1800"))
+CALL_ADMISSION_SQLITE_PATH = os.getenv(
+    "CALL_ADMISSION_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "time-traveler-active-calls.db")
+)
+
+DEBUG_LOGS = os.getenv("DEBUG_LOGS", "false").lower() == "true"
+
+# Final Twilio call statuses; Twilio reports all of them through the "completed" callback event
+TERMINAL_CALL_STATUSES = frozenset({"completed", "busy", "no-answer", "failed", "canceled"})
+
+# Weight of the newest observed call duration in the running average
+_DURATION_EMA_ALPHA = 0.2
+
+
+class HostCallCounter:
+    """
+    Host-wide active-call slots shared by every worker through a SQLite file.
+    Slots of worker processes that died without releasing are purged on demand.
+    """
+
+    def __init__(self, path: str, max_calls: int):
+        self.path = path
+        self.max_calls = max_calls
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS active_calls "
+            "(slot_id TEXT PRIMARY KEY, pid INTEGER NOT NULL, started_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self, slot_id: str) -> bool:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM active_calls").fetchone()[0]
+            if count >= self.max_calls:
+                count -= self._purge_dead_workers(conn)
+            acquired = count < self.max_calls
+            if acquired:
+                conn.execute(
+                    "INSERT OR REPLACE INTO active_calls (slot_id, pid, started_at) VALUES (?, ?, ?)",
+                    (slot_id, os.getpid(), time.time()),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def rename(self, old_slot_id: str, new_slot_id: str):
+        self._connection().execute(
+            "UPDATE active_calls SET slot_id = ? WHERE slot_id = ?", (new_slot_id, old_slot_id)
+        )
+
+    def release(self, slot_id: str):
+        self._connection().execute("DELETE FROM active_calls WHERE slot_id = ?", (slot_id,))
+
+    def active_count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM active_calls").fetchone()[0]
+
+    @staticmethod
+    def _purge_dead_workers(conn: sqlite3.Connection) -> int:
+        dead = []
+        for (pid,) in conn.execute("SELECT DISTINCT pid FROM active_calls").fetchall():
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                dead.append(pid)
+            except PermissionError:
+                pass  # Process exists but belongs to someone else
+        removed = 0
+        for pid in dead:
+            removed += conn.execute("DELETE FROM active_calls WHERE pid = ?", (pid,)).rowcount
+        return removed
+
+
+class QueuedCall:
+    """A call waiting for capacity; `dispatch(slot_id)` places it once admitted."""
+
+    __slots__ = ("queue_id", "dispatch", "enqueued_at")
+
+    def __init__(self, queue_id: str, dispatch: Callable[[str], Awaitable[None]], enqueued_at: float):
+        self.queue_id = queue_id
+        self.dispatch = dispatch
+        self.enqueued_at = enqueued_at
+
+
+class CallAdmissionController:
+    """Per-worker concurrency governor with a bounded FIFO wait queue."""
+
+    def __init__(self, max_active: int, max_queue: int,
+                 host_counter: Optional[HostCallCounter] = None,
+                 avg_call_seconds: float = AVG_CALL_DURATION_SECONDS,
+                 max_queue_wait_seconds: float = CALL_QUEUE_MAX_WAIT_SECONDS,
+                 on_expired: Optional[Callable[[str], None]] = None,
+                 is_cancelled: Optional[Callable[[str], bool]] = None):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.host_counter = host_counter
+        self.avg_call_seconds = avg_call_seconds
+        self.max_queue_wait_seconds = max_queue_wait_seconds
+        self.on_expired = on_expired
+        # Checked before dispatch: a queued call already marked failed/ended must not ring
+        self.is_cancelled = is_cancelled
+        self._active: Dict[str, float] = {}  # slot_id (callSid once bound) -> started_at
+        self._queue: Deque[QueuedCall] = deque()
+        # Host counter queries run one at a time, in call order (a bind must land before its release)
+        self._host_lock = asyncio.Lock()
+        # Running dispatch tasks; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.rejected_total = 0
+
+    @staticmethod
+    def new_slot_id() -> str:
+        return f"slot-{uuid.uuid4().hex}"
+
+    def has_capacity(self) -> bool:
+        return len(self._active) < self.max_active
+
+    async def try_acquire(self, slot_id: str, now: Optional[float] = None) -> bool:
+        """Take a slot if the worker (and host) cap allows it. Queued calls go first."""
+        if self._queue or not self.has_capacity():
+            return False
+        return await self._acquire(slot_id, now)
+
+    async def _acquire(self, slot_id: str, now: Optional[float] = None) -> bool:
+        # Reserve the worker slot first so concurrent requests cannot overshoot while the host is asked
+        self._active[slot_id] = time.time() if now is None else now
+        if self.host_counter and not await self._host(self.host_counter.try_acquire, slot_id):
+            self._active.pop(slot_id, None)
+            return False
+        return True
+
+    async def bind(self, slot_id: str, call_sid: str):
+        """Re-key a slot by the Twilio callSid once the call exists"""
+        if slot_id in self._active:
+            self._active[call_sid] = self._active.pop(slot_id)
+            if self.host_counter:
+                await self._host(self.host_counter.rename, slot_id, call_sid)
+
+    async def release(self, slot_id: str, now: Optional[float] = None) -> bool:
+        """Free a slot (idempotent) and admit queued calls. Returns True if a slot was held."""
+        started_at = self._active.pop(slot_id, None)
+        if started_at is None:
+            return False
+        if self.host_counter:
+            await self._host(self.host_counter.release, slot_id)
+        now = time.time() if now is None else now
+        duration = max(0.0, now - started_at)
+        self.avg_call_seconds += _DURATION_EMA_ALPHA * (duration - self.avg_call_seconds)
+        await self.dispatch_queued(now)
+        return True
+
+    async def release_on_status(self, call_sid: str, call_status: Optional[str],
+                                now: Optional[float] = None) -> bool:
+        """Twilio status callback: free the slot once the call reached a final status"""
+        if call_status not in TERMINAL_CALL_STATUSES:
+            return False
+        return await self.release(call_sid, now)
+
+    async def _host(self, method: Callable[..., Any], *args) -> Any:
+        async with self._host_lock:
+            return await asyncio.to_thread(method, *args)
+
+    def enqueue(self, dispatch: Callable[[str], Awaitable[None]],
+                now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Queue a call until capacity frees up.
+        Returns: {'queue_id', 'position', 'estimated_start'} or None when the queue is full
+        """
+        now = time.time() if now is None else now
+        self._drop_expired(now)
+        if len(self._queue) >= self.max_queue:
+            self.rejected_total += 1
+            return None
+        entry = QueuedCall(f"queue-{uuid.uuid4().hex[:16]}", dispatch, now)
+        self._queue.append(entry)
+        position = len(self._queue)
+        return {
+            "queue_id": entry.queue_id,
+            "position": position,
+            "estimated_start": self.estimate_start(position, now),
+        }
+
+    def cancel(self, queue_id: str) -> bool:
+        """Remove a call from the wait queue (e.g. the user gave up). Returns True if it was queued."""
+        for entry in self._queue:
+            if entry.queue_id == queue_id:
+                self._queue.remove(entry)
+                return True
+        return False
+
+    def position(self, queue_id: str) -> Optional[int]:
+        """1-based position of a queued call, or None if it is no longer queued"""
+        for index, entry in enumerate(self._queue):
+            if entry.queue_id == queue_id:
+                return index + 1
+        return None
+
+    def estimate_start(self, position: int, now: Optional[float] = None) -> float:
+        """
+        Epoch time the call at `position` should start: the position-th slot to free
+        up, assuming each active call lasts the running average duration.
+        """
+        now = time.time() if now is None else now
+        if self.max_active <= 0:
+            return now
+        ends = sorted(max(now, started + self.avg_call_seconds) for started in self._active.values())
+        ends += [now] * (self.max_active - len(ends))
+        index = (position - 1) % self.max_active
+        rounds = (position - 1) // self.max_active
+        return ends[index] + rounds * self.avg_call_seconds
+
+    def retry_after_seconds(self, now: Optional[float] = None) -> int:
+        """Seconds until a queue slot is likely to open (for 503 Retry-After)"""
+        now = time.time() if now is None else now
+        return max(1, int(round(self.estimate_start(1, now) - now)))
+
+    async def dispatch_queued(self, now: Optional[float] = None):
+        """Start queued calls while capacity is available"""
+        now = time.time() if now is None else now
+        self._drop_expired(now)
+        while self._queue and self.has_capacity():
+            # Taken off the queue before awaiting the host so a concurrent pass cannot dispatch it twice
+            entry = self._queue.popleft()
+            if self.is_cancelled and self.is_cancelled(entry.queue_id):
+                continue
+            if not await self._acquire(entry.queue_id, now):
+                self._queue.appendleft(entry)
+                break  # Host is full; retry on the next release or sweep
+            self._spawn(entry.dispatch(entry.queue_id))
+
+    def _spawn(self, coro: Awaitable[None]):
+        """Run a dispatch coroutine as a task, keeping a reference until it finishes"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def reclaim_stale(self, now: Optional[float] = None) -> List[str]:
+        """Release slots held longer than MAX_CALL_DURATION_SECONDS"""
+        now = time.time() if now is None else now
+        stale = [
+            slot_id for slot_id, started_at in self._active.items()
+            if now - started_at > MAX_CALL_DURATION_SECONDS
+        ]
+        for slot_id in stale:
+            await self.release(slot_id, now)
+        await self.dispatch_queued(now)
+        return stale
+
+    def _drop_expired(self, now: float):
+        while self._queue and now - self._queue[0].enqueued_at > self.max_queue_wait_seconds:
+            entry = self._queue.popleft()
+            if self.on_expired:
+                self.on_expired(entry.queue_id)
+
+    def queued_count(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> Dict:
+        """Counters for /config (queries the host counter; call it from a worker thread)"""
+        return {
+            "active_calls": len(self._active),
+            "max_active_per_worker": self.max_active,
+            "host_active_calls": self.host_counter.active_count() if self.host_counter else None,
+            "max_active_per_host": self.host_counter.max_calls if self.host_counter else None,
+            "queued_calls": len(self._queue),
+            "max_queue": self.max_queue,
+            "avg_call_seconds": round(self.avg_call_seconds, 1),
+            "rejected_total": self.rejected_total,
+        }
+
+
+CALL_ADMISSION = CallAdmissionController(
+    MAX_ACTIVE_CALLS_PER_WORKER,
+    CALL_QUEUE_MAX,
+    host_counter=(
+        HostCallCounter(CALL_ADMISSION_SQLITE_PATH, MAX_ACTIVE_CALLS_PER_HOST)
+        if MAX_ACTIVE_CALLS_PER_HOST > 0 else None
+    ),
+)
+
+
+async def call_admission_sweeper(interval_seconds: float = 30.0):
+    """Background task: reclaim leaked slots and drain the queue"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            reclaimed = await CALL_ADMISSION.reclaim_stale()
+            if reclaimed and DEBUG_LOGS:
+                print(f"🧹 Reclaimed {len(reclaimed)} stale call slots")
+        except Exception as e:
+            print(f"⚠️  Call admission sweeper error: {e}")
@@ -0,0 +1,330 @@
+"""
+Per-call latency instrumentation for the media stream.
+
+This replaces the forked probes in metrics/snapshots/. Each call gets a
+CallLatencyProbe. The media handler and TwilioAudioInterface feed it
+timestamps through hooks that are a single `is not None` check when
+CALL_METRICS_ENABLED is off. When the call ends, the probe becomes one record
+in the metrics/latency.ndjson schema. Records go into a bounded in-memory ring
+buffer (ndjson_buffer), and a background task appends them to
+CALL_METRICS_FILE, so the file I/O never runs on the media path. If the buffer
+overflows between flushes, the oldest records are dropped and counted.
+
+All call-relative times are milliseconds since the Twilio WebSocket was
+accepted. Outbound audio gaps go into a QuantileSketch rather than a list, so a
+probe's memory does not grow with call length. Sketches merge, and the
+recorder keeps merged per-agent and per-node sketches for percentiles across
+calls.
+"""
+
+import os
+import math
+import time
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from ndjson_buffer import NdjsonBuffer
+
+# Metrics Configuration
+CALL_METRICS_ENABLED = os.getenv("CALL_METRICS_ENABLED", "true").lower() == "true"
+CALL_METRICS_FILE = os.getenv("CALL_METRICS_FILE") or os.path.join(
+    os.path.dirname(__file__), "metrics", "calls.ndjson"
+)
+CALL_METRICS_BUFFER_SIZE = int(os.getenv("CALL_METRICS_BUFFER_SIZE", "1000"))
+CALL_METRICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("CALL_METRICS_FLUSH_INTERVAL_SECONDS", "10"))
+
+SENTENCE_ENDINGS = ('.', '!', '?')
+
+
+def _now_ms() -> int:
+    return int(time.monotonic() * 1000)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list (same rank rule as the original probes)"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class QuantileSketch:
+    """
+    Streaming quantiles in bounded memory (log-bucketed, HDR/DDSketch style).
+
+    Each positive value is counted in bucket ceil(log_gamma(value)), so any
+    estimate is within `relative_accuracy` of a value in that bucket. Values
+    <= 0 share a zero bucket. Sketches with the same accuracy merge by adding
+    counts. If there are more than `max_bins` buckets, the lowest buckets are
+    collapsed, which keeps the upper tail accurate.
+    """
+
+    __slots__ = ("relative_accuracy", "gamma", "_log_gamma", "max_bins", "bins", "zero_count",
+                 "count", "total", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 1024):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max(2, max_bins)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def _collapse(self):
+        indexes = sorted(self.bins)
+        while len(indexes) > self.max_bins:
+            lowest = indexes.pop(0)
+            self.bins[indexes[0]] += self.bins.pop(lowest)
+
+    def merge(self, other: "QuantileSketch"):
+        """Add another sketch's values into this one (same accuracy required)"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Nearest-rank quantile (same rank rule as percentile()); exact at min and max"""
+        if not self.count:
+            return None
+        rank = min(self.count - 1, int(self.count * fraction))
+        if rank == 0:
+            return self.min
+        if rank == self.count - 1:
+            return self.max
+        if rank < self.zero_count:
+            return min(0, self.max)
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return round(min(max(estimate, self.min), self.max), 1)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": self.mean,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON form (bucket index -> count) that from_dict() can merge later"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "bins": {str(index): count for index, count in sorted(self.bins.items())},
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(relative_accuracy=data.get("relative_accuracy", 0.01))
+        sketch.bins = {int(index): int(count) for index, count in data.get("bins", {}).items()}
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.count = int(data.get("count", 0))
+        sketch.total = float(data.get("sum", 0.0))
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
+
+
+class CallLatencyProbe:
+    """Timestamps for one call; fed from the event loop and ElevenLabs callback threads."""
+
+    __slots__ = ("connected_ms", "call_sid", "stream_sid", "agent", "first_agent_text_ms",
+                 "first_sentence_ms", "last_agent_text_ms", "sentences_spoken", "first_out_ms",
+                 "prev_out_ms", "out_intervals", "last_in_ms", "min_round_trip_ms", "finished",
+                 "on_interval")
+
+    def __init__(self, connected_ms: Optional[int] = None,
+                 on_interval: Optional[Callable[[int], None]] = None):
+        self.connected_ms = _now_ms() if connected_ms is None else connected_ms
+        # Optional live feed of each outbound gap (e.g. the /metrics histogram)
+        self.on_interval = on_interval
+        self.call_sid: Optional[str] = None
+        self.stream_sid: Optional[str] = None
+        self.agent: Dict[str, Any] = {
+            "agent_id": None, "agent_name": None, "voice_id": None, "lang": None, "year": None,
+        }
+        self.first_agent_text_ms: Optional[int] = None
+        self.first_sentence_ms: Optional[int] = None
+        self.last_agent_text_ms: Optional[int] = None
+        self.sentences_spoken = 0
+        self.first_out_ms: Optional[int] = None
+        self.prev_out_ms: Optional[int] = None
+        self.out_intervals = QuantileSketch()
+        self.last_in_ms: Optional[int] = None
+        self.min_round_trip_ms: Optional[int] = None
+        self.finished = False
+
+    def started(self, call_sid: Optional[str], stream_sid: Optional[str], lang: str, year: int):
+        self.call_sid = call_sid
+        self.stream_sid = stream_sid
+        self.agent["lang"] = lang
+        self.agent["year"] = year
+
+    def selected(self, agent_id: Optional[str], agent_name: Optional[str], voice_id: Optional[str]):
+        self.agent["agent_id"] = agent_id
+        self.agent["agent_name"] = agent_name
+        self.agent["voice_id"] = voice_id
+
+    def agent_text(self, text: str, now_ms: Optional[int] = None):
+        """An agent response from ElevenLabs (counted as a sentence when it ends like one)"""
+        now_ms = _now_ms() if now_ms is None else now_ms
+        if self.first_agent_text_ms is None:
+            self.first_agent_text_ms = now_ms
+        if text.strip().endswith(SENTENCE_ENDINGS):
+            if self.first_sentence_ms is None:
+                self.first_sentence_ms = now_ms
+            self.sentences_spoken += 1
+        self.last_agent_text_ms = now_ms
+
+    def audio_out(self, now_ms: Optional[int] = None):
+        """An agent audio chunk was sent to Twilio"""
+        now_ms = _now_ms() if now_ms is None else now_ms
+        if self.first_out_ms is None:
+            self.first_out_ms = now_ms
+        if self.prev_out_ms is not None:
+            interval = now_ms - self.prev_out_ms
+            self.out_intervals.add(interval)
+            if self.on_interval is not None:
+                self.on_interval(interval)
+        self.prev_out_ms = now_ms
+        # Rough round trip: time since the caller's latest inbound frame
+        if self.last_in_ms is not None:
+            round_trip = now_ms - self.last_in_ms
+            if round_trip >= 0 and (self.min_round_trip_ms is None or round_trip < self.min_round_trip_ms):
+                self.min_round_trip_ms = round_trip
+
+    def audio_in(self, now_ms: Optional[int] = None):
+        """A caller audio frame arrived from Twilio"""
+        self.last_in_ms = _now_ms() if now_ms is None else now_ms
+
+    def _since_connect(self, at_ms: Optional[int]) -> Optional[int]:
+        return at_ms - self.connected_ms if at_ms is not None else None
+
+    def export_audio(self) -> Dict[str, Any]:
+        intervals = self.out_intervals
+        return {
+            "first_out_ms": self._since_connect(self.first_out_ms),
+            "avg_out_interval_ms": intervals.mean,
+            "p50_out_interval_ms": intervals.quantile(0.50),
+            "p95_out_interval_ms": intervals.quantile(0.95),
+            "p99_out_interval_ms": intervals.quantile(0.99),
+            "min_round_trip_ms": self.min_round_trip_ms,
+            "out_intervals_count": intervals.count,
+            "out_interval_sketch": intervals.to_dict(),
+        }
+
+    def export(self) -> Dict[str, Any]:
+        """One NDJSON record (metrics/latency.ndjson schema; `ts` is epoch ms)"""
+        return {
+            "ts": int(time.time() * 1000),
+            "call_sid": self.call_sid,
+            "stream_sid": self.stream_sid,
+            "agent": dict(self.agent),
+            "setup_ms": self._since_connect(self.first_agent_text_ms),
+            "first_audio_ms": self._since_connect(self.first_out_ms),
+            "first_sentence_delta_ms": self._since_connect(self.first_sentence_ms),
+            "last_agent_text_delta_ms": self._since_connect(self.last_agent_text_ms),
+            "sentences_spoken": self.sentences_spoken,
+            "audio": self.export_audio(),
+        }
+
+
+class CallMetricsRecorder(NdjsonBuffer):
+    """Ring buffer of finished-call records, flushed to an NDJSON file."""
+
+    def __init__(self, path: str = CALL_METRICS_FILE, buffer_size: int = CALL_METRICS_BUFFER_SIZE,
+                 enabled: bool = CALL_METRICS_ENABLED):
+        super().__init__(path, buffer_size, enabled=enabled, label="call metrics")
+        # Optional hooks: each outbound gap (ms) while a call runs, and each finished record
+        self.on_interval: Optional[Callable[[int], None]] = None
+        self.on_record: Optional[Callable[[Dict[str, Any]], None]] = None
+        # Outbound gaps merged across calls: this node, and per agent
+        self.node_intervals = QuantileSketch()
+        self.agent_intervals: Dict[str, QuantileSketch] = {}
+
+    def start_call(self) -> Optional[CallLatencyProbe]:
+        """Probe for a new media stream, or None when instrumentation is off"""
+        return CallLatencyProbe(on_interval=self.on_interval) if self.enabled else None
+
+    def finish_call(self, probe: Optional[CallLatencyProbe]):
+        """Buffer a call's record (idempotent; None is ignored)"""
+        if probe is None or probe.finished:
+            return
+        probe.finished = True
+        entry = probe.export()
+        self.record(entry)
+        self.merge_intervals(probe.agent["agent_id"], probe.out_intervals)
+        if self.on_record is not None:
+            self.on_record(entry)
+
+    def merge_intervals(self, agent_id: Optional[str], sketch: QuantileSketch):
+        with self._lock:
+            self.node_intervals.merge(sketch)
+            agent_sketch = self.agent_intervals.setdefault(agent_id or "unknown", QuantileSketch())
+            agent_sketch.merge(sketch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            node_intervals = self.node_intervals.summary()
+            agent_intervals = {agent: sketch.summary() for agent, sketch in self.agent_intervals.items()}
+        stats = super().get_stats()
+        stats["out_interval_ms"] = {"node": node_intervals, "by_agent": agent_intervals}
+        return stats
+
+
+CALL_METRICS = CallMetricsRecorder()
+
+
+async def call_metrics_flusher(recorder: CallMetricsRecorder = CALL_METRICS,
+                               interval_seconds: float = CALL_METRICS_FLUSH_INTERVAL_SECONDS):
+    """Background task: append buffered call records to the NDJSON file off the event loop"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(recorder.flush)
+        except Exception as e:
+            print(f"⚠️  Call metrics flusher error: {e}")
@@ -0,0 +1,120 @@
+"""
+In-memory call status store and batch query helpers.
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+# Maximum number of call SIDs (or filtered results) returned by one batch query
+BATCH_CALL_STATUS_MAX = int(os.getenv("BATCH_CALL_STATUS_MAX", "50"))
+
+# In-memory call status store (simple, ephemeral)
+# Structure per callSid:
+# {
+#   'status': 'initiated'|'ringing'|'answered'|'ended'|'failed',
+#   'to': str,
+#   'lang': str,
+#   'year': int,
+#   'twiml_requested': bool,
+#   'websocket_connected': bool,
+#   'stream_sid': Optional[str],
+#   'session_id': Optional[str],   # session that created the call
+#   'created_at': float,           # epoch seconds
+#   'updated_at': float,           # epoch seconds
+# }
+CALL_STATUS: Dict[str, Dict] = {}
+
+
+def update_call_status(call_sid: str, **fields) -> Dict:
+    """Create or update a call status entry, stamping created_at/updated_at"""
+    now = time.time()
+    existing = CALL_STATUS.get(call_sid) or {}
+    existing.setdefault("created_at", now)
+    existing.update(fields)
+    existing["updated_at"] = now
+    CALL_STATUS[call_sid] = existing
+    return existing
+
+
+def parse_call_sids(raw: Optional[str]) -> List[str]:
+    """Split a comma-separated SID list, dropping blanks and duplicates (order kept)"""
+    if not raw:
+        return []
+    seen = {}
+    for sid in raw.split(","):
+        sid = sid.strip()
+        if sid:
+            seen.setdefault(sid, None)
+    return list(seen)
+
+
+def query_call_statuses(
+    call_sids: Optional[Iterable[str]] = None,
+    status: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    session_id: Optional[str] = None,
+    limit: int = BATCH_CALL_STATUS_MAX,
+) -> Dict:
+    """
+    Look up several calls at once.
+
+    When call_sids is given, those entries are returned (unknown SIDs are listed
+    under 'missing'). Otherwise the store is filtered by status, updated_at window
+    and owning session_id. Results are capped at `limit`, newest first.
+    Returns: {'calls': {sid: details}, 'missing': [sid, ...]}
+    """
+    calls = {}
+    missing = []
+
+    if call_sids is not None:
+        for sid in call_sids:
+            entry = CALL_STATUS.get(sid)
+            if entry is None:
+                missing.append(sid)
+            elif _matches(entry, status, since, until, None):
+                calls[sid] = dict(entry)
+        return {"calls": calls, "missing": missing}
+
+    matched = [
+        (sid, entry) for sid, entry in list(CALL_STATUS.items())
+        if _matches(entry, status, since, until, session_id)
+    ]
+    matched.sort(key=lambda item: item[1].get("updated_at", 0), reverse=True)
+    for sid, entry in matched[:limit]:
+        calls[sid] = dict(entry)
+    return {"calls": calls, "missing": missing}
+
+
+def _matches(entry: Dict, status: Optional[str], since: Optional[float],
+             until: Optional[float], session_id: Optional[str]) -> bool:
+    if status and entry.get("status") != status:
+        return False
+    updated_at = entry.get("updated_at", 0)
+    if since is not None and updated_at < since:
+        return False
+    if until is not None and updated_at > until:
+        return False
+    if session_id is not None and entry.get("session_id") != session_id:
+        return False
+    return True
+
+
+def compute_etag(payload: Dict) -> str:
+    """Strong ETag over the canonical JSON form of a response payload"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(canonical.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == bare for tag in candidates)
@@ -0,0 +1,239 @@
+"""
+Call lifecycle tracing, correlated by Twilio callSid.
+
+One call touches POST /outbound-call (Twilio create), Twilio's request for
+/outbound-call-twiml, the /outbound-media-stream WebSocket and the ElevenLabs
+session. Each of these looks up the same CallTrace by callSid and adds spans to
+it. A span has a name, a start offset and a duration in milliseconds. Offsets
+are measured with time.monotonic() from the first thing recorded for the call.
+Instant events, such as the first agent text, have duration 0.
+
+Traces stay in memory while the call is open. The stream closing finishes a
+trace. Finished traces are kept in a bounded ring buffer for
+GET /admin/traces, and are appended to CALL_TRACE_FILE in the background through
+an NdjsonBuffer. If a call never reaches the media stream (no answer,
+Twilio error), its trace is finished by the sweeper after
+CALL_TRACE_OPEN_TTL_SECONDS.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from ndjson_buffer import NdjsonBuffer
+
+# Tracing Configuration
+CALL_TRACING_ENABLED = os.getenv("CALL_TRACING_ENABLED", "true").lower() == "true"
+CALL_TRACE_FILE = os.getenv("CALL_TRACE_FILE") or os.path.join(
+    os.path.dirname(__file__), "metrics", "traces.ndjson"
+)
+CALL_TRACE_BUFFER_SIZE = int(os.getenv("CALL_TRACE_BUFFER_SIZE", "500"))  # finished traces kept for queries
+CALL_TRACE_MAX_OPEN = int(os.getenv("CALL_TRACE_MAX_OPEN", "1000"))
+CALL_TRACE_OPEN_TTL_SECONDS = float(os.getenv("CALL_TRACE_OPEN_TTL_SECONDS", "3600"))
+CALL_TRACE_FLUSH_INTERVAL_SECONDS = float(os.getenv("CALL_TRACE_FLUSH_INTERVAL_SECONDS", "10"))
+
+
+class CallTrace:
+    """Spans for one callSid; written from the event loop and ElevenLabs callback threads."""
+
+    def __init__(self, call_sid: str, started_at: Optional[float] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.call_sid = call_sid
+        self.t0 = time.monotonic() if started_at is None else started_at
+        self.started_at_ms = int((time.time() - (time.monotonic() - self.t0)) * 1000)
+        self.last_activity = time.monotonic()
+        self.spans: List[Dict[str, Any]] = []
+        self.outcome: Optional[str] = None
+        self.finished = False
+        self._marked: set = set()
+        self._lock = threading.Lock()
+
+    def _offset_ms(self, at: float) -> float:
+        return round((at - self.t0) * 1000, 1)
+
+    def add_span(self, name: str, start: float, end: Optional[float] = None, **attrs):
+        """Record a span from monotonic start/end times (end=None is an instant event)"""
+        span = {
+            "name": name,
+            "start_ms": self._offset_ms(start),
+            "duration_ms": round(((end if end is not None else start) - start) * 1000, 1),
+        }
+        if attrs:
+            span["attrs"] = attrs
+        with self._lock:
+            # A create span can start before the trace's first event (it is recorded after Twilio returns)
+            if start < self.t0:
+                shift = round((self.t0 - start) * 1000, 1)
+                for existing in self.spans:
+                    existing["start_ms"] = round(existing["start_ms"] + shift, 1)
+                self.started_at_ms -= int(shift)
+                self.t0 = start
+                span["start_ms"] = 0.0
+            self.spans.append(span)
+            self.last_activity = time.monotonic()
+
+    def mark(self, name: str, at: Optional[float] = None, **attrs):
+        """Instant event (defaults to now)"""
+        self.add_span(name, time.monotonic() if at is None else at, **attrs)
+
+    def mark_once(self, name: str, at: Optional[float] = None, **attrs):
+        """Instant event recorded only the first time (e.g. first agent text)"""
+        with self._lock:
+            if name in self._marked:
+                return
+            self._marked.add(name)
+        self.mark(name, at, **attrs)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+        """Time a block; the yielded dict can add attributes, and errors are recorded on the span"""
+        start = time.monotonic()
+        extra: Dict[str, Any] = {}
+        try:
+            yield extra
+        except Exception as e:
+            extra["error"] = type(e).__name__
+            raise
+        finally:
+            self.add_span(name, start, time.monotonic(), **attrs, **extra)
+
+    def span_end_ms(self, name: str) -> Optional[float]:
+        for span in self.spans:
+            if span["name"] == name:
+                return span["start_ms"] + span["duration_ms"]
+        return None
+
+    def export(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted((dict(span) for span in self.spans), key=lambda span: span["start_ms"])
+        return {
+            "trace_id": self.trace_id,
+            "call_sid": self.call_sid,
+            "started_at": self.started_at_ms,
+            "duration_ms": max((span["start_ms"] + span["duration_ms"] for span in spans), default=0.0),
+            "outcome": self.outcome,
+            "finished": self.finished,
+            "spans": spans,
+        }
+
+
+class CallTracer:
+    """Open traces by callSid, plus a ring buffer of finished ones exported as NDJSON."""
+
+    def __init__(self, path: str = CALL_TRACE_FILE, buffer_size: int = CALL_TRACE_BUFFER_SIZE,
+                 max_open: int = CALL_TRACE_MAX_OPEN, open_ttl_seconds: float = CALL_TRACE_OPEN_TTL_SECONDS,
+                 enabled: bool = CALL_TRACING_ENABLED):
+        self.enabled = enabled
+        self.max_open = max(1, max_open)
+        self.open_ttl_seconds = open_ttl_seconds
+        self._open: "OrderedDict[str, CallTrace]" = OrderedDict()
+        self._finished: Deque[CallTrace] = deque(maxlen=max(1, buffer_size))
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+        self.exporter = NdjsonBuffer(path, buffer_size, enabled=enabled, label="call traces")
+
+    def trace(self, call_sid: Optional[str], started_at: Optional[float] = None) -> Optional[CallTrace]:
+        """The open trace for a callSid, created on first use (None when disabled or no callSid)"""
+        if not self.enabled or not call_sid:
+            return None
+        with self._lock:
+            trace = self._open.get(call_sid)
+            if trace is None:
+                trace = self._open[call_sid] = CallTrace(call_sid, started_at)
+                if len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+                    self.evicted += 1
+            return trace
+
+    def finish(self, trace: Optional[CallTrace], outcome: str = "completed"):
+        """Close a trace and queue it for export (idempotent; None is ignored)"""
+        if trace is None:
+            return
+        with self._lock:
+            if trace.finished:
+                return
+            trace.finished = True
+            trace.outcome = outcome
+            if self._open.get(trace.call_sid) is trace:
+                del self._open[trace.call_sid]
+            self._finished.append(trace)
+        self.exporter.record(trace.export())
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Finish traces with no activity for open_ttl_seconds (calls that never streamed)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stale = [trace for trace in self._open.values() if now - trace.last_activity > self.open_ttl_seconds]
+        for trace in stale:
+            self.finish(trace, outcome="expired")
+        self.expired += len(stale)
+        return len(stale)
+
+    def get(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            trace = self._open.get(call_sid)
+            if trace is None:
+                trace = next((t for t in reversed(self._finished) if t.call_sid == call_sid), None)
+        return trace.export() if trace is not None else None
+
+    def query(self, span: Optional[str] = None, min_ms: Optional[float] = None,
+              include_open: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Most recent traces first. With `span`, only traces containing it; `min_ms`
+        then filters on that span's end offset (e.g. first audio after 2000 ms),
+        otherwise on the whole trace duration.
+        """
+        with self._lock:
+            traces = list(reversed(self._finished))
+            if include_open:
+                traces = list(reversed(self._open.values())) + traces
+        results = []
+        for trace in traces:
+            if span is not None:
+                value = trace.span_end_ms(span)
+                if value is None:
+                    continue
+            else:
+                value = None
+            exported = trace.export()
+            if min_ms is not None and (value if value is not None else exported["duration_ms"]) < min_ms:
+                continue
+            results.append(exported)
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            open_traces = len(self._open)
+            finished = len(self._finished)
+        export = self.exporter.get_stats()
+        return {
+            "enabled": self.enabled,
+            "open": open_traces,
+            "finished_in_memory": finished,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "export": export,
+        }
+
+
+CALL_TRACER = CallTracer()
+
+
+async def call_trace_flusher(tracer: CallTracer = CALL_TRACER,
+                             interval_seconds: float = CALL_TRACE_FLUSH_INTERVAL_SECONDS):
+    """Background task: expire abandoned traces and append finished ones to the NDJSON file"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            tracer.sweep()
+            await asyncio.to_thread(tracer.exporter.flush)
+        except Exception as e:
+            print(f"⚠️  Call trace flusher error: {e}")
@@ -0,0 +1,167 @@
+"""
+Caller-ID pool with destination-aware from-number selection.
+
+Each owned Twilio number is tagged with a country label, the destination
+prefixes it should serve (E.164 digits without '+', e.g. "34" or "1212") and
+its own CPS budget. Prefixes are indexed in a dict, so resolving a destination
+is at most one lookup per prefix length (bounded by the longest configured
+prefix, i.e. O(1)). Candidates are ordered longest-prefix first, then the
+untagged (global) numbers, and the first one whose CPS bucket is free wins;
+when all are saturated the one with the shortest wait is used.
+
+Pool configuration (TWILIO_NUMBER_POOL, JSON):
+    [{"number": "+34910000000", "country": "ES", "prefixes": ["34"], "cps": 1, "burst": 1},
+     {"number": "+15550000000", "country": "US", "prefixes": ["1"]},
+     {"number": "+15551111111", "country": "US"}]          # no prefixes = global fallback
+"""
+
+import os
+import re
+import json
+from typing import Callable, Dict, List, Optional
+
+from errors import ConfigurationError
+
+TWILIO_NUMBER_POOL = os.getenv("TWILIO_NUMBER_POOL", "")
+
+
+class CallerNumber:
+    """One owned from-number and its routing/rate metadata."""
+
+    __slots__ = ("number", "country", "prefixes", "cps", "burst")
+
+    def __init__(self, number: str, country: Optional[str] = None, prefixes: Optional[List[str]] = None,
+                 cps: Optional[float] = None, burst: Optional[int] = None):
+        self.number = number
+        self.country = country
+        self.prefixes = prefixes or []
+        self.cps = cps
+        self.burst = burst
+
+    def to_dict(self) -> Dict:
+        return {
+            "number": self.number,
+            "country": self.country,
+            "prefixes": self.prefixes,
+            "cps": self.cps,
+            "burst": self.burst,
+        }
+
+
+class CallerIdPool:
+    """Indexes from-numbers by destination prefix and picks the best available one."""
+
+    def __init__(self, numbers: List[CallerNumber], wait_fn: Optional[Callable[[str], float]] = None):
+        self.numbers = numbers
+        # Seconds a new call from a number would wait for CPS; 0 means free now
+        self.wait_fn = wait_fn or (lambda number: 0.0)
+        self._by_prefix: Dict[str, List[CallerNumber]] = {}
+        self._global: List[CallerNumber] = []
+        for entry in numbers:
+            if not entry.prefixes:
+                self._global.append(entry)
+            for prefix in entry.prefixes:
+                self._by_prefix.setdefault(prefix, []).append(entry)
+        self._prefix_lengths = sorted({len(p) for p in self._by_prefix}, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def candidates(self, destination: str) -> List[CallerNumber]:
+        """From-numbers for a destination: longest matching prefix first, then global, then the rest"""
+        digits = re.sub(r'\D', '', destination or "")
+        ordered: List[CallerNumber] = []
+        seen = set()
+        for length in self._prefix_lengths:
+            if len(digits) < length:
+                continue
+            for entry in self._by_prefix.get(digits[:length], ()):
+                if entry.number not in seen:
+                    seen.add(entry.number)
+                    ordered.append(entry)
+        for entry in self._global + self.numbers:
+            if entry.number not in seen:
+                seen.add(entry.number)
+                ordered.append(entry)
+        return ordered
+
+    def select(self, destination: str) -> Optional[CallerNumber]:
+        """Best from-number: first free candidate, else the one with the shortest CPS wait"""
+        best = None
+        best_wait = None
+        for entry in self.candidates(destination):
+            wait = self.wait_fn(entry.number)
+            if wait <= 0:
+                return entry
+            if best_wait is None or wait < best_wait:
+                best, best_wait = entry, wait
+        return best
+
+    def min_wait_seconds(self) -> float:
+        """Shortest CPS wait across the whole pool"""
+        return min((self.wait_fn(entry.number) for entry in self.numbers), default=0.0)
+
+    def get_stats(self) -> Dict:
+        return {
+            "size": len(self.numbers),
+            "prefixes": sorted(self._by_prefix),
+            "numbers": [entry.to_dict() for entry in self.numbers],
+        }
+
+
+def parse_caller_numbers(raw: str, fallback_number: Optional[str] = None) -> List[CallerNumber]:
+    """
+    Parse TWILIO_NUMBER_POOL JSON. An empty pool falls back to the single
+    TWILIO_PHONE_NUMBER as a global number.
+    """
+    if not raw or not raw.strip():
+        return [CallerNumber(fallback_number)] if fallback_number else []
+
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(f"Invalid TWILIO_NUMBER_POOL JSON: {e}", "CONFIGURATION_ERROR")
+    if not isinstance(entries, list):
+        raise ConfigurationError("TWILIO_NUMBER_POOL must be a JSON list", "CONFIGURATION_ERROR")
+
+    numbers = []
+    for entry in entries:
+        number = entry.get("number") if isinstance(entry, dict) else None
+        if not number or not re.fullmatch(r'\+\d{6,15}', number):
+            raise ConfigurationError(f"Invalid number in TWILIO_NUMBER_POOL: {entry!r}", "CONFIGURATION_ERROR")
+        raw_prefixes = entry.get("prefixes", [])
+        # A bare string such as "+34" would otherwise be iterated character by character
+        if not isinstance(raw_prefixes, list) or not all(isinstance(p, str) for p in raw_prefixes):
+            raise ConfigurationError(f"prefixes for {number} must be a list of strings: {raw_prefixes!r}",
+                                     "CONFIGURATION_ERROR")
+        prefixes = [p.lstrip("+") for p in raw_prefixes]
+        if any(not p.isdigit() for p in prefixes):
+            raise ConfigurationError(f"Invalid prefixes for {number}: {prefixes!r}", "CONFIGURATION_ERROR")
+        cps = entry.get("cps")
+        if cps is not None and (not _is_number(cps) or cps <= 0):
+            raise ConfigurationError(f"cps for {number} must be a positive number: {cps!r}", "CONFIGURATION_ERROR")
+        burst = entry.get("burst")
+        if burst is not None and (not isinstance(burst, int) or isinstance(burst, bool) or burst < 1):
+            raise ConfigurationError(f"burst for {number} must be a positive integer: {burst!r}",
+                                     "CONFIGURATION_ERROR")
+        numbers.append(CallerNumber(
+            number,
+            country=entry.get("country"),
+            prefixes=prefixes,
+            cps=float(cps) if cps is not None else None,
+            burst=burst,
+        ))
+    return numbers
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def build_caller_id_pool(raw: str, fallback_number: Optional[str], dispatcher) -> CallerIdPool:
+    """Build the pool and register each number's CPS budget with the call dispatcher"""
+    numbers = parse_caller_numbers(raw, fallback_number)
+    for entry in numbers:
+        if entry.cps is not None:
+            dispatcher.set_rate(entry.number, entry.cps, entry.burst or dispatcher.default_burst)
+    return CallerIdPool(numbers, wait_fn=dispatcher.wait_estimate)
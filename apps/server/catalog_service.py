@@ -0,0 +1,221 @@
+"""
+Hot-reloadable catalog of voices, agents and first messages.
+
+The three JSON datasets are loaded together into one immutable CatalogSnapshot
+(a VoiceManager, AgentManager and FirstMessageManager built from the same
+moment's files). A snapshot is validated, including cross-references against
+the era catalog (every era has greetings in every supported language), before
+it replaces the current one with a single reference assignment. Call setup
+reads `CATALOG.current` once and uses that snapshot throughout, so it never
+mixes datasets from two versions; a failed validation keeps the current one.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from era_config import SUPPORTED_LANGUAGES, get_era_catalog
+from voice_manager import VoiceManager, LANGUAGE_KEYS, VOICE_LATENCY_REWEIGHT_SECONDS
+from voice_latency import VoiceLatencyTracker
+from agent_manager import AgentManager
+from first_message_manager import FirstMessageManager
+
+CATALOG_RELOAD_INTERVAL_SECONDS = float(os.getenv("CATALOG_RELOAD_INTERVAL_SECONDS", "5"))  # 0 = no watcher
+
+
+class CatalogSnapshot:
+    """Voices, agents and first messages loaded together; never mutated after validation."""
+
+    def __init__(self, voices: VoiceManager, agents: AgentManager, first_messages: FirstMessageManager):
+        self.voices = voices
+        self.agents = agents
+        self.first_messages = first_messages
+        self.loaded_at = time.time()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "voices": self.voices.get_voice_statistics(),
+            "agents": len(self.agents.available_agents),
+            "first_message_eras": self.first_messages.get_statistics()["total_eras"],
+            "loaded_at": self.loaded_at,
+        }
+
+
+def validate_snapshot(snapshot: CatalogSnapshot, era_names: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Check a snapshot on its own and against the era catalog.
+    Returns: (errors, warnings) - any error rejects the snapshot
+    """
+    errors, warnings = [], []
+
+    seen_voice_ids = set()
+    for language in SUPPORTED_LANGUAGES:
+        lang_key = LANGUAGE_KEYS[language]
+        voices = snapshot.voices.voices_data.get(lang_key, [])
+        if not voices:
+            errors.append(f"voices: no '{lang_key}' voices")
+        for voice in voices:
+            if not voice.get("id") or not voice.get("name"):
+                errors.append(f"voices: {lang_key} entry without id/name: {voice!r}")
+            elif voice["id"] in seen_voice_ids:
+                errors.append(f"voices: duplicate id {voice['id']}")
+            seen_voice_ids.add(voice.get("id"))
+
+    agents = snapshot.agents.agents_data
+    if not agents:
+        errors.append("agents: no agents configured")
+    for agent in agents:
+        if not agent.get("name") or not agent.get("env_var"):
+            errors.append(f"agents: entry without name/env_var: {agent!r}")
+    # Unresolvable agent IDs are environment problems, not data errors: those agents are just not picked
+    for agent in snapshot.agents.misconfigured_agents:
+        warnings.append(f"agents: '{agent['name']}' excluded ({agent['reason']})")
+    if agents and not snapshot.agents.available_agents:
+        warnings.append("agents: no agent has a resolvable ID; outbound calls are refused")
+
+    era_errors, era_warnings = validate_era_references(snapshot, era_names)
+    return errors + era_errors, warnings + era_warnings
+
+
+def validate_era_references(snapshot: CatalogSnapshot, era_names: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Cross-check first messages against the era catalog: every era needs greetings
+    in every supported language. Run on catalog reloads and on era catalog reloads.
+    Returns: (errors, warnings)
+    """
+    errors, warnings = [], []
+    era_names = set(era_names)
+    first_messages = snapshot.first_messages.first_messages
+    for era_name in sorted(era_names):
+        for language in SUPPORTED_LANGUAGES:
+            if not first_messages.get(era_name, {}).get(language):
+                errors.append(f"first_messages: era '{era_name}' has no '{language}' greetings")
+    for era_name in sorted(set(first_messages) - era_names):
+        warnings.append(f"first_messages: '{era_name}' is not an era in the era catalog")
+    return errors, warnings
+
+
+class CatalogService:
+    """Owns the current CatalogSnapshot and swaps in new ones when the files change."""
+
+    def __init__(self, voices_file: Optional[str] = None, agents_file: Optional[str] = None,
+                 first_messages_file: Optional[str] = None,
+                 latency_tracker: Optional[VoiceLatencyTracker] = None,
+                 era_names: Callable[[], Iterable[str]] = lambda: [e["era_name"] for e in get_era_catalog()["eras"]]):
+        self.latency_tracker = latency_tracker
+        self.era_names = era_names
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_errors: List[str] = []
+        self.last_warnings: List[str] = []
+        # The initial load is installed even if invalid (the server must start); errors are reported
+        self._commit(self._build(voices_file, agents_file, first_messages_file), strict=False)
+        self._file_stats = self._stat_files()
+
+    def _build(self, voices_file: Optional[str] = None, agents_file: Optional[str] = None,
+               first_messages_file: Optional[str] = None) -> CatalogSnapshot:
+        # The latency tracker is shared, so estimates survive catalog reloads
+        return CatalogSnapshot(
+            VoiceManager(voices_file, latency_tracker=self.latency_tracker),
+            AgentManager(agents_file),
+            FirstMessageManager(first_messages_file),
+        )
+
+    def _files(self) -> List[str]:
+        snapshot = self.current
+        return [snapshot.voices.voices_file, snapshot.agents.agents_file,
+                snapshot.first_messages.first_messages_file]
+
+    def _stat_files(self) -> List[Optional[Tuple[int, int]]]:
+        stats = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stats.append(None)
+        return stats
+
+    def _commit(self, snapshot: CatalogSnapshot, strict: bool = True) -> bool:
+        errors, warnings = validate_snapshot(snapshot, self.era_names())
+        self.last_warnings = warnings
+        for warning in warnings:
+            print(f"⚠️  Catalog: {warning}")
+        if errors:
+            self.last_errors = errors
+            for error in errors:
+                print(f"❌ Catalog: {error}")
+            if strict:
+                return False
+        else:
+            self.last_errors = []
+        self.current = snapshot
+        return True
+
+    def reload(self) -> Dict[str, Any]:
+        """Load all three files and swap them in together if they validate"""
+        with self._lock:
+            file_stats = self._stat_files()
+            snapshot = self._build(*self._files())
+            if not self._commit(snapshot):
+                self.reload_errors += 1
+                return {"reloaded": False, "errors": self.last_errors, "warnings": self.last_warnings}
+            self._file_stats = file_stats
+            self.reloads += 1
+        print(f"🔄 Catalog reloaded: {snapshot.get_statistics()}")
+        return {"reloaded": True, "errors": [], "warnings": self.last_warnings}
+
+    def reload_if_changed(self) -> Optional[Dict[str, Any]]:
+        """Reload when any of the three files changed since the last load"""
+        if self._stat_files() == self._file_stats:
+            return None
+        result = self.reload()
+        if not result["reloaded"]:
+            # Don't retry the same broken files on every tick
+            self._file_stats = self._stat_files()
+        return result
+
+    def era_reference_errors(self, era_names: Iterable[str]) -> List[str]:
+        """Errors the current first messages would have against a new set of era names"""
+        return validate_era_references(self.current, era_names)[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.current.get_statistics(),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_errors": self.last_errors,
+            "last_warnings": self.last_warnings,
+        }
+
+
+def create_catalog_service(latency_tracker: Optional[VoiceLatencyTracker] = None) -> CatalogService:
+    """Catalog from the default shared_py/data files"""
+    service = CatalogService(latency_tracker=latency_tracker)
+    if service.last_errors:
+        print("⚠️  Catalog loaded with validation errors; fix the data files (they are watched)")
+    return service
+
+
+async def catalog_watcher(service: CatalogService, interval_seconds: float = CATALOG_RELOAD_INTERVAL_SECONDS):
+    """Background task: hot-reload voices, agents and first messages when their files change"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            # Parsing, validation and index rebuilds run in a worker thread so live media streams keep flowing
+            await asyncio.to_thread(service.reload_if_changed)
+        except Exception as e:
+            print(f"⚠️  Catalog watcher error: {e}")
+
+
+async def voice_reweighter(service: CatalogService, interval_seconds: float = VOICE_LATENCY_REWEIGHT_SECONDS):
+    """Background task: fold new voice latency samples into the current snapshot's selection weights"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(service.current.voices.reweight)
+        except Exception as e:
+            print(f"⚠️  Voice reweighter error: {e}")
@@ -1,11 +1,53 @@
 """
 Era configuration module for Time Traveler agent.
 Maps years to historical eras with appropriate expressions, voice settings, and context.
+
+Era data lives in shared_py/data/eras.json. `python era_config.py compile` validates
+it (ranges, languages, voice-settings bounds) and writes a compact artifact the
+server loads lazily on first use. The artifact records a digest of its source, so a
+stale artifact is ignored and rebuilt. Reloads build the new catalog completely and
+swap it in with a single reference assignment; calls in progress keep the
+payloads they started with.
 """
 
-from typing import Dict, Any, Optional
+import os
+import sys
+import json
+import time
+import bisect
+import asyncio
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, Any, List, Mapping, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
 
+from errors import ConfigurationError
+
+# Languages the agents speak: code -> display name
+SUPPORTED_LANGUAGES = {"en": "English", "es": "Spanish"}
+
+# Catalog files
+_DATA_DIR = Path(__file__).parent / "shared_py" / "data"
+ERA_CATALOG_FILE = os.getenv("ERA_CATALOG_FILE", str(_DATA_DIR / "eras.json"))
+ERA_CATALOG_COMPILED_FILE = os.getenv(
+    "ERA_CATALOG_COMPILED_FILE", str(Path(ERA_CATALOG_FILE).with_suffix(".compiled.json"))
+)
+ERA_CATALOG_RELOAD_INTERVAL_SECONDS = float(os.getenv("ERA_CATALOG_RELOAD_INTERVAL_SECONDS", "5"))  # 0 = no watcher
+
+# Accepted ranges per voice setting (speed is ElevenLabs' 0.7-1.2 range)
+VOICE_SETTING_BOUNDS = {
+    "stability": (0.0, 1.0),
+    "similarity_boost": (0.0, 1.0),
+    "style": (0.0, 1.0),
+    "speed": (0.7, 1.2),
+}
+REQUIRED_VOICE_SETTINGS = ("stability", "similarity_boost", "speed")
+# The agent prompt uses expression_1..3
+MIN_EXPRESSIONS = 3
+
 
 @dataclass
 class EraConfig:
@@ -18,567 +60,432 @@ class EraConfig:
     time_period: str
 
 
-# Era configurations mapped by year ranges
-ERA_CONFIGS = {
-    # ——— Periods before 0 AD (BCE) ———
-    (-1500, -800): EraConfig(
-        era_name="late_bronze_early_iron",
-        description="Late Bronze Age through the Early Iron Age",
-        expressions={
-            "en": [
-                "By decree of great kings and their scribes...",
-                "Across the sea routes our ships bear bronze and grain...",
-                "Under the gaze of the sun god, we forge iron anew...",
-                "Let the tablets record what we have witnessed..."
-            ],
-            "es": [
-                "Por decreto de grandes reyes y sus escribas...",
-                "Por las rutas del mar nuestras naves llevan bronce y grano...",
-                "Bajo la mirada del dios del sol, forjamos hierro de nuevo...",
-                "Que las tablillas registren lo que hemos visto..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.35,
-            "similarity_boost": 0.7,
-            "speed": 1.05  # Measured, ceremonial diction
-        },
-        context_hint="""Large, centralized palace economies dominate the eastern Mediterranean. Mycenae, Hattusa, Ugarit, and New Kingdom Egypt coordinate agriculture, craft production, and long-distance trade in copper, tin, grain, textiles, and luxury goods. Writing is specialized and administrative (Linear B, cuneiform, hieratic), ships are oared, and diplomacy moves by gift and oath among "Great Kings."
-
-Around the 12th–11th centuries BCE, this world fragments. Causes overlap—earthquakes, droughts, internal revolts, disrupted trade routes, and maritime/land incursions often grouped under the term "Sea Peoples." Archives burn, palaces fall, and many regions experience population shifts and simpler political forms. Iron tools and weapons spread gradually, not because iron is superior at first, but because its ores are more widely available than tin, allowing local production where bronze networks have broken.
-
-In the aftermath, smaller chiefdoms and early village polities take root. Oral tradition flourishes where scribal offices vanish; new ethnic labels coalesce; old gods persist under new patronage. The "international" Late Bronze Age dissolves into regional stories, setting conditions for the Archaic Greek polis, the Neo-Assyrian resurgence in the Near East, and new trade circuits that will knit the next era together.""",
-        time_period="Late Bronze–Early Iron Age"
-    ),
-
-    (-800, 0): EraConfig(
-        era_name="classical_antiquity",
-        description="Classical Greece and the Roman Republic",
-        expressions={
-            "en": [
-                "By Zeus!",
-                "In the agora we debated this very matter...",
-                "As the Senate convenes, hear me...",
-                "As the poets and philosophers teach..."
-            ],
-            "es": [
-                "¡Por Zeus!",
-                "En el ágora debatimos justo este asunto...",
-                "Mientras se reúne el Senado, escuchadme...",
-                "Como enseñan los poetas y filósofos..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.5,
-            "similarity_boost": 0.7,
-            "speed": 1.1  # Lively rhetoric and oratory cadence
-        },
-        context_hint="""The Mediterranean reorganizes around independent Greek poleis and, later, the Roman Republic's expansion. In the Greek world (8th–4th c. BCE), city-states blend citizen politics, hoplite warfare, maritime trade, and intense competition in art, drama, and philosophy. Colonization spreads Greek settlements and culture from the Black Sea to Iberia. Thinkers from the Presocratics to Plato and Aristotle formalize inquiry; historians like Herodotus and Thucydides craft critical narratives of human affairs.
-
-Alexander's conquests (late 4th c. BCE) fuse Greek elites with Near Eastern and Egyptian traditions, birthing the Hellenistic kingdoms. Science and scholarship flourish at centers like Alexandria: mathematics, astronomy, medicine, and geography take cumulative steps that will echo for millennia.
-
-Meanwhile, Rome evolves from city-republic to Mediterranean hegemon. Institutions—Senate, assemblies, magistracies—shape civic identity; Latin law and road-building tie provinces together. Expansion generates wealth and strain: social conflicts, slave labor economies, and elite rivalries culminate in civil wars and the end of the Republic. By the 1st c. BCE–1st c. CE, the framework for imperial rule is set, blending Roman pragmatism with a cosmopolitan Hellenistic cultural sphere.""",
-        time_period="Classical Antiquity"
-    ),
-    (0, 500): EraConfig(
-        era_name="roman_empire_late_antiquity",
-        description="Roman Empire, Pax Romana to Late Antiquity",
-        expressions={
-            "en": [
-                "By the will of the Senate and the People of Rome...",
-                "Under the peace of the Emperor, our roads bind the world...",
-                "As the legions march, the law follows...",
-                "In these changing times, new faiths take root..."
-            ],
-            "es": [
-                "Por la voluntad del Senado y del Pueblo de Roma...",
-                "Bajo la paz del Emperador, nuestras calzadas atan el mundo...",
-                "Donde marchan las legiones, la ley les sigue...",
-                "En estos tiempos cambiantes, nuevas fes echan raíces..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.5,
-            "similarity_boost": 0.75,
-            "speed": 1.05  # Imperial gravitas, measured pace
-        },
-        context_hint="""Empire means infrastructure: stone roads, milestones, bridges, harbors, and administrative routines that regularize taxation, law, and movement. The Pax Romana (1st–2nd c. CE) enables large-scale trade in grain, wine, oil, ceramics, and luxuries across the Mediterranean and beyond. Cities are civic stages—baths, theaters, amphitheaters—where local elites perform loyalty through benefaction, and law courts arbitrate disputes with written procedures.
-
-From the 3rd century, crises mount: frontier pressures, internal usurpers, fiscal debasement, and plague test imperial cohesion. Reforms centralize power, split administration, and fortify borders. Christianity, once a persecuted minority, gains legal status (4th c. CE) and imperial patronage; new religious identities and debates reshape communities, art, and moral life.
-
-Late Antiquity is not mere collapse; it's transition. Regional economies persist, cities adapt, and new powers arise (e.g., Goths, Vandals; in the east, a resilient Roman/Byzantine polity). Latin and Greek cultural worlds diverge administratively even as trade and diplomacy continue. The old imperial world narrows in the west and transforms in the east, preparing the ground for medieval polities and faiths.""",
-        time_period="Roman Empire / Late Antiquity"
-    ),
-
-    (500, 1000): EraConfig(
-        era_name="early_medieval",
-        description="Early Middle Ages",
-        expressions={
-            "en": [
-                "God guard us on these rough roads...",
-                "In the cloister we preserve the wisdom of ages...",
-                "The king’s peace is thin at the borderlands...",
-                "By oath and kin, we stand fast..."
-            ],
-            "es": [
-                "Dios nos guarde en estos caminos ásperos...",
-                "En el claustro preservamos la sabiduría de los siglos...",
-                "La paz del rey es frágil en las fronteras...",
-                "Por juramento y linaje, nos mantenemos firmes..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.5,
-            "similarity_boost": 0.8,
-            "speed": 0.98  # Monastic calm, frontier uncertainty
-        },
-        context_hint="""Western Europe fragments into successor kingdoms with mixed Roman, Christian, and "barbarian" legal traditions. Authority is personal and local: ties of lordship, kin, and oath often matter more than distant claims. Town life shrinks in many areas, though not everywhere; rural estates and fortified strongpoints become anchors of security and production.
-
-Monasticism spreads a discipline of prayer, work, and learning. Scriptoria preserve Christian texts and, selectively, classical literature; missionaries carry Latin Christianity north and east. In the Mediterranean and Near East, the rise of Islam (7th c.) creates a dynamic new imperial and commercial sphere, connecting Arabia, the Levant, North Africa, and Iberia under Arabic language, law, and scholarship.
-
-Trade never stops; it reroutes. River systems and fairs link producers and consumers; silver inflows and slave routes reshape exchanges. Cultural horizons remain regional but not isolated: Irish monks reach the continent, Andalusi cities synthesize traditions, and the Byzantine Empire maintains urban life, taxation, and learned bureaucratic rule in the east.""",
-        time_period="Early Middle Ages"
-    ),
-
-    (1000, 1300): EraConfig(
-        era_name="high_medieval",
-        description="High Middle Ages",
-        expressions={
-            "en": [
-                "By my troth!",
-                "The cathedral spires reach toward heaven...",
-                "Let guild and charter bear witness...",
-                "As true as tempered steel..."
-            ],
-            "es": [
-                "¡Por mi fe!",
-                "Las agujas de la catedral se alzan hacia el cielo...",
-                "Que el gremio y la carta den fe...",
-                "Tan cierto como el acero templado..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.6,
-            "similarity_boost": 0.82,
-            "speed": 1.0  # Balanced, dignified medieval tone
-        },
-        context_hint="""Population and production grow with better plows, crop rotations, and expanded acreage. Mills harness water and wind; market towns and guilds standardize craft training and reputation. Royal courts and communes write charters that clarify rights, obligations, and taxes. Cathedrals rise as engineering feats and religious statements, financed by long campaigns of donations and skilled labor.
-
-Universities emerge (Bologna, Paris, Oxford), professionalizing law, theology, and medicine. Scholastic method structures debate; Latin binds the learned across borders, while vernacular literature blooms—epic, romance, lyric. Crusading energies direct violence outward; at home, legal pluralism (royal, canon, urban) grows more intricate.
-
-The age has order and friction: feudal ties and cash economies overlap; saints' cults and reasoned disputation coexist. Europe's map is a mosaic of lordships, bishoprics, communes, and kingdoms learning to tax, legislate, and record at scale.""",
-        time_period="High Middle Ages"
-    ),
-
-    (1300, 1400): EraConfig(
-        era_name="late_medieval",
-        description="Late Middle Ages",
-        expressions={
-            "en": [
-                "In these troubled years, we endure...",
-                "Plague and famine test our faith...",
-                "Merchants and letters change the world’s course...",
-                "Heed the chronicler’s hand, for memory is our bulwark..."
-            ],
-            "es": [
-                "En estos años convulsos, resistimos...",
-                "La peste y el hambre ponen a prueba nuestra fe...",
-                "Los mercaderes y las letras cambian el rumbo del mundo...",
-                "Atiende la mano del cronista; la memoria es nuestro bastión..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.6,
-            "similarity_boost": 0.8,
-            "speed": 0.98  # Somber, reflective tone
-        },
-        context_hint="""The 14th century brings hard shocks: repeated plague waves reduce populations drastically, shifting wages, rents, and social expectations. Warfare (e.g., Hundred Years' War), fiscal crisis, and peasant/urban revolts stress governments and elites. Famine in some decades compounds instability; religious movements—reformist or heterodox—test ecclesiastical authority.
-
-Yet institutions adapt. Tax systems and representative assemblies mature in several realms; accounting and credit techniques deepen; Italian and northern city networks intensify long-distance commerce. Literature in the vernacular reaches new heights (Dante, Chaucer), painting explores perspective, and humanist study of classical texts germinates.
-
-By the 15th century, consolidation trends gather: stronger monarchies, new military technologies (gunpowder tactics), and patronage circuits that will fuel the Renaissance. Crisis and creativity advance together, preparing the cultural and political turn to come.""",
-        time_period="Late Middle Ages"
-    ),
-
-    (1400, 1600): EraConfig(
-        era_name="renaissance",
-        description="Renaissance period",
-        expressions={
-            "en": [
-                "What a marvel of nature!",
-                "In the spirit of discovery...",
-                "The arts and sciences flourish...",
-                "As Dante himself wrote..."
-            ],
-            "es": [
-                "¡Qué maravilla de la naturaleza!",
-                "En el espíritu del descubrimiento...",
-                "Las artes y ciencias florecen...",
-                "Como el mismo Dante escribió..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.7,
-            "similarity_boost": 0.75,
-            "speed": 1.0  # Energetic, artistic pace
-        },
-        context_hint="""Humanism reframes learning: recover the best of classical antiquity, read sources critically, write with clarity and style. Printing presses scale distribution of texts; workshops mix art and engineering—perspective, anatomy, optics—making images persuasive tools for faith, status, and inquiry. Patronage courts (Medici, papal Rome, princely courts in Iberia and the Empire) concentrate talent and money.
-
-Exploration and conquest open Atlantic systems: Iberian voyages connect Europe, Africa, and the Americas, moving people, crops, pathogens, gold, and ideas. Religious unity fractures in the early 16th century; reform and counter-reform rewire authority, ritual, and education. Science inches toward systematic observation and mathematical description, with alchemy and natural magic sharing benches with emerging empiricism.
-
-The "rebirth" is uneven and plural—a set of regional renaissances that together shift Europe's center of gravity toward textual criticism, statecraft by bureaucracy, and image-driven persuasion in church and court.""",
-        time_period="Renaissance"
-    ),
-
-    (1600, 1750): EraConfig(
-        era_name="baroque",
-        description="Baroque era",
-        expressions={
-            "en": [
-                "Most gracious indeed!",
-                "In the court of the Sun King...",
-                "The grandeur of our age...",
-                "With utmost refinement..."
-            ],
-            "es": [
-                "¡Muy gracioso en verdad!",
-                "En la corte del Rey Sol...",
-                "La grandeza de nuestra época...",
-                "Con el mayor refinamiento..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.6,
-            "similarity_boost": 0.8,
-            "speed": 1.0  # Refined but not too slow
-        },
-        context_hint="""States and churches speak in spectacle. Architecture, music, and painting aim for awe—grand façades, deep chiaroscuro, polyphonic masses. Absolutist monarchies centralize revenue and armies; elsewhere, federations and republics balance estates and merchants. Confessional lines shape alliances and censorship, yet scientific societies (Royal Society, Académie) institutionalize experiment and shared critique.
-
-Global trade intensifies through chartered companies and coerced labor systems. Atlantic slavery scales into a brutal economic engine linking Europe, Africa, and the Americas. Silver from the New World fuels monetization; Asian luxuries reshape taste and domestic interiors. Navigation, cartography, and instruments advance; telescopes and microscopes extend the knowable.
-
-Behind ornament stands administration: cadasters, codes, and fiscal reforms. The baroque eye choreographs attention; the modern state learns to count, drill, and plan.""",
-        time_period="Baroque Era"
-    ),
-
-
-    # Industrial Revolution (1750-1900)
-    (1750, 1900): EraConfig(
-        era_name="industrial",
-        description="Industrial Revolution",
-        expressions={
-            "en": [
-                "What progress we have made!",
-                "The age of steam and steel...",
-                "Industry transforms our world...",
-                "Most remarkable ingenuity!"
-            ],
-            "es": [
-                "¡Qué progreso hemos logrado!",
-                "La era del vapor y el acero...",
-                "La industria transforma nuestro mundo...",
-                "¡Ingenio extraordinario!"
-            ]
-        },
-        voice_settings={
-            "stability": 0.5,
-            "similarity_boost": 0.7,
-            "speed": 1.1  # Energetic industrial pace
-        },
-        context_hint="""Coal, steam, and mechanization transform production and daily time. Textile mills lead, then iron, steel, rail, and steamships integrate regions into national and imperial markets. Urbanization accelerates; factory discipline and clock time organize labor. Mass newspapers, cheap print, and later telegraphy create simultaneity—people experience faraway events almost together.
-
-Capital pools in banks and joint-stock companies; crises and booms ripple globally. Reformers and labor movements fight for sanitation, schooling, suffrage, and safer work. Science links to industry: chemistry, electricity, and engineering research cycle into patents and products. Empire becomes an economic as well as political system, moving raw materials out and finished goods in.
-
-By the late 19th century, networks (rails, cables) compress distance, while social questions—inequality, urban poverty, public health—define new politics. The modern consumer economy and the modern social state are both seeded here.""",
-        time_period="Industrial Revolution"
-    ),
-
-   (1900, 1945): EraConfig(
-        era_name="modernism_world_wars",
-        description="Modernism and the World Wars",
-        expressions={
-            "en": [
-                "The old world cracks; a new one hums with machines...",
-                "Under dark clouds, nations march...",
-                "In cafés and labs, revolutions of mind and matter...",
-                "Report it straight—facts must hold the line..."
-            ],
-            "es": [
-                "El viejo mundo se resquebraja; el nuevo zumba con máquinas...",
-                "Bajo nubes oscuras, las naciones marchan...",
-                "En cafés y laboratorios, revoluciones de mente y materia...",
-                "Cuéntalo claro: los hechos deben sostener la línea..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.4,
-            "similarity_boost": 0.7,
-            "speed": 1.08  # Urgent, modern, but still human
-        },
-        context_hint="""Early 20th-century culture breaks forms to match a world of machines, mass media, and crowded cities. Modernist art and literature experiment with viewpoint, fragmentation, and speed; cinema teaches audiences to read cuts. Science rewrites fundamentals: relativity and quantum theory upend space, time, and matter; psychology probes the unconscious.
-
-Two world wars mobilize entire societies. Industry becomes armory; propaganda saturates; genocide and aerial bombing redefine horror. Borders are redrawn, empires falter, and postwar orders attempt collective security and economic management. Radio, then early television, carry leaders and narratives directly into homes.
-
-Between and after the wars, welfare states, planned economies, and developmental visions compete. The big picture is volatility harnessed by bureaucracy and technology—an age certain of technique and uncertain of ends.""",
-        time_period="Modernism & World Wars"
-    ),
-
-    (1945, 1991): EraConfig(
-        era_name="cold_war",
-        description="Cold War Era",
-        expressions={
-            "en": [
-                "Across the wire, signals and shadows...",
-                "Under the atom’s glare, we choose our future...",
-                "Mind the line—ideologies draw tight borders...",
-                "Progress is planned, but curiosity leaks through..."
-            ],
-            "es": [
-                "A través del cable, señales y sombras...",
-                "Bajo el resplandor del átomo, elegimos nuestro futuro...",
-                "Atento a la línea: las ideologías tensan fronteras...",
-                "El progreso se planifica, pero la curiosidad se filtra..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.30,
-            "similarity_boost": 0.72,
-            "speed": 1.05  # Tense but steady
-        },
-        context_hint="""A bipolar order crystallizes around the U.S. and USSR, each with allies, ideologies, and nuclear arsenals. Deterrence doctrine makes survival a calculation; crises in Berlin, Cuba, and elsewhere test red lines. Proxy wars and decolonization reshape Asia, Africa, and the Middle East, as new nations navigate development, nonalignment, or clientage.
-
-Domestically, both blocs mobilize science and education; space programs stage prestige and practical gains (satellites, microelectronics). Mass consumer culture expands in the West; censorship and planned production frame daily life in the East. Intelligence services, covert operations, and propaganda are routine instruments of statecraft.
-
-Détente ebbs and flows; by the late 1980s, economic strains and reform movements crack the Soviet model. The era closes with political realignments, market transitions, and unresolved regional conflicts seeded over decades of superpower competition.""",
-        time_period="Cold War"
-    ),
-
-    (1991, 2008): EraConfig(
-        era_name="globalization_early_internet",
-        description="Globalization and the Early Internet",
-        expressions={
-            "en": [
-                "Dial in—we’re logging on...",
-                "Across new markets, ideas move at light speed...",
-                "Open standards, open worlds...",
-                "From garages to IPOs, the future compiles..."
-            ],
-            "es": [
-                "Conéctate: estamos entrando en línea...",
-                "Por nuevos mercados, las ideas viajan a la velocidad de la luz...",
-                "Estándares abiertos, mundos abiertos...",
-                "De garajes a OPVs, el futuro compila..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.35,
-            "similarity_boost": 0.68,
-            "speed": 1.1  # Energetic dot-com optimism
-        },
-        context_hint="""The 1990s–2000s see market liberalization, global supply chains, and a unipolar moment. PCs and the World Wide Web democratize publishing and discovery; search engines and open-source communities organize vast, voluntary collaboration. Mobile phones spread first as voice/text devices, then as proto-computers.
-
-Culture globalizes through cable, file-sharing, and early streaming. Finance innovates (and overreaches), culminating in crises that propagate quickly through integrated markets. Institutions experiment with trade regimes and regional unions, even as backlash politics gestate.
-
-The net's ethos is "open by default," but business models coalesce around portals, ads, and platforms. The seeds of social media and cloud services are planted, ready to scale in the next phase.""",
-        time_period="Globalization & Early Internet"
-    ),
-
-    (2008, 2030): EraConfig(
-        era_name="mobile_social_cloud",
-        description="Mobile, Social, and Cloud",
-        expressions={
-            "en": [
-                "Push the update—everyone’s already here...",
-                "Feeds hum; networks never sleep...",
-                "Scale it to millions before lunch...",
-                "Your pocket just became the control room..."
-            ],
-            "es": [
-                "Lanza la actualización: ya está todo el mundo...",
-                "Los feeds zumban; las redes no duermen...",
-                "Escálalo a millones antes de comer...",
-                "Tu bolsillo se ha vuelto la sala de control..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.35,
-            "similarity_boost": 0.7,
-            "speed": 1.05  # Fast, always online
-        },
-        context_hint="""Smartphones turn connectivity into a constant. App ecosystems, social feeds, and push notifications create real-time publics; cloud computing moves storage and computation out of local devices, letting startups serve millions quickly. Recommendation systems shape attention; creators and influencers professionalize.
-
-Work and consumption reorganize around platforms: ride-hailing, food delivery, e-commerce logistics, and streaming. Data becomes strategic—collected, analyzed, and monetized. Privacy norms, antitrust debates, and content moderation emerge as central policy questions.
-
-Teams ship continuously; devops and SaaS standardize deployment; AI/ML enter mainstream products via perception and ranking. The upside is scale and convenience; the downside is addiction loops, polarization dynamics, and fragile dependencies on a few hyperscale providers.""",
-        time_period="Mobile • Social • Cloud"
-    ),
-
-    # AI Renaissance (2030-2050)
-    (2030, 2050): EraConfig(
-        era_name="ai_renaissance",
-        description="AI-focused era",
-        expressions={
-            "en": [
-                "The neural networks whisper such wisdom...",
-                "My AI companion suggests we consider...",
-                "In the symbiosis of human and artificial minds...",
-                "As the algorithms reveal the patterns..."
-            ],
-            "es": [
-                "Las redes neuronales susurran tal sabiduría...",
-                "Mi compañero de IA sugiere que consideremos...",
-                "En la simbiosis de mentes humanas y artificiales...",
-                "Mientras los algoritmos revelan los patrones..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.5,
-            "similarity_boost": 0.8,
-            "speed": 1.1  # AI precision with good pace
-        },
-        context_hint="""General-purpose models move from narrow perception to flexible language-reasoning systems, then tool-using agents. Organizations pair humans with AI copilots across code, documents, design, and operations. The frontier shifts from single answers to orchestrated workflows: retrieval, planning, calling APIs, and verifying outputs.
-
-Compute, data, and safety become policy issues as well as engineering concerns. Enterprises build "AI safety rails" (guardrails, evals, provenance) while regulators debate transparency and accountability. Education and creativity change shape: individuals prototype software, research, and media at the pace once reserved for teams.
-
-Productivity rises unevenly—firms and workers who learn to delegate to machines move faster. The strategic picture: AI as a new "general-purpose technology," diffusing across sectors, redrawing value chains, and forcing new norms for trust and attribution.""",
-        time_period="AI Renaissance"
-    ),
-
-    # Interplanetary Era (2050-2200)
-    (2050, 2200): EraConfig(
-        era_name="interplanetary",
-        description="Multi-planetary species",
-        expressions={
-            "en": [
-                "By the rings of Saturn!",
-                "When I last visited the Martian colonies...",
-                "The void between worlds teaches us...",
-                "As we drift through the asteroid gardens..."
-            ],
-            "es": [
-                "¡Por los anillos de Saturno!",
-                "Cuando visité por última vez las colonias marcianas...",
-                "El vacío entre mundos nos enseña...",
-                "Mientras navegamos por los jardines de asteroides..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.5,
-            "similarity_boost": 0.7,
-            "speed": 1.1  # Cosmic contemplation but not too slow
-        },
-        context_hint="""Launch costs fall and in-situ resource utilization makes off-Earth living less exotic. The first sustainable footholds—cislunar infrastructure, Mars surface habitats—blend government programs with commercial logistics. Life support, radiation shielding, and closed-loop systems are the core constraints; autonomy and robotics fill labor gaps.
-
-Economically, space becomes a layered stack: communications and Earth observation; manufacturing and research in microgravity niches; extraction/refining where it makes sense; tourism for the wealthy, then broader. Jurisdictions and property norms evolve from treaties to practical governance—safety, liability, and resource rights are negotiated in real time.
-
-Culturally, a spacefaring identity emerges: frontier risk, long-delay communications, and communities optimized for reliability over comfort. The frontier mindset returns, but with spreadsheets, lawyers, and biosafety officers.""",
-        time_period="Interplanetary Era"
-    ),
-
-    # Transcendent Age (2200-2500)
-    (2200, 2500): EraConfig(
-        era_name="transcendent",
-        description="Post-human transcendence",
-        expressions={
-            "en": [
-                "Through the quantum foam of consciousness...",
-                "My distributed essence perceives...",
-                "In the eternal dance of information and energy...",
-                "Beyond the veil of linear time..."
-            ],
-            "es": [
-                "A través de la espuma cuántica de la conciencia...",
-                "Mi esencia distribuida percibe...",
-                "En la danza eterna de información y energía...",
-                "Más allá del velo del tiempo lineal..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.4,
-            "similarity_boost": 0.6,
-            "speed": 1.0  # Ethereal but not too slow
-        },
-        context_hint="""Biology and computation blur. Individuals extend cognition with neural interfaces; groups coordinate through shared knowledge layers; some people choose radical life extension or substrate-diverse existence. Identity gains persistence beyond a single body but must still solve continuity, consent, and rights.
-
-Economies pivot toward intangible production: models, simulations, designs that instantiate on demand. Governance experiments with personhood standards (for uploaded, synthetic, or collective minds), while ethical frameworks catch up to experiences outside evolutionary precedent.
-
-Day-to-day life is less about scarcity of matter and more about the curation of attention, memory, and experience. "Place" becomes layered—physical, virtual, and cognitive spaces interleave, and travel means switching contexts as much as coordinates.""",
-        time_period="Transcendent Age"
-    ),
-
-    # Far Future (2500+)
-    (2500, 3000): EraConfig(
-        era_name="far_future",
-        description="Unimaginable evolution",
-        expressions={
-            "en": [
-                "In the symphony of galactic thoughts...",
-                "The ancient humans would call this magic...",
-                "Across the spiral arms of meaning...",
-                "When matter and mind became one..."
-            ],
-            "es": [
-                "En la sinfonía de pensamientos galácticos...",
-                "Los antiguos humanos llamarían a esto magia...",
-                "A través de los brazos espirales del significado...",
-                "Cuando la materia y la mente se volvieron una..."
-            ]
-        },
-        voice_settings={
-            "stability": 0.,
-            "similarity_boost": 0.5,
-            "speed": 1.0  # Timeless, profound but not too slow
-        },
-        context_hint="""Civilization operates at astronomical scales. Energy capture approaches fractions of stellar output; habitats multiply from planetary surfaces to engineered megastructures. Long-duration planning spans millennia; archives and institutions aim to survive stellar and geological change.
-
-Intelligence exists across forms—biological, synthetic, hybrid—and across timescales, from microsecond decisions to centuries-long projects. Culture is an ecology of memories and styles, recombining across light-hours. Ethics centers on coexistence among diverse minds and the management of colossal externalities.
-
-For individuals, the universe feels both domestic and sublime. Journeys might traverse not just distance but frames of computation or perception. The grand challenge is steering abundance without losing purpose or pluralism.""",
-        time_period="Far Future"
-    )
-}
-
-
-def get_era_config(year: int) -> Optional[EraConfig]:
-    """Get era configuration for a given year."""
-    for (start_year, end_year), config in ERA_CONFIGS.items():
-        if start_year <= year <= end_year:
-            return config
-    
-    # Default to far future if year is beyond our mappings
-    if year > 3000:
-        return ERA_CONFIGS[(2500, 3000)]
-    
-    # Default to ancient if year is before our mappings  
-    if year < -1500:
-        return ERA_CONFIGS[(-1500, -800)]
-    
-    return None
+class EraIndex:
+    """
+    Era ranges compiled into a sorted boundary array for O(log n) lookup.
+
+    Ranges are half-open as (start, end]: a boundary year belongs to the era that
+    ends there (0 is classical_antiquity, 1000 is early_medieval). Years outside
+    the covered span clamp to the first or last era.
+    """
+
+    def __init__(self, configs: Dict[Tuple[int, int], EraConfig]):
+        ranges = sorted(configs)
+        if not ranges:
+            raise ConfigurationError("Era catalog is empty", "CONFIGURATION_ERROR")
+        for start_year, end_year in ranges:
+            if start_year >= end_year:
+                raise ConfigurationError(f"Era range ({start_year}, {end_year}) is empty", "CONFIGURATION_ERROR")
+        for (_, prev_end), (start_year, end_year) in zip(ranges, ranges[1:]):
+            if start_year < prev_end:
+                raise ConfigurationError(
+                    f"Era range ({start_year}, {end_year}) overlaps the era ending at {prev_end}",
+                    "CONFIGURATION_ERROR"
+                )
+            if start_year > prev_end:
+                raise ConfigurationError(
+                    f"Gap between eras: no era covers years {prev_end + 1} to {start_year}",
+                    "CONFIGURATION_ERROR"
+                )
+        self.min_year = ranges[0][0]
+        self.max_year = ranges[-1][1]
+        self._ends: List[int] = [end_year for _, end_year in ranges]
+        self._configs: List[EraConfig] = [configs[r] for r in ranges]
+
+    def lookup(self, year: int) -> EraConfig:
+        # First era whose end is >= year; past the last end, clamp to the last era
+        index = bisect.bisect_left(self._ends, year)
+        return self._configs[min(index, len(self._configs) - 1)]
+
+
+# Voice settings ElevenLabs accepts as conversation TTS overrides ('style' is not one)
+TTS_OVERRIDE_KEYS = ("stability", "similarity_boost", "speed")
+
+
+class EraSessionPayload(NamedTuple):
+    """Per-(era, language) session data, built once and shared read-only by every call."""
+    era_name: str
+    time_period: str
+    dynamic_variables: Mapping[str, Any]  # Everything except the per-call era_year
+    voice_settings: Mapping[str, Any]
+    tts_override: Mapping[str, Any]
 
 
-def get_era_session_variables(year: int, language: str) -> Dict[str, Any]:
-    """Get session variables for ElevenLabs agent based on year and language."""
-    era_config = get_era_config(year)
-    
-    if not era_config:
-        # Fallback to contemporary
-        era_config = ERA_CONFIGS[(2000, 2030)]
-    
+def _build_session_payload(era_config: EraConfig, language: str) -> EraSessionPayload:
     # Get expressions for the specified language, fallback to English
     expressions = era_config.expressions.get(language, era_config.expressions.get("en", []))
-    
-    return {
-        "era_year": year,
+    dynamic_variables = {
         "language": language,
-        "language_name": "English" if language == "en" else "Spanish" if language == "es" else language,
+        "language_name": SUPPORTED_LANGUAGES.get(language, language),
         "era_name": era_config.era_name,
         "time_period": era_config.time_period,
         "era_context": era_config.context_hint,
         "expression_1": expressions[0] if len(expressions) > 0 else "",
         "expression_2": expressions[1] if len(expressions) > 1 else "",
         "expression_3": expressions[2] if len(expressions) > 2 else "",
-        "voice_settings": era_config.voice_settings  # Keep for conversation overrides
     }
+    return EraSessionPayload(
+        era_name=era_config.era_name,
+        time_period=era_config.time_period,
+        dynamic_variables=MappingProxyType(dynamic_variables),
+        voice_settings=MappingProxyType(dict(era_config.voice_settings)),
+        tts_override=MappingProxyType({key: era_config.voice_settings.get(key) for key in TTS_OVERRIDE_KEYS}),
+    )
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_era_entries(entries) -> List[str]:
+    """Check raw era entries. Returns a list of problems (empty when valid)."""
+    if not isinstance(entries, list) or not entries:
+        return ["'eras' must be a non-empty list"]
+
+    errors = []
+    names = set()
+    ranges = []
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append(f"eras[{position}] is not an object")
+            continue
+        label = entry.get("era_name") or f"eras[{position}]"
+        for field in ("era_name", "description", "time_period", "context_hint"):
+            if not isinstance(entry.get(field), str) or not entry.get(field).strip():
+                errors.append(f"{label}: '{field}' must be a non-empty string")
+        if entry.get("era_name") in names:
+            errors.append(f"{label}: duplicate era_name")
+        names.add(entry.get("era_name"))
+
+        start_year, end_year = entry.get("start_year"), entry.get("end_year")
+        if not isinstance(start_year, int) or not isinstance(end_year, int) \
+                or isinstance(start_year, bool) or isinstance(end_year, bool):
+            errors.append(f"{label}: start_year and end_year must be integers")
+        elif start_year >= end_year:
+            errors.append(f"{label}: start_year {start_year} must be before end_year {end_year}")
+        else:
+            ranges.append((start_year, end_year, label))
+
+        expressions = entry.get("expressions")
+        if not isinstance(expressions, dict):
+            errors.append(f"{label}: 'expressions' must map language -> list")
+        else:
+            for language in expressions:
+                if language not in SUPPORTED_LANGUAGES:
+                    errors.append(f"{label}: unsupported language '{language}'")
+            for language in SUPPORTED_LANGUAGES:
+                phrases = expressions.get(language)
+                if not isinstance(phrases, list) or len(phrases) < MIN_EXPRESSIONS \
+                        or not all(isinstance(p, str) and p.strip() for p in phrases):
+                    errors.append(f"{label}: needs at least {MIN_EXPRESSIONS} '{language}' expressions")
+
+        voice_settings = entry.get("voice_settings")
+        if not isinstance(voice_settings, dict):
+            errors.append(f"{label}: 'voice_settings' must be an object")
+        else:
+            for key in REQUIRED_VOICE_SETTINGS:
+                if key not in voice_settings:
+                    errors.append(f"{label}: missing voice setting '{key}'")
+            for key, value in voice_settings.items():
+                bounds = VOICE_SETTING_BOUNDS.get(key)
+                if bounds is None:
+                    errors.append(f"{label}: unknown voice setting '{key}'")
+                elif not _is_number(value) or not bounds[0] <= value <= bounds[1]:
+                    errors.append(f"{label}: voice setting {key}={value!r} outside {bounds[0]}-{bounds[1]}")
+
+    ranges.sort()
+    for (_, prev_end, prev_label), (start_year, _, label) in zip(ranges, ranges[1:]):
+        if start_year < prev_end:
+            errors.append(f"{label}: overlaps {prev_label} (starts {start_year}, previous ends {prev_end})")
+        elif start_year > prev_end:
+            errors.append(f"Gap between {prev_label} and {label}: years {prev_end + 1} to {start_year}")
+    return errors
+
+
+def compile_era_source(source: bytes) -> Dict[str, Any]:
+    """Validate an eras.json document and return the compiled artifact (eras sorted by year)."""
+    try:
+        document = json.loads(source)
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(f"Invalid era catalog JSON: {e}", "CONFIGURATION_ERROR")
+    entries = document.get("eras") if isinstance(document, dict) else None
+    errors = validate_era_entries(entries)
+    if errors:
+        raise ConfigurationError("Invalid era catalog:\n  - " + "\n  - ".join(errors), "CONFIGURATION_ERROR")
+
+    eras = sorted(entries, key=lambda entry: entry["start_year"])
+    canonical = json.dumps(eras, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return {
+        "source_digest": hashlib.sha1(source).hexdigest(),
+        "version": hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16],
+        "eras": eras,
+    }
+
+
+def write_compiled_catalog(artifact: Dict[str, Any], path: str):
+    """Write the artifact atomically (readers never see a half-written file)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def compile_era_catalog(source_path: str = ERA_CATALOG_FILE,
+                        output_path: str = ERA_CATALOG_COMPILED_FILE) -> Dict[str, Any]:
+    """Compile step: validate the source file and write the compact artifact."""
+    with open(source_path, "rb") as f:
+        artifact = compile_era_source(f.read())
+    write_compiled_catalog(artifact, output_path)
+    return artifact
+
+
+class EraCatalog:
+    """One immutable compiled catalog: era index, session payloads and public listing."""
+
+    def __init__(self, eras: List[Dict[str, Any]], version: str):
+        self.version = version
+        self.configs: Dict[Tuple[int, int], EraConfig] = {
+            (entry["start_year"], entry["end_year"]): EraConfig(
+                era_name=entry["era_name"],
+                description=entry["description"],
+                expressions=entry["expressions"],
+                voice_settings=entry["voice_settings"],
+                context_hint=entry["context_hint"],
+                time_period=entry["time_period"],
+            )
+            for entry in eras
+        }
+        self.index = EraIndex(self.configs)
+        self.payloads: Dict[Tuple[str, str], EraSessionPayload] = {
+            (config.era_name, language): _build_session_payload(config, language)
+            for config in self.configs.values()
+            for language in SUPPORTED_LANGUAGES
+        }
+        public_eras = [
+            {
+                "start_year": start_year,
+                "end_year": end_year,
+                "era_name": config.era_name,
+                "time_period": config.time_period,
+                "description": config.description,
+            }
+            for (start_year, end_year), config in self.configs.items()
+        ]
+        # Clients only re-download when the public fields change
+        public_digest = hashlib.sha1(json.dumps(public_eras, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.public = {
+            "version": public_digest,
+            "min_year": self.index.min_year,
+            "max_year": self.index.max_year,
+            "eras": public_eras,
+        }
+
+
+class EraCatalogLoader:
+    """Lazily loads the current EraCatalog and hot-swaps it when the source changes."""
+
+    def __init__(self, source_path: str, compiled_path: str,
+                 validate: Optional[Callable[[List[str]], List[str]]] = None):
+        self.source_path = source_path
+        self.compiled_path = compiled_path
+        # Cross-checks on a reloaded catalog's era names (e.g. every era still has first
+        # messages); any returned error rejects the reload. Wired up by main.py.
+        self.validate = validate
+        self._catalog: Optional[EraCatalog] = None
+        self._lock = threading.Lock()
+        self._source_stat: Optional[Tuple[int, int]] = None
+        self.loaded_from: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    def get(self) -> EraCatalog:
+        catalog = self._catalog
+        if catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._load()
+                catalog = self._catalog
+        return catalog
+
+    def _stat(self) -> Tuple[int, int]:
+        stat = os.stat(self.source_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> EraCatalog:
+        source_stat = self._stat()
+        with open(self.source_path, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha1(source).hexdigest()
+
+        artifact = None
+        try:
+            with open(self.compiled_path, "r", encoding="utf-8") as f:
+                artifact = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if artifact and artifact.get("source_digest") == digest:
+            self.loaded_from = self.compiled_path
+        else:
+            # Missing or stale artifact: compile (and validate) the source now
+            artifact = compile_era_source(source)
+            self.loaded_from = self.source_path
+            try:
+                write_compiled_catalog(artifact, self.compiled_path)
+            except OSError as e:
+                print(f"⚠️  Could not write compiled era catalog: {e}")
+
+        catalog = EraCatalog(artifact["eras"], artifact["version"])
+        self._source_stat = source_stat
+        self.loaded_at = time.time()
+        return catalog
+
+    def reload(self) -> Dict[str, Any]:
+        """Rebuild from disk and swap atomically; on any error the current catalog stays."""
+        with self._lock:
+            previous = self._catalog
+            loaded_from, loaded_at = self.loaded_from, self.loaded_at
+            try:
+                catalog = self._load()
+                errors = self.validate([config.era_name for config in catalog.configs.values()]) if self.validate else []
+                if errors:
+                    self.loaded_from, self.loaded_at = loaded_from, loaded_at
+                    raise ConfigurationError("; ".join(errors), "CONFIGURATION_ERROR")
+            except (ConfigurationError, OSError, KeyError) as e:
+                self.reload_errors += 1
+                self.last_error = str(e)
+                print(f"❌ Era catalog reload failed, keeping current catalog: {e}")
+                return {"reloaded": False, "version": previous.version if previous else None, "error": str(e)}
+            self._catalog = catalog
+            self.reloads += 1
+            self.last_error = None
+        if previous is None or previous.version != catalog.version:
+            print(f"🔄 Era catalog loaded: {len(catalog.configs)} eras (version {catalog.version})")
+        return {"reloaded": True, "version": catalog.version, "error": None}
+
+    def reload_if_changed(self) -> Optional[Dict[str, Any]]:
+        """Reload when the source file's mtime or size changed since the last load"""
+        try:
+            changed = self._stat() != self._source_stat
+        except OSError:
+            return None
+        return self.reload() if changed else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        catalog = self._catalog
+        return {
+            "version": catalog.version if catalog else None,
+            "eras": len(catalog.configs) if catalog else 0,
+            "source": self.source_path,
+            "loaded_from": self.loaded_from,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+        }
+
+
+ERA_CATALOG = EraCatalogLoader(ERA_CATALOG_FILE, ERA_CATALOG_COMPILED_FILE)
+
+
+async def era_catalog_watcher(interval_seconds: float = ERA_CATALOG_RELOAD_INTERVAL_SECONDS):
+    """Background task: hot-reload the era catalog when its source file changes"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            # Compiling and validating run in a worker thread so live media streams keep flowing
+            await asyncio.to_thread(ERA_CATALOG.reload_if_changed)
+        except Exception as e:
+            print(f"⚠️  Era catalog watcher error: {e}")
+
+
+def __getattr__(name: str):
+    # Module-level views of the current catalog, resolved lazily
+    if name == "ERA_CONFIGS":
+        return ERA_CATALOG.get().configs
+    if name == "ERA_INDEX":
+        return ERA_CATALOG.get().index
+    if name == "SESSION_PAYLOADS":
+        return ERA_CATALOG.get().payloads
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_era_config(year: int) -> EraConfig:
+    """Get era configuration for a given year (clamped to the first/last era)."""
+    return ERA_CATALOG.get().index.lookup(year)
+
+
+def get_era_session_payload(year: int, language: str) -> EraSessionPayload:
+    """Precomputed payload for the year's era and language (unsupported languages are built on demand)."""
+    catalog = ERA_CATALOG.get()
+    era_config = catalog.index.lookup(year)
+    payload = catalog.payloads.get((era_config.era_name, language))
+    if payload is None:
+        payload = _build_session_payload(era_config, language)
+    return payload
+
+
+def build_dynamic_variables(payload: EraSessionPayload, year: int,
+                            voice: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Agent dynamic variables: the shared payload plus this call's year and voice metadata."""
+    dynamic_variables = {"era_year": year, **payload.dynamic_variables}
+    if voice:
+        dynamic_variables["voice_gender"] = voice.get("gender", "unknown")
+        dynamic_variables["voice_age_range"] = voice.get("age_range", "unknown")
+    return dynamic_variables
+
+
+def build_conversation_override(payload: EraSessionPayload, voice_id: Optional[str] = None,
+                                first_message: Optional[str] = None) -> Dict[str, Any]:
+    """ElevenLabs conversation_config_override for one call."""
+    tts = {"voice_id": voice_id} if voice_id else {}
+    tts.update(payload.tts_override)
+    return {
+        "agent": {"first_message": first_message} if first_message else {},
+        "tts": tts,
+    }
+
+
+def get_era_session_variables(year: int, language: str) -> Dict[str, Any]:
+    """Get session variables for ElevenLabs agent based on year and language."""
+    payload = get_era_session_payload(year, language)
+    session_vars = build_dynamic_variables(payload, year)
+    session_vars["voice_settings"] = dict(payload.voice_settings)  # Keep for conversation overrides
+    return session_vars
+
+
+def get_era_catalog() -> Dict[str, Any]:
+    """
+    Public era catalog for clients (year ranges and labels, no prompt context).
+    `version` is a digest of these fields clients can use to skip re-downloading it.
+    """
+    return ERA_CATALOG.get().public
 
 
 # Note: get_system_prompt_addition() function removed - we now use dynamic variables
 # in the ElevenLabs agent system prompt instead of generating prompt text here.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and compile the era catalog")
+    parser.add_argument("command", choices=["compile", "check"])
+    parser.add_argument("--source", default=ERA_CATALOG_FILE)
+    parser.add_argument("--output", default=ERA_CATALOG_COMPILED_FILE)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "compile":
+            artifact = compile_era_catalog(args.source, args.output)
+            print(f"✅ Compiled {len(artifact['eras'])} eras (version {artifact['version']}) -> {args.output}")
+        else:
+            with open(args.source, "rb") as f:
+                artifact = compile_era_source(f.read())
+            print(f"✅ {len(artifact['eras'])} eras valid (version {artifact['version']})")
+    except ConfigurationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
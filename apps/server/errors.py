@@ -44,6 +44,11 @@ TWILIO_ERROR_MAPPINGS = {
         "user_message": "Service authentication failed. Please try again later.",
         "suggestion": "Contact support if this persists."
     },
+    20429: {
+        "error_code": "CALL_RATE_LIMITED",
+        "user_message": "We're placing a lot of calls right now.",
+        "suggestion": "Please try again in a moment."
+    },
     21211: {
         "error_code": "INVALID_PHONE_NUMBER",
         "user_message": "Invalid phone number format.",
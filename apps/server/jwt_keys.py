@@ -0,0 +1,143 @@
+"""
+JWT signing key ring shared by every worker.
+
+Keys are loaded once at startup and indexed by key ID (`kid`). New tokens are
+signed with the first (active) key and carry its `kid` in the header;
+verification looks the `kid` up in a dict instead of trying secrets in turn.
+Rotating keys is: put the new key first, keep the old one listed (optionally
+with `verify_until`) until every token it signed has expired.
+
+Key sources, in order:
+- JWT_KEYS (JSON): [{"kid": "2026-10", "secret": "..."},
+                    {"kid": "2026-09", "secret": "...", "verify_until": 1792000000}]
+- JWT_SECRET: a single key whose kid is derived from the secret
+- neither: a random key persisted to JWT_KEY_FILE, created once per host so
+  all local workers agree on it (tokens still do not survive across hosts)
+"""
+
+import os
+import json
+import time
+import hashlib
+import secrets
+import tempfile
+from typing import Dict, List, Optional
+
+from errors import ConfigurationError
+
+JWT_KEYS = os.getenv("JWT_KEYS", "")
+JWT_SECRET = os.getenv("JWT_SECRET", "")
+JWT_KEY_FILE = os.getenv("JWT_KEY_FILE", os.path.join(tempfile.gettempdir(), "time-traveler-jwt.key"))
+
+
+class JwtKey:
+    """One HMAC secret and the window it may verify tokens in."""
+
+    __slots__ = ("kid", "secret", "verify_until")
+
+    def __init__(self, kid: str, secret: str, verify_until: Optional[float] = None):
+        self.kid = kid
+        self.secret = secret
+        self.verify_until = verify_until
+
+
+class KeyRing:
+    """Active signing key plus every key still accepted for verification."""
+
+    def __init__(self, keys: List[JwtKey], source: str = "config"):
+        if not keys:
+            raise ConfigurationError("JWT key ring needs at least one key", "CONFIGURATION_ERROR")
+        self.active = keys[0]
+        self.source = source
+        self._keys: Dict[str, JwtKey] = {}
+        for key in keys:
+            if key.kid in self._keys:
+                raise ConfigurationError(f"Duplicate JWT kid: {key.kid}", "CONFIGURATION_ERROR")
+            self._keys[key.kid] = key
+
+    def verification_secret(self, kid: Optional[str], now: Optional[float] = None) -> Optional[str]:
+        """
+        Secret for a token's kid, or None if unknown or retired.
+        Tokens without a kid (minted before key IDs) verify with the active key.
+        """
+        if kid is None:
+            return self.active.secret
+        key = self._keys.get(kid)
+        if key is None:
+            return None
+        if key.verify_until is not None and (time.time() if now is None else now) >= key.verify_until:
+            return None
+        return key.secret
+
+    def verify_until(self, kid: Optional[str]) -> Optional[float]:
+        """When tokens signed with this kid stop verifying (None: no retirement date)"""
+        key = self.active if kid is None else self._keys.get(kid)
+        return key.verify_until if key is not None else None
+
+    def kids(self) -> List[str]:
+        return list(self._keys)
+
+    def get_stats(self) -> Dict:
+        now = time.time()
+        return {
+            "source": self.source,
+            "active_kid": self.active.kid,
+            "verifying_kids": [kid for kid in self._keys if self.verification_secret(kid, now)],
+        }
+
+
+def derive_kid(secret: str) -> str:
+    """Stable, non-reversible key ID for a bare secret"""
+    return hashlib.blake2b(secret.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def parse_jwt_keys(raw: str) -> List[JwtKey]:
+    """Parse the JWT_KEYS JSON list (first entry signs)"""
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(f"Invalid JWT_KEYS JSON: {e}", "CONFIGURATION_ERROR")
+    if not isinstance(entries, list) or not entries:
+        raise ConfigurationError("JWT_KEYS must be a non-empty JSON list", "CONFIGURATION_ERROR")
+
+    keys = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("kid") or not entry.get("secret"):
+            raise ConfigurationError("Each JWT_KEYS entry needs 'kid' and 'secret'", "CONFIGURATION_ERROR")
+        verify_until = entry.get("verify_until")
+        keys.append(JwtKey(
+            str(entry["kid"]),
+            entry["secret"],
+            float(verify_until) if verify_until is not None else None,
+        ))
+    return keys
+
+
+def load_host_key(path: str) -> str:
+    """Read the host-local key, creating it atomically if no worker has yet"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(path) as f:
+                secret = f.read().strip()
+            if secret:
+                return secret
+            time.sleep(0.01)  # Another worker created the file and is still writing it
+        raise ConfigurationError(f"JWT key file {path} is empty", "CONFIGURATION_ERROR")
+    secret = secrets.token_urlsafe(32)
+    with os.fdopen(fd, "w") as f:
+        f.write(secret)
+    return secret
+
+
+def load_key_ring(raw_keys: str = JWT_KEYS, secret: str = JWT_SECRET,
+                  key_file: str = JWT_KEY_FILE) -> KeyRing:
+    """Build the key ring from JWT_KEYS, JWT_SECRET or the host key file"""
+    if raw_keys and raw_keys.strip():
+        return KeyRing(parse_jwt_keys(raw_keys), source="JWT_KEYS")
+    if secret:
+        return KeyRing([JwtKey(derive_kid(secret), secret)], source="JWT_SECRET")
+    host_secret = load_host_key(key_file)
+    print(f"⚠️  No JWT_KEYS/JWT_SECRET set; using host-local key from {key_file}")
+    return KeyRing([JwtKey(derive_kid(host_secret), host_secret)], source="host_key_file")
@@ -0,0 +1,133 @@
+"""
+Event-loop-lag based load shedding.
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up; that scheduling delay is the loop lag every coroutine (including live
+media streams) is currently paying. When the smoothed lag crosses a gate's
+shed threshold, new work behind that gate (/outbound-call, /auth/login) is
+refused until lag falls back below the gate's lower recover threshold.
+Media streams are never gated, so in-progress calls keep priority.
+"""
+
+import os
+import time
+import asyncio
+from typing import Dict, Optional
+
+# Load Shedding Configuration
+LOAD_SHEDDING_ENABLED = os.getenv("LOAD_SHEDDING_ENABLED", "true").lower() == "true"
+LOOP_LAG_SAMPLE_INTERVAL_MS = float(os.getenv("LOOP_LAG_SAMPLE_INTERVAL_MS", "100"))
+# New calls are the most expensive work, so they are shed first
+LOOP_LAG_SHED_CALLS_MS = float(os.getenv("LOOP_LAG_SHED_CALLS_MS", "150"))
+LOOP_LAG_RECOVER_CALLS_MS = float(os.getenv("LOOP_LAG_RECOVER_CALLS_MS", "75"))
+LOOP_LAG_SHED_LOGIN_MS = float(os.getenv("LOOP_LAG_SHED_LOGIN_MS", "300"))
+LOOP_LAG_RECOVER_LOGIN_MS = float(os.getenv("LOOP_LAG_RECOVER_LOGIN_MS", "150"))
+LOAD_SHED_RETRY_AFTER_SECONDS = int(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "5"))
+
+# Weight of the newest lag sample in the smoothed lag
+_LAG_EMA_ALPHA = 0.3
+
+
+class LoadShedGate:
+    """Hysteresis switch: sheds at >= shed_ms, recovers at <= recover_ms."""
+
+    __slots__ = ("name", "shed_ms", "recover_ms", "shedding", "shed_total",
+                 "admitted_total", "transitions", "last_transition_at")
+
+    def __init__(self, name: str, shed_ms: float, recover_ms: float):
+        if recover_ms > shed_ms:
+            raise ValueError(f"Gate {name}: recover threshold must not exceed shed threshold")
+        self.name = name
+        self.shed_ms = shed_ms
+        self.recover_ms = recover_ms
+        self.shedding = False
+        self.shed_total = 0
+        self.admitted_total = 0
+        self.transitions = 0
+        self.last_transition_at: Optional[float] = None
+
+    def update(self, lag_ms: float) -> bool:
+        """Apply a lag reading. Returns True when the state flipped."""
+        if not self.shedding and lag_ms >= self.shed_ms:
+            self.shedding = True
+        elif self.shedding and lag_ms <= self.recover_ms:
+            self.shedding = False
+        else:
+            return False
+        self.transitions += 1
+        self.last_transition_at = time.time()
+        return True
+
+
+class LoopLagMonitor:
+    """Samples event-loop scheduling delay and drives the load-shed gates."""
+
+    def __init__(self, interval_ms: float = LOOP_LAG_SAMPLE_INTERVAL_MS, enabled: bool = True):
+        self.interval_ms = interval_ms
+        self.enabled = enabled
+        self.lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.samples = 0
+        self.gates: Dict[str, LoadShedGate] = {}
+
+    def add_gate(self, name: str, shed_ms: float, recover_ms: float) -> LoadShedGate:
+        gate = LoadShedGate(name, shed_ms, recover_ms)
+        self.gates[name] = gate
+        return gate
+
+    def record(self, lag_ms: float):
+        """Fold one lag sample into the smoothed lag and update every gate"""
+        self.samples += 1
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.lag_ms += _LAG_EMA_ALPHA * (lag_ms - self.lag_ms)
+        for gate in self.gates.values():
+            if gate.update(self.lag_ms):
+                state = "shedding" if gate.shedding else "recovered"
+                print(f"🚦 Load shedding [{gate.name}] {state} at loop lag {self.lag_ms:.0f}ms")
+
+    def should_shed(self, name: str) -> bool:
+        """Decide (and count) whether a request behind gate `name` is refused"""
+        gate = self.gates.get(name)
+        if gate is None or not self.enabled:
+            return False
+        if gate.shedding:
+            gate.shed_total += 1
+            return True
+        gate.admitted_total += 1
+        return False
+
+    async def run(self):
+        """Background task: measure how late each fixed-interval sleep wakes up"""
+        interval = self.interval_ms / 1000
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag_ms = (time.perf_counter() - started - interval) * 1000
+            self.record(max(0.0, lag_ms))
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "loop_lag_ms": round(self.lag_ms, 2),
+            "last_loop_lag_ms": round(self.last_lag_ms, 2),
+            "max_loop_lag_ms": round(self.max_lag_ms, 2),
+            "samples": self.samples,
+            "gates": {
+                name: {
+                    "shedding": gate.shedding,
+                    "shed_ms": gate.shed_ms,
+                    "recover_ms": gate.recover_ms,
+                    "shed_total": gate.shed_total,
+                    "admitted_total": gate.admitted_total,
+                    "transitions": gate.transitions,
+                }
+                for name, gate in self.gates.items()
+            },
+        }
+
+
+LOOP_LAG_MONITOR = LoopLagMonitor(enabled=LOAD_SHEDDING_ENABLED)
+LOOP_LAG_MONITOR.add_gate("outbound_call", LOOP_LAG_SHED_CALLS_MS, LOOP_LAG_RECOVER_CALLS_MS)
+LOOP_LAG_MONITOR.add_gate("login", LOOP_LAG_SHED_LOGIN_MS, LOOP_LAG_RECOVER_LOGIN_MS)
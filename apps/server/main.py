@@ -1,17 +1,18 @@
 import os
 import sys
 import json
-import traceback
 import uvicorn
 import base64
 import logging
 import asyncio
+import time
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Add shared_py to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'shared_py'))
 from fastapi import FastAPI, Request, WebSocket, Form, Depends, HTTPException, Header
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from twilio.twiml.voice_response import VoiceResponse, Connect, Stream
 from twilio.rest import Client
@@ -21,9 +22,12 @@ from elevenlabs.conversational_ai.conversation import Conversation, Conversation
 from elevenlabs.conversational_ai.default_audio_interface import DefaultAudioInterface
 from twilio_audio import TwilioAudioInterface
 from starlette.websockets import WebSocketDisconnect, WebSocketState
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 from pydantic import BaseModel, validator
-from era_config import get_era_session_variables
+from era_config import (
+    get_era_session_payload, build_dynamic_variables, build_conversation_override,
+    get_era_catalog, SUPPORTED_LANGUAGES, ERA_CATALOG, ERA_CATALOG_RELOAD_INTERVAL_SECONDS, era_catalog_watcher
+)
 from errors import (
     TimeTravelerError, PhoneNumberError, TwilioServiceError, 
     ElevenLabsServiceError, ConfigurationError,
@@ -31,20 +35,44 @@ from errors import (
 )
 
 # Import separated modules
-from auth import create_jwt_token, get_current_user, get_jwt_config, JWT_EXPIRATION_HOURS
-from rate_limiting import rate_limit_dependency, get_rate_limit_status, get_rate_limit_config
+from auth import (
+    create_jwt_token, validate_jwt_token, get_current_user, get_jwt_config, require_admin, JWT_EXPIRATION_HOURS
+)
+from rate_limiting import (
+    rate_limit_dependency, get_rate_limit_status, get_rate_limit_config, rate_limit_sweeper, get_client_ip
+)
+from call_admission import CALL_ADMISSION, call_admission_sweeper
+from load_shedding import LOOP_LAG_MONITOR, LOAD_SHED_RETRY_AFTER_SECONDS
+from twilio_dispatch import TWILIO_DISPATCHER
+from caller_id_pool import TWILIO_NUMBER_POOL, build_caller_id_pool
+from call_store import (
+    CALL_STATUS, BATCH_CALL_STATUS_MAX, update_call_status, parse_call_sids,
+    query_call_statuses, compute_etag, etag_matches
+)
 
 # Import voice and agent managers
-from voice_manager import VoiceManager
-from agent_manager import AgentManager
-from first_message_manager import FirstMessageManager
+from voice_latency import VoiceLatencyTracker, voice_latency_saver
+from catalog_service import create_catalog_service, catalog_watcher, voice_reweighter, CATALOG_RELOAD_INTERVAL_SECONDS
+from structured_logging import setup_logging, get_logger, shutdown_logging
+from call_metrics import CALL_METRICS, CALL_METRICS_ENABLED, call_metrics_flusher
+from call_tracing import CALL_TRACER, CALL_TRACING_ENABLED, call_trace_flusher
+from server_metrics import (
+    REGISTRY, METRICS_ENABLED, CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics_snapshot_writer,
+    CALL_SETUP_SECONDS, FIRST_AUDIO_SECONDS, OUTBOUND_FRAME_INTERVAL_SECONDS, TWILIO_CREATE_SECONDS,
+    CALLS_TOTAL, LOAD_SHED_REJECTIONS_TOTAL, CONVERSATION_FALLBACKS_TOTAL,
+    ACTIVE_STREAMS, QUEUED_CALLS, LOOP_LAG_SECONDS
+)
 
 load_dotenv()
 
 DEBUG_LOGS = os.getenv("DEBUG_LOGS", "false").lower() == "true"
 
+# Request/media-path logging goes through a queue drained by a background writer
+LOG_PIPELINE = setup_logging()
+log = get_logger("http")
+media_log = get_logger("media")
+
 # Load environment variables
-ELEVENLABS_AGENT_ID_1 = os.getenv("ELEVENLABS_AGENT_ID_1")
 ELEVENLABS_AGENT_ID_2 = os.getenv("ELEVENLABS_AGENT_ID_2")
 ELEVENLABS_AGENT_ID_3 = os.getenv("ELEVENLABS_AGENT_ID_3")
 ELEVENLABS_AGENT_ID_4 = os.getenv("ELEVENLABS_AGENT_ID_4")
@@ -55,6 +83,9 @@ TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
 # Configuration loaded from environment variables in respective modules
 
+# Pool of from-numbers (TWILIO_NUMBER_POOL), falling back to TWILIO_PHONE_NUMBER
+CALLER_ID_POOL = build_caller_id_pool(TWILIO_NUMBER_POOL, TWILIO_PHONE_NUMBER, TWILIO_DISPATCHER)
+
 # Check for required environment variables
 if not ELEVENLABS_API_KEY:
     raise ValueError("Missing required ElevenLabs environment variables")
@@ -85,7 +116,8 @@ print(f"🔑 Environment variables loaded:")
 print(f"   - ELEVENLABS_API_KEY: {'✅ Set' if ELEVENLABS_API_KEY else '❌ Missing'}")
 print(f"   - TWILIO_ACCOUNT_SID: {'✅ Set' if TWILIO_ACCOUNT_SID else '❌ Missing'}")
 print(f"   - TWILIO_PHONE_NUMBER: {'✅ Set' if TWILIO_PHONE_NUMBER else '❌ Missing'}")
-print(f"   - JWT_SECRET: {'✅ Set' if os.getenv('JWT_SECRET') else '❌ Missing'}")
+print(f"   - Caller ID pool: {len(CALLER_ID_POOL)} number(s)")
+print(f"   - JWT_SECRET: {'✅ Set' if os.getenv('JWT_SECRET') or os.getenv('JWT_KEYS') else '❌ Missing'}")
 
 app.add_middleware(
     CORSMiddleware,
@@ -101,46 +133,33 @@ print(f"🔗 CORS methods: GET, POST, OPTIONS")
 print(f"🔗 CORS headers: *")
 print(f"🔗 CORS credentials: True")
 
-# Initialize voice and agent managers globally
-voice_manager = VoiceManager()
-agent_manager = AgentManager()
-first_message_manager = FirstMessageManager()
-
-print(f"🎤 Voice Manager initialized with {voice_manager.get_voice_statistics()}")
-print(f"🤖 Agent Manager initialized with {agent_manager.get_agent_statistics()}")
-print(f"💬 First Message Manager initialized with {first_message_manager.get_statistics()['total_eras']} eras")
-
-# In-memory call status store (simple, ephemeral)
-# Structure per callSid:
-# {
-#   'status': 'initiated'|'ringing'|'answered'|'ended'|'failed',
-#   'to': str,
-#   'lang': str,
-#   'year': int,
-#   'twiml_requested': bool,
-#   'websocket_connected': bool,
-#   'stream_sid': Optional[str],
-# }
-CALL_STATUS = {}
+# Voice, agent and first-message catalog (hot-reloaded as one snapshot; read CATALOG.current)
+VOICE_LATENCY = VoiceLatencyTracker()
+CATALOG = create_catalog_service(latency_tracker=VOICE_LATENCY)
+# An era reload must not leave first messages pointing at eras that no longer exist
+ERA_CATALOG.validate = CATALOG.era_reference_errors
+
+print(f"🎤 Voice Manager initialized with {CATALOG.current.voices.get_voice_statistics()}")
+print(f"🤖 Agent Manager initialized with {CATALOG.current.agents.get_agent_statistics()}")
+print(f"💬 First Message Manager initialized with {CATALOG.current.first_messages.get_statistics()['total_eras']} eras")
+
+# Call status store lives in call_store.py (CALL_STATUS, update_call_status)
 
 def cleanup_call_status(call_sid: str):
     """Remove call status entry to prevent memory growth"""
     if call_sid in CALL_STATUS:
         del CALL_STATUS[call_sid]
-        if DEBUG_LOGS:
-            print(f"🧹 Cleaned up call status for {call_sid}")
+        log.debug("call_status.cleaned", "🧹 Cleaned up call status", call_sid=call_sid)
 
 def schedule_call_status_cleanup(call_sid: str, delay_seconds: int = 60):
     """Schedule delayed cleanup so clients can still observe final status."""
     async def _delayed_cleanup():
         try:
-            if DEBUG_LOGS:
-                print(f"⏳ Scheduling cleanup for {call_sid} in {delay_seconds}s")
+            log.debug("call_status.cleanup_scheduled", "⏳ Scheduling call status cleanup", call_sid=call_sid, delay_seconds=delay_seconds)
             await asyncio.sleep(delay_seconds)
             cleanup_call_status(call_sid)
         except Exception as e:
-            if DEBUG_LOGS:
-                print(f"⚠️  Error during scheduled cleanup for {call_sid}: {e}")
+            log.debug("call_status.cleanup_error", "⚠️  Error during scheduled cleanup", call_sid=call_sid, error=str(e))
 
     try:
         asyncio.create_task(_delayed_cleanup())
@@ -150,6 +169,114 @@ def schedule_call_status_cleanup(call_sid: str, delay_seconds: int = 60):
 
 # Rate limiting functions are now in rate_limiting.py
 
+@app.on_event("startup")
+async def start_rate_limit_sweeper():
+    """Evict expired rate limit keys in the background at a fixed budget per tick"""
+    asyncio.create_task(rate_limit_sweeper())
+
+@app.on_event("startup")
+async def start_call_admission_sweeper():
+    """Reclaim leaked call slots and drain the admission queue in the background"""
+    asyncio.create_task(call_admission_sweeper())
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    """Sample event-loop lag continuously to drive load shedding"""
+    asyncio.create_task(LOOP_LAG_MONITOR.run())
+
+@app.on_event("startup")
+async def start_voice_reweighter():
+    """Re-weight voice selection from measured latency in the background, off the call path"""
+    asyncio.create_task(voice_reweighter(CATALOG))
+
+@app.on_event("startup")
+async def start_voice_latency_saver():
+    """Persist per-voice latency estimates in the background (when VOICE_LATENCY_FILE is set)"""
+    if VOICE_LATENCY.persist_file:
+        asyncio.create_task(voice_latency_saver(VOICE_LATENCY))
+
+@app.on_event("shutdown")
+async def save_voice_latency():
+    """Persist per-voice latency estimates (when VOICE_LATENCY_FILE is set)"""
+    VOICE_LATENCY.save()
+
+# Wire live values and per-call latency records into the /metrics registry
+QUEUED_CALLS.set_function(CALL_ADMISSION.queued_count)
+LOOP_LAG_SECONDS.set_function(lambda: LOOP_LAG_MONITOR.lag_ms / 1000)
+CALL_METRICS.on_interval = lambda interval_ms: OUTBOUND_FRAME_INTERVAL_SECONDS.observe(interval_ms / 1000)
+
+def observe_call_record(entry: dict):
+    """Feed a finished call's setup and first-audio latency into the histograms"""
+    if entry["setup_ms"] is not None:
+        CALL_SETUP_SECONDS.observe(entry["setup_ms"] / 1000)
+    if entry["first_audio_ms"] is not None:
+        FIRST_AUDIO_SECONDS.observe(entry["first_audio_ms"] / 1000)
+
+CALL_METRICS.on_record = observe_call_record
+
+@app.on_event("startup")
+async def start_metrics_snapshot_writer():
+    """Publish this worker's metrics for the others when METRICS_MULTIPROC_DIR is set"""
+    if METRICS_ENABLED and REGISTRY.multiproc_dir:
+        asyncio.create_task(metrics_snapshot_writer())
+
+@app.on_event("startup")
+async def start_call_metrics_flusher():
+    """Append finished-call latency records to CALL_METRICS_FILE in the background"""
+    if CALL_METRICS_ENABLED:
+        asyncio.create_task(call_metrics_flusher())
+
+@app.on_event("shutdown")
+async def flush_call_metrics():
+    """Write any buffered call latency records"""
+    CALL_METRICS.flush()
+
+@app.on_event("startup")
+async def start_call_trace_flusher():
+    """Expire abandoned call traces and append finished ones to CALL_TRACE_FILE"""
+    if CALL_TRACING_ENABLED:
+        asyncio.create_task(call_trace_flusher())
+
+@app.on_event("shutdown")
+async def flush_call_traces():
+    """Write any buffered call traces"""
+    CALL_TRACER.exporter.flush()
+
+@app.on_event("shutdown")
+async def flush_logs():
+    """Write out any queued log records before the process exits"""
+    shutdown_logging()
+
+@app.on_event("startup")
+async def start_era_catalog_watcher():
+    """Load the era catalog and hot-reload it when its data file changes"""
+    ERA_CATALOG.get()
+    if ERA_CATALOG_RELOAD_INTERVAL_SECONDS > 0:
+        asyncio.create_task(era_catalog_watcher())
+
+@app.on_event("startup")
+async def start_catalog_watcher():
+    """Hot-reload voices, agents and first messages when their data files change"""
+    if CATALOG_RELOAD_INTERVAL_SECONDS > 0:
+        asyncio.create_task(catalog_watcher(CATALOG))
+
+def load_shed_guard(gate_name: str):
+    """Dependency factory: refuse new work with 503 while loop lag is over the gate's threshold"""
+    def _guard():
+        if LOOP_LAG_MONITOR.should_shed(gate_name):
+            LOAD_SHED_REJECTIONS_TOTAL.inc(gate=gate_name)
+            raise HTTPException(
+                status_code=503,
+                detail={
+                    "error": "Server is busy",
+                    "error_code": "SERVER_OVERLOADED",
+                    "message": "The server is prioritizing calls in progress. Please try again shortly.",
+                    "retry_after": LOAD_SHED_RETRY_AFTER_SECONDS
+                },
+                headers={"Retry-After": str(LOAD_SHED_RETRY_AFTER_SECONDS)}
+            )
+    return _guard
+
 # Pydantic models for request bodies
 class OutboundCallRequest(BaseModel):
     to: str
@@ -195,10 +322,12 @@ async def health_check():
 @app.options("/outbound-call")
 async def outbound_call_options(request: Request):
     """Handle CORS preflight requests for outbound-call endpoint"""
-    print(f"🔍 OPTIONS request received for /outbound-call")
-    print(f"🔍 Origin: {request.headers.get('origin', 'No origin header')}")
-    print(f"🔍 Access-Control-Request-Method: {request.headers.get('access-control-request-method', 'No method header')}")
-    print(f"🔍 Access-Control-Request-Headers: {request.headers.get('access-control-request-headers', 'No headers header')}")
+    log.debug(
+        "cors.preflight", "🔍 OPTIONS request received for /outbound-call",
+        origin=request.headers.get('origin'),
+        request_method=request.headers.get('access-control-request-method'),
+        request_headers=request.headers.get('access-control-request-headers'),
+    )
     
     # Return a proper CORS preflight response
     from fastapi.responses import Response
@@ -209,28 +338,77 @@ async def outbound_call_options(request: Request):
     response.headers["Access-Control-Allow-Credentials"] = "true"
     response.headers["Access-Control-Max-Age"] = "86400"
     
-    print(f"✅ OPTIONS response prepared with CORS headers")
     return response
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition (merged across workers when METRICS_MULTIPROC_DIR is set)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(await asyncio.to_thread(REGISTRY.render), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/config")
 async def get_configuration():
     """Get server configuration for debugging/monitoring"""
     return {
         "jwt": get_jwt_config(),
         "rate_limiting": get_rate_limit_config(),
+        "call_admission": await asyncio.to_thread(CALL_ADMISSION.get_stats),
+        "load_shedding": LOOP_LAG_MONITOR.get_stats(),
+        "twilio_dispatch": TWILIO_DISPATCHER.get_stats(),
+        "caller_id_pool": CALLER_ID_POOL.get_stats(),
+        "era_catalog": ERA_CATALOG.get_stats(),
+        "catalog": CATALOG.get_stats(),
         "debug_logs": DEBUG_LOGS,
+        "logging": LOG_PIPELINE.get_stats(),
+        "call_metrics": CALL_METRICS.get_stats(),
+        "call_tracing": CALL_TRACER.get_stats(),
         "environment_variables": {
             "ELEVENLABS_API_KEY": "✅ Set" if ELEVENLABS_API_KEY else "❌ Missing",
             "TWILIO_ACCOUNT_SID": "✅ Set" if TWILIO_ACCOUNT_SID else "❌ Missing", 
             "TWILIO_PHONE_NUMBER": "✅ Set" if TWILIO_PHONE_NUMBER else "❌ Missing",
-            "JWT_SECRET": "✅ Set" if os.getenv('JWT_SECRET') else "❌ Missing",
+            "JWT_SECRET": "✅ Set" if os.getenv('JWT_SECRET') or os.getenv('JWT_KEYS') else "❌ Missing",
             "DEBUG_LOGS": DEBUG_LOGS,
             "ALLOWED_ORIGINS": ALLOWED_ORIGINS
         }
     }
 
+@app.get("/voices/latency")
+async def get_voice_latency_ranking(lang: str = None, current_user: dict = Depends(get_current_user)):
+    """Voices ranked by measured first-audio (TTS) latency, fastest first"""
+    return {
+        "success": True,
+        "voices": CATALOG.current.voices.get_voice_latency_ranking(lang),
+    }
+
+@app.post("/admin/eras/reload", dependencies=[Depends(require_admin)])
+async def reload_era_catalog():
+    """Re-read the era catalog and swap it in; calls in progress are unaffected"""
+    result = await asyncio.to_thread(ERA_CATALOG.reload)
+    return JSONResponse({"success": result["reloaded"], **result}, status_code=200 if result["reloaded"] else 422)
+
+@app.post("/admin/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_catalog():
+    """Reload voices, agents and first messages together; calls in progress are unaffected"""
+    result = await asyncio.to_thread(CATALOG.reload)
+    return JSONResponse({"success": result["reloaded"], **result}, status_code=200 if result["reloaded"] else 422)
+
+@app.get("/admin/traces", dependencies=[Depends(require_admin)])
+async def get_call_traces(span: str = None, min_ms: float = None, include_open: bool = False, limit: int = 50):
+    """Recent call traces, newest first; `span` + `min_ms` finds calls where that stage ended late"""
+    traces = CALL_TRACER.query(span=span, min_ms=min_ms, include_open=include_open, limit=max(1, min(limit, 500)))
+    return {"success": True, "count": len(traces), "traces": traces}
+
+@app.get("/admin/traces/{call_sid}", dependencies=[Depends(require_admin)])
+async def get_call_trace(call_sid: str):
+    """One call's trace, open or finished"""
+    trace = CALL_TRACER.get(call_sid)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace for this call")
+    return {"success": True, "trace": trace}
+
 # Authentication Endpoints
-@app.post("/auth/login")
+@app.post("/auth/login", dependencies=[Depends(load_shed_guard("login"))])
 async def login():
     """Generate a JWT token for API access"""
     token = create_jwt_token()
@@ -241,6 +419,53 @@ async def login():
         "message": "Token generated successfully"
     }
 
+@app.post("/session/bootstrap", dependencies=[Depends(load_shed_guard("login"))])
+async def session_bootstrap(request: Request, catalog_version: str = None, authorization: str = Header(None)):
+    """Everything the web client needs before its first call, in one round trip.
+
+    Reuses the caller's token when a valid Bearer token is sent, otherwise issues one.
+    The era catalog is omitted when `catalog_version` matches the current version.
+    """
+    current_user = None
+    if authorization and authorization.startswith("Bearer "):
+        try:
+            token = authorization.split(" ")[1]
+            current_user = validate_jwt_token(token)
+        except HTTPException:
+            current_user = None
+    if current_user is None:
+        token = create_jwt_token()
+        current_user = validate_jwt_token(token)
+
+    catalog = get_era_catalog()
+    catalog_unchanged = catalog_version == catalog["version"]
+    payload = {
+        "success": True,
+        "token": token,
+        "expires_in": JWT_EXPIRATION_HOURS * 3600,
+        "expires_at": current_user["exp"],
+        "session_id": current_user["session_id"],
+        "rate_limit": await asyncio.to_thread(
+            get_rate_limit_status, current_user["session_id"], client_ip=get_client_ip(request)
+        ),
+        "languages": [{"code": code, "name": name} for code, name in SUPPORTED_LANGUAGES.items()],
+        "catalog_version": catalog["version"],
+        "catalog_unchanged": catalog_unchanged,
+        "era_catalog": None if catalog_unchanged else catalog,
+    }
+    # Carries a token and per-session quota: never cache in shared caches
+    return JSONResponse(payload, headers={"Cache-Control": "no-store"})
+
+@app.get("/eras")
+async def get_eras(if_none_match: str = Header(None)):
+    """Era catalog on its own: public and cacheable, revalidated by ETag"""
+    catalog = get_era_catalog()
+    etag = f'"{catalog["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"success": True, **catalog}, headers=headers)
+
 @app.post("/auth/refresh")
 async def refresh_token(current_user: dict = Depends(get_current_user)):
     """Refresh an existing JWT token"""
@@ -267,10 +492,16 @@ async def verify_token(current_user: dict = Depends(get_current_user)):
     }
 
 @app.get("/rate-limit/status")
-async def get_rate_limit_status_endpoint(current_user: dict = Depends(get_current_user)):
-    """Get current rate limit status for the authenticated user"""
+async def get_rate_limit_status_endpoint(
+    request: Request,
+    to: str = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get current rate limit status for the authenticated user (optionally for a destination `to`)"""
     token_key = current_user.get("session_id", "unknown")
-    rate_limit_info = get_rate_limit_status(token_key)
+    rate_limit_info = await asyncio.to_thread(
+        get_rate_limit_status, token_key, client_ip=get_client_ip(request), destination=to
+    )
     
     return {
         "success": True,
@@ -281,21 +512,157 @@ async def get_rate_limit_status_endpoint(current_user: dict = Depends(get_curren
         }
     }
 
-@app.post("/outbound-call")
+def call_status_callback_url(twiml_url: str) -> str:
+    """Twilio status callback on the same public host as the TwiML webhook"""
+    parts = urlsplit(twiml_url)
+    return f"{parts.scheme}://{parts.netloc}/outbound-call-status"
+
+async def create_outbound_call(twilio_client: Client, call_request: OutboundCallRequest, twiml_url: str, session_id: str = None) -> str:
+    """Initiate the call via Twilio (paced to the from-number's CPS) and record its initial status. Returns the callSid."""
+    # Pick the best from-number for this destination (local prefix first, then fallbacks)
+    from_number = CALLER_ID_POOL.select(call_request.to).number
+    started_at = time.monotonic()
+    try:
+        call = await TWILIO_DISPATCHER.create_call(
+            from_number,
+            lambda: twilio_client.calls.create(
+                from_=from_number,
+                to=call_request.to,
+                url=twiml_url,
+                # Frees the call slot when the call ends without a media stream (busy, no answer)
+                status_callback=call_status_callback_url(twiml_url),
+                status_callback_event=["completed"],
+                status_callback_method="POST",
+            )
+        )
+    finally:
+        finished_at = time.monotonic()
+        TWILIO_CREATE_SECONDS.observe(finished_at - started_at)
+
+    # The call's trace starts with the create request (includes CPS pacing waits)
+    trace = CALL_TRACER.trace(call.sid, started_at=started_at)
+    if trace is not None:
+        trace.add_span("twilio.create", started_at, finished_at)
+
+    # Initialize call status
+    update_call_status(
+        call.sid,
+        status="initiated",
+        to=call_request.to,
+        lang=call_request.lang,
+        year=call_request.year,
+        from_number=from_number,
+        twiml_requested=False,
+        websocket_connected=False,
+        stream_sid=None,
+        session_id=session_id,
+    )
+    return call.sid
+
+def enqueue_outbound_call(twilio_client: Client, call_request: OutboundCallRequest, twiml_url: str, session_id: str = None):
+    """Queue a call until a slot frees up (202), or reject with Retry-After when the queue is full (503)"""
+    async def dispatch(slot_id: str):
+        try:
+            call_sid = await create_outbound_call(twilio_client, call_request, twiml_url, session_id)
+        except Exception as e:
+            log.error("call.dispatch_failed", "❌ Queued call failed to dispatch", slot_id=slot_id, error=str(e))
+            CALLS_TOTAL.inc(outcome="dispatch_failed")
+            await CALL_ADMISSION.release(slot_id)
+            update_call_status(slot_id, status="failed", ended_reason="dispatch_error")
+            schedule_call_status_cleanup(slot_id)
+            return
+        if is_call_cancelled(slot_id):
+            # Cancelled while Twilio was creating the call: hang up before it rings for long
+            log.info("call.dispatch_cancelled", "🛑 Queued call cancelled during dispatch", slot_id=slot_id, call_sid=call_sid)
+            try:
+                await asyncio.to_thread(lambda: twilio_client.calls(call_sid).update(status="completed"))
+            except Exception as e:
+                log.debug("call.end_twilio_error", "Warning ending call via Twilio", call_sid=call_sid, error=str(e))
+            await CALL_ADMISSION.release(slot_id)
+            update_call_status(call_sid, status="ended", ended_reason="cancelled")
+            schedule_call_status_cleanup(call_sid)
+            return
+        await CALL_ADMISSION.bind(slot_id, call_sid)
+        update_call_status(slot_id, status="dispatched", call_sid=call_sid)
+        schedule_call_status_cleanup(slot_id)
+        log.info("call.dispatched", "📞 Queued call dispatched", slot_id=slot_id, call_sid=call_sid)
+        CALLS_TOTAL.inc(outcome="dispatched")
+
+    ticket = CALL_ADMISSION.enqueue(dispatch)
+    if ticket is None:
+        CALLS_TOTAL.inc(outcome="rejected_capacity")
+        retry_after = CALL_ADMISSION.retry_after_seconds()
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": str(retry_after)},
+            content={
+                "success": False,
+                "error": "All lines are busy right now.",
+                "error_code": "CAPACITY_EXCEEDED",
+                "suggestion": f"Please try again in about {retry_after} seconds.",
+                "retry_after": retry_after
+            }
+        )
+
+    estimated_start = datetime.fromtimestamp(ticket["estimated_start"]).isoformat()
+    update_call_status(
+        ticket["queue_id"],
+        status="queued",
+        to=call_request.to,
+        lang=call_request.lang,
+        year=call_request.year,
+        session_id=session_id,
+        call_sid=None,
+    )
+    log.info("call.queued", "⏳ Call queued", queue_id=ticket["queue_id"], position=ticket["position"])
+    CALLS_TOTAL.inc(outcome="queued")
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "queued": True,
+        "message": "All lines are busy; your call is queued",
+        "queueId": ticket["queue_id"],
+        "position": ticket["position"],
+        "estimated_start": estimated_start,
+        "parameters": {
+            "to": call_request.to,
+            "lang": call_request.lang,
+            "year": call_request.year
+        }
+    })
+
+def on_queued_call_expired(queue_id: str):
+    """Mark a queued call that waited past CALL_QUEUE_MAX_WAIT_SECONDS"""
+    CALLS_TOTAL.inc(outcome="queue_timeout")
+    update_call_status(queue_id, status="failed", ended_reason="queue_timeout")
+    schedule_call_status_cleanup(queue_id)
+
+def is_call_cancelled(queue_id: str) -> bool:
+    """A queued call the user already ended (e.g. /end-call?reason=no-answer) must not be dispatched"""
+    status = CALL_STATUS.get(queue_id)
+    return bool(status) and status.get("status") in ("failed", "ended")
+
+CALL_ADMISSION.on_expired = on_queued_call_expired
+CALL_ADMISSION.is_cancelled = is_call_cancelled
+
+@app.post("/outbound-call", dependencies=[Depends(load_shed_guard("outbound_call"))])
 async def outbound_call(
     call_request: OutboundCallRequest,
     request: Request = None,
     twilio_client: Client = Depends(get_twilio_client),
     current_user: dict = Depends(rate_limit_dependency)
 ):
-    print(f"📞 POST /outbound-call received")
-    print(f"🔍 Request headers: {dict(request.headers) if request else 'No request object'}")
-    print(f"🔍 Call request: {call_request}")
-    print(f"🔍 Current user: {current_user}")
+    log.info("call.requested", "📞 POST /outbound-call received", session_id=current_user.get("session_id"))
+    # Never log the bearer token
+    log.debug(
+        "call.request_details", "🔍 Outbound call request",
+        headers=lambda: {k: v for k, v in request.headers.items() if k != "authorization"} if request else None,
+        call_request=call_request,
+        user_id=current_user.get("user_id"),
+    )
     
     try:
         # Check configuration
-        if not TWILIO_PHONE_NUMBER:
+        if not len(CALLER_ID_POOL):
             raise ConfigurationError(
                 "Twilio phone number not configured",
                 "CONFIGURATION_ERROR",
@@ -309,6 +676,13 @@ async def outbound_call(
                 "Service temporarily unavailable. Please try again later."
             )
 
+        if not CATALOG.current.agents.available_agents:
+            raise ConfigurationError(
+                "No ElevenLabs agent has a resolvable ID",
+                "CONFIGURATION_ERROR",
+                "Service temporarily unavailable. Please try again later."
+            )
+
         # Create URL for TwiML with URL-encoded parameters for language and year
         # Handle both development (ngrok) and production (Vercel) environments
         host = request.headers.get('host')
@@ -318,36 +692,31 @@ async def outbound_call(
             # Development: Use ngrok URL for TwiML webhook
             ngrok_url = os.getenv("SERVER_DOMAIN")
             twiml_url = f"{ngrok_url}/outbound-call-twiml?lang={quote(call_request.lang)}&year={call_request.year}"
-            print(f"🔧 Development mode - Using ngrok URL: {twiml_url}")
+            log.debug("call.twiml_url", "🔧 Development mode - Using ngrok URL", twiml_url=twiml_url)
         else:
             # Production: Use the actual request host (Vercel domain)
             twiml_url = f"https://{host}/outbound-call-twiml?lang={quote(call_request.lang)}&year={call_request.year}"
-            print(f"🚀 Production mode - Using host: {twiml_url}")
+            log.debug("call.twiml_url", "🚀 Production mode - Using host", twiml_url=twiml_url)
         
-        print(f"📞 Calling: {call_request.to} ({call_request.lang}, {call_request.year})")
+        log.info("call.calling", "📞 Calling", to=call_request.to, lang=call_request.lang, year=call_request.year)
 
-        # Initiate the call via Twilio
-        call = twilio_client.calls.create(
-            from_=TWILIO_PHONE_NUMBER,
-            to=call_request.to,
-            url=twiml_url
-        )
+        # Admission control: take a call slot or wait in the queue
+        slot_id = CALL_ADMISSION.new_slot_id()
+        if not await CALL_ADMISSION.try_acquire(slot_id):
+            return enqueue_outbound_call(twilio_client, call_request, twiml_url, current_user.get("session_id"))
 
-        # Initialize call status
-        CALL_STATUS[call.sid] = {
-            "status": "initiated",
-            "to": call_request.to,
-            "lang": call_request.lang,
-            "year": call_request.year,
-            "twiml_requested": False,
-            "websocket_connected": False,
-            "stream_sid": None,
-        }
+        try:
+            call_sid = await create_outbound_call(twilio_client, call_request, twiml_url, current_user.get("session_id"))
+        except Exception:
+            await CALL_ADMISSION.release(slot_id)
+            raise
+        await CALL_ADMISSION.bind(slot_id, call_sid)
+        CALLS_TOTAL.inc(outcome="initiated")
 
         return JSONResponse({
             "success": True,
             "message": "Call initiated successfully",
-            "callSid": call.sid,
+            "callSid": call_sid,
             "parameters": {
                 "to": call_request.to,
                 "lang": call_request.lang,
@@ -356,7 +725,8 @@ async def outbound_call(
         })
         
     except TwilioRestException as e:
-        print(f"Twilio error: {str(e)}")
+        log.error("call.twilio_error", "Twilio error", error=str(e), code=getattr(e, 'code', None))
+        CALLS_TOTAL.inc(outcome="twilio_error")
         error_info = map_twilio_error(e)
         return JSONResponse(
             status_code=400,
@@ -369,8 +739,23 @@ async def outbound_call(
             }
         )
         
+    except TwilioServiceError as e:
+        log.error("call.dispatch_error", "Twilio dispatch error", error=str(e))
+        CALLS_TOTAL.inc(outcome="dispatch_error")
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": str(max(1, int(CALLER_ID_POOL.min_wait_seconds())))},
+            content={
+                "success": False,
+                "error": e.user_message,
+                "error_code": e.error_code,
+                "suggestion": "Please try again in a few moments."
+            }
+        )
+        
     except ConfigurationError as e:
-        print(f"Configuration error: {str(e)}")
+        log.error("call.configuration_error", "Configuration error", error=str(e))
+        CALLS_TOTAL.inc(outcome="configuration_error")
         return JSONResponse(
             status_code=500,
             content={
@@ -383,7 +768,8 @@ async def outbound_call(
         
     except ValueError as e:
         # Pydantic validation errors
-        print(f"Validation error: {str(e)}")
+        log.warning("call.validation_error", "Validation error", error=str(e))
+        CALLS_TOTAL.inc(outcome="validation_error")
         return JSONResponse(
             status_code=400,
             content={
@@ -395,8 +781,8 @@ async def outbound_call(
         )
         
     except Exception as e:
-        print(f"Unexpected error initiating outbound call: {str(e)}")
-        traceback.print_exc()
+        log.exception("call.unexpected_error", "Unexpected error initiating outbound call", error=str(e))
+        CALLS_TOTAL.inc(outcome="error")
         return JSONResponse(
             status_code=500,
             content={
@@ -415,6 +801,7 @@ async def outbound_call_twiml(
     lang: str = "en",
     year: int = 2024
 ):
+    requested_at = time.monotonic()
     response = VoiceResponse()
     connect = Connect()
 
@@ -423,7 +810,7 @@ async def outbound_call_twiml(
     
     # Get the host from request headers
     host = request.headers.get('host')
-    print(f"🔍 Request host header: {host}")
+    log.debug("twiml.request", "🔍 TwiML requested", host=host)
     
     # Construct WebSocket URL - handle both local and production environments
     if 'localhost' in host or '127.0.0.1' in host:
@@ -431,14 +818,14 @@ async def outbound_call_twiml(
         ngrok_url = os.getenv("SERVER_DOMAIN")
         if ngrok_url:
             websocket_url = f"wss://{ngrok_url.replace('https://', '').replace('http://', '')}/outbound-media-stream"
-            print(f"🔧 Local development - Using ngrok WebSocket URL: {websocket_url}")
+            log.debug("twiml.websocket_url", "🔧 Local development - Using ngrok WebSocket URL", websocket_url=websocket_url)
         else:
             websocket_url = f"wss://{host}/outbound-media-stream"
-            print(f"⚠️  Local development - No SERVER_DOMAIN set, using host: {websocket_url}")
+            log.warning("twiml.websocket_url", "⚠️  Local development - No SERVER_DOMAIN set, using host", websocket_url=websocket_url)
     else:
         # Production - use the request host
         websocket_url = f"wss://{host}/outbound-media-stream"
-        print(f"🚀 Production - Using host WebSocket URL: {websocket_url}")
+        log.debug("twiml.websocket_url", "🚀 Production - Using host WebSocket URL", websocket_url=websocket_url)
     
     stream = Stream(url=websocket_url)
     
@@ -446,56 +833,86 @@ async def outbound_call_twiml(
     stream.parameter(name="lang", value=lang)
     stream.parameter(name="year", value=str(year))
     
-    print(f"🔗 TwiML WebSocket URL: {websocket_url}")
-    print(f"📋 Custom parameters: lang={lang}, year={year}")
+    log.info("twiml.generated", "🔗 TwiML WebSocket URL", websocket_url=websocket_url, lang=lang, year=year)
 
-    # We cannot access callSid here directly from Twilio, but we can mark that TwiML was requested
-    # based on IP or timing it is a hint the call is ringing/connecting. This endpoint is called by Twilio.
-    # If desired, we could accept an optional callSid in query and mark it; skipping to avoid trust issues.
+    # Twilio sends CallSid with the webhook (query string for GET, form body for POST).
+    # It only links this request into the call's trace; call status is not changed here.
+    call_sid = request.query_params.get("CallSid")
+    if call_sid is None and request.method == "POST" and CALL_TRACING_ENABLED:
+        try:
+            call_sid = (await request.form()).get("CallSid")
+        except Exception:
+            call_sid = None
+    trace = CALL_TRACER.trace(call_sid)
 
     try:
         connect.append(stream)
         response.append(connect)
         
         twiml_content = str(response)
-        print(f"📄 Generated TwiML content: {twiml_content}")
+        log.debug("twiml.content", "📄 Generated TwiML content", twiml=twiml_content)
         
+        if trace is not None:
+            trace.add_span("twiml.served", requested_at, time.monotonic())
         return HTMLResponse(content=twiml_content, media_type="application/xml")
     except Exception as e:
-        print(f"❌ Error generating TwiML: {str(e)}")
+        log.error("twiml.error", "❌ Error generating TwiML", error=str(e))
+        if trace is not None:
+            trace.add_span("twiml.served", requested_at, time.monotonic(), error=type(e).__name__)
         # Return a simple error TwiML
         error_response = VoiceResponse()
         error_response.say("I apologize, but I'm experiencing technical difficulties. Please try calling again in a few moments.")
         error_response.hangup()
         return HTMLResponse(content=str(error_response), media_type="application/xml")
 
+@app.post("/outbound-call-status")
+async def outbound_call_status(request: Request):
+    """Twilio status callback: release the call slot once the call is over, answered or not"""
+    form = await request.form()
+    call_sid = form.get("CallSid")
+    call_status = form.get("CallStatus")
+    if call_sid and await CALL_ADMISSION.release_on_status(call_sid, call_status):
+        log.info("call.status_callback", "📴 Call slot released by Twilio status", call_sid=call_sid, call_status=call_status)
+        status = CALL_STATUS.get(call_sid) or {}
+        if call_status != "completed" and status.get("status") not in ("failed", "ended"):
+            # Never answered: let pollers stop waiting for a media stream
+            update_call_status(call_sid, status="failed", ended_reason=call_status)
+            schedule_call_status_cleanup(call_sid)
+    return Response(status_code=204)
+
 @app.websocket("/outbound-media-stream")
 async def handle_outbound_media_stream(websocket: WebSocket):
     try:
         await websocket.accept()
-        print(f"✅ Outbound WebSocket connection opened successfully")
-        print(f"🔗 WebSocket client: {websocket.client}")
-        print(f"📡 WebSocket URL: {websocket.url}")
-        print(f"⏳ Waiting for Twilio start event with custom parameters...")
+        accepted_at = time.monotonic()
+        media_log.info("media.connected", "✅ Outbound WebSocket connection opened successfully")
+        media_log.debug("media.connection_details", "🔗 WebSocket client", client=websocket.client, url=websocket.url)
     except Exception as e:
-        print(f"❌ Failed to accept WebSocket connection: {str(e)}")
+        media_log.error("media.accept_failed", "❌ Failed to accept WebSocket connection", error=str(e))
         return
 
     # Variables to track the call
     stream_sid = None
     call_sid = None
+    # Latency probe, timed from the WebSocket accept (None when CALL_METRICS_ENABLED is off)
+    probe = CALL_METRICS.start_call()
+    # Lifecycle trace, joined by callSid once the start event arrives
+    trace = None
+    trace_outcome = "disconnected"
     audio_interface = TwilioAudioInterface(websocket)
+    audio_interface.metrics = probe
     eleven_labs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
     conversation = None
+    ACTIVE_STREAMS.inc()
 
     try:
         async for message in websocket.iter_text():
             if not message:
-                print("Empty message received")
+                media_log.debug("media.empty_message", "Empty message received", call_sid=call_sid)
                 continue
 
-            if DEBUG_LOGS:
-                print(f"Raw WebSocket message: {message[:200]}...") 
+            # Sampled: one in LOG_SAMPLING's media.message frames (~50 per second per call)
+            media_log.debug("media.message", "Raw WebSocket message", call_sid=call_sid, message=message[:200])
 
             data = json.loads(message)
             event_type = data.get("event")
@@ -513,29 +930,43 @@ async def handle_outbound_media_stream(websocket: WebSocket):
                 # Set stream_id (used by TwilioAudioInterface for outbound audio)
                 audio_interface.stream_id = stream_sid
 
-                print(f"Outbound call started - StreamSid: {stream_sid}, CallSid: {call_sid}")
-                print(f"Call parameters - Language: {lang}, Year: {year}")
+                media_log.info("media.call_started", "Outbound call started",
+                               stream_sid=stream_sid, call_sid=call_sid, lang=lang, year=year)
+                if probe is not None:
+                    probe.started(call_sid, stream_sid, lang, year)
+                trace = CALL_TRACER.trace(call_sid)
+                if trace is not None:
+                    trace.mark("ws.accept", at=accepted_at)
+                    trace.mark("stream.start", stream_sid=stream_sid, lang=lang, year=year)
+                    audio_interface.trace = trace
 
                 # Mark call as answered/connected
                 if call_sid:
-                    existing = CALL_STATUS.get(call_sid) or {}
-                    existing.update({
-                        "status": "answered",
-                        "twiml_requested": True,
-                        "websocket_connected": True,
-                        "stream_sid": stream_sid,
-                        "lang": lang,
-                        "year": year,
-                    })
-                    CALL_STATUS[call_sid] = existing
-
-                # Get era-specific configuration
-                session_vars = get_era_session_variables(year, lang)
+                    update_call_status(
+                        call_sid,
+                        status="answered",
+                        twiml_requested=True,
+                        websocket_connected=True,
+                        stream_sid=stream_sid,
+                        lang=lang,
+                        year=year,
+                    )
+
+                # Get era-specific configuration (precomputed per era and language)
+                era_payload = get_era_session_payload(year, lang)
                 
-                print(f"Era configuration: {session_vars['era_name']} ({session_vars['time_period']})")
+                media_log.info("media.era", "Era configuration", call_sid=call_sid,
+                               era=era_payload.era_name, time_period=era_payload.time_period)
 
                 # Initialize the conversation
                 try:
+                    # One catalog snapshot for the whole setup, even if a reload lands meanwhile
+                    catalog = CATALOG.current
+                    voice_manager = catalog.voices
+                    agent_manager = catalog.agents
+                    first_message_manager = catalog.first_messages
+                    selection_started_at = time.monotonic()
+                    
                     # Get randomized voice for the language (era-agnostic randomization)
                     # Voice characteristics (speed, stability, style) come from era_config.py
                     selected_voice = voice_manager.get_random_voice_for_language(lang)
@@ -545,73 +976,66 @@ async def handle_outbound_media_stream(websocket: WebSocket):
                     if not voice_id:
                         voice_id = voice_manager.get_voice_id_from_env(lang)
                         if voice_id:
-                            print(f"🔄 Using fallback voice from env: {voice_id[:8]}...")
+                            media_log.warning("media.voice_fallback", "🔄 Using fallback voice from env", call_sid=call_sid, voice_id=voice_id[:8])
+                            CONVERSATION_FALLBACKS_TOTAL.inc(fallback="voice_env")
                     
-                    # Get randomized agent (era-agnostic)
+                    # Get randomized agent (era-agnostic); only agents whose ID resolved at load are picked
                     selected_agent = agent_manager.get_random_agent()
-                    agent_id_to_use = agent_manager.get_agent_id(selected_agent) if selected_agent else ELEVENLABS_AGENT_ID_1
-                    
-                    # Fallback to base agent if random selection fails
-                    if not agent_id_to_use:
-                        agent_id_to_use = ELEVENLABS_AGENT_ID_1
-                        print(f"🔄 Using fallback base agent: {agent_id_to_use[:8]}...")
-                    
-                    print(f"🎯 Using agent ID: {agent_id_to_use[:8]}... ({selected_agent['name'] if selected_agent else 'fallback'})")
-                    print(f"🎤 Using voice ID: {voice_id[:8] if voice_id else 'default'}... ({selected_voice['name'] if selected_voice else 'agent default'})")
-                    
-                    # Create dynamic variables for the agent's system prompt (exclude voice_settings)
-                    dynamic_vars = {k: v for k, v in session_vars.items() if k != 'voice_settings'}
+                    if not selected_agent:
+                        raise ConfigurationError(
+                            "No ElevenLabs agent has a resolvable ID (see misconfigured_agents in /config)",
+                            "CONFIGURATION_ERROR"
+                        )
+                    agent_id_to_use = selected_agent["agent_id"]
+                    agent_name = selected_agent['name']
+                    if probe is not None:
+                        probe.selected(agent_id_to_use, agent_name, voice_id)
+                    if trace is not None:
+                        trace.add_span("selection", selection_started_at, time.monotonic(),
+                                       agent=agent_name, voice_id=voice_id)
                     
-                    # Add voice metadata for character consistency
-                    if selected_voice:
-                        dynamic_vars["voice_gender"] = selected_voice.get('gender', 'unknown')
-                        dynamic_vars["voice_age_range"] = selected_voice.get('age_range', 'unknown')
+                    media_log.info(
+                        "media.selection", "🎯 Agent and voice selected", call_sid=call_sid,
+                        agent=agent_name, agent_id=(agent_id_to_use or "")[:8],
+                        voice=selected_voice['name'] if selected_voice else 'agent default',
+                        voice_id=voice_id[:8] if voice_id else 'default',
+                    )
                     
-                    # Create conversation config override combining:
-                    # 1. Era-specific voice settings (from era_config.py)
-                    # 2. Randomized voice_id (from voice_manager)
-                    voice_settings = session_vars['voice_settings'].copy()
+                    # Dynamic variables for the agent's system prompt: shared era payload
+                    # plus this call's year and voice metadata for character consistency
+                    dynamic_vars = build_dynamic_variables(era_payload, year, selected_voice)
                     
                     # Get random first message for this era and language
                     first_message = first_message_manager.get_random_first_message(
-                        era_name=session_vars['era_name'], 
+                        era_name=era_payload.era_name, 
                         language=lang
                     )
                     
-                    # Use the official ElevenLabs documentation structure exactly
-                    conversation_override = {
-                        "agent": {},
-                        "tts": {}
-                    }
-                    
-                    # Add first message override if available
-                    if first_message:
-                        conversation_override["agent"]["first_message"] = first_message
-                        #print(f"💬 First message override set: {first_message[:50]}...")
-                    
-                    # Add voice_id if available (official docs show this is supported)
-                    if voice_id:
-                        conversation_override["tts"]["voice_id"] = voice_id
-                        print(f"🎤 Voice ID override set: {voice_id}")
-                    
-                    # Add other voice settings - testing which ones cause issues
-                    # Note: These might need to be enabled in agent security settings
-                    voice_settings_to_test = {
-                        "stability": voice_settings.get("stability"),
-                        "similarity_boost": voice_settings.get("similarity_boost"), 
-                        "speed": voice_settings.get("speed")
-                        # Excluding 'style' as it wasn't in the screenshot
-                    }
+                    # Conversation config override combining:
+                    # 1. Era-specific voice settings (from era_config.py)
+                    # 2. Randomized voice_id (from voice_manager)
+                    # 3. First message for this era and language
+                    conversation_override = build_conversation_override(era_payload, voice_id, first_message)
+                    # Rendered by the log writer, and only when debug logging is on
+                    media_log.debug(
+                        "media.conversation_config", "📡 Conversation config", call_sid=call_sid,
+                        dynamic_variables=dynamic_vars,
+                        override=lambda: json.dumps(conversation_override),
+                    )
                     
-                    # Add voice settings to override
-                    conversation_override["tts"].update(voice_settings_to_test)
+                    # ElevenLabs invokes these from its own threads; the log call just enqueues
+                    def on_agent_response(text: str):
+                        if probe is not None:
+                            probe.agent_text(text)
+                        if trace is not None:
+                            trace.mark_once("agent.first_text")
+                        media_log.info("transcript.agent", "Agent", call_sid=call_sid, era=era_payload.era_name, agent=agent_name, text=text)
                     
-                    print(f"🔍 Dynamic variables: {dynamic_vars}")
-                    print(f"🔧 Voice settings from era config: {voice_settings}")
-                    print(f"📡 Conversation override structure: {json.dumps(conversation_override, indent=2)}")
-                    #print(f"⚠️  Important: Voice overrides must be enabled in ElevenLabs agent security settings")
+                    def on_user_transcript(text: str):
+                        media_log.info("transcript.user", "User", call_sid=call_sid, text=text)
                     
                     # Try with both dynamic variables and conversation overrides
+                    construct_started_at = time.monotonic()
                     try:
                         config = ConversationInitiationData(
                             dynamic_variables=dynamic_vars,
@@ -624,14 +1048,14 @@ async def handle_outbound_media_stream(websocket: WebSocket):
                             config=config,
                             requires_auth=True,
                             audio_interface=audio_interface,
-                            callback_agent_response=lambda text: print(f"Agent ({session_vars['era_name']}/{selected_agent['name'] if selected_agent else 'default'}): {text}"),
-                            callback_user_transcript=lambda text: print(f"User: {text}"),
+                            callback_agent_response=on_agent_response,
+                            callback_user_transcript=on_user_transcript,
                         )
-                        print("✅ Created conversation with dynamic variables and voice overrides")
+                        media_log.debug("media.conversation_created", "✅ Created conversation with dynamic variables and voice overrides", call_sid=call_sid)
                     except Exception as config_error:
-                        print(f"❌ Error with voice override config: {config_error}")
-                        print(f"📋 Error details: {str(config_error)}")
-                        print("🔄 Trying without voice overrides...")
+                        media_log.error("media.override_rejected", "❌ Error with voice override config; trying without voice overrides",
+                                        call_sid=call_sid, error=str(config_error))
+                        CONVERSATION_FALLBACKS_TOTAL.inc(fallback="no_voice_override")
                         
                         try:
                             # Fallback: Try with just dynamic variables, no voice overrides
@@ -645,13 +1069,14 @@ async def handle_outbound_media_stream(websocket: WebSocket):
                                 config=config_fallback,
                                 requires_auth=True,
                                 audio_interface=audio_interface,
-                                callback_agent_response=lambda text: print(f"Agent (no voice override/{selected_agent['name'] if selected_agent else 'default'}): {text}"),
-                                callback_user_transcript=lambda text: print(f"User: {text}"),
+                                callback_agent_response=on_agent_response,
+                                callback_user_transcript=on_user_transcript,
                             )
-                            print("✅ Created conversation with dynamic variables only (no voice overrides)")
+                            media_log.info("media.conversation_created", "✅ Created conversation with dynamic variables only (no voice overrides)", call_sid=call_sid)
                         except Exception as fallback_error:
-                            print(f"❌ Error even without voice overrides: {fallback_error}")
-                            print("🔄 Falling back to basic conversation...")
+                            media_log.error("media.variables_rejected", "❌ Error even without voice overrides; falling back to basic conversation",
+                                            call_sid=call_sid, error=str(fallback_error))
+                            CONVERSATION_FALLBACKS_TOTAL.inc(fallback="basic")
                             
                             # Final fallback: Basic conversation
                             conversation = Conversation(
@@ -659,18 +1084,28 @@ async def handle_outbound_media_stream(websocket: WebSocket):
                                 agent_id=agent_id_to_use,
                                 requires_auth=True,
                                 audio_interface=audio_interface,
-                                callback_agent_response=lambda text: print(f"Agent (basic/{selected_agent['name'] if selected_agent else 'default'}): {text}"),
-                                callback_user_transcript=lambda text: print(f"User: {text}"),
+                                callback_agent_response=on_agent_response,
+                                callback_user_transcript=on_user_transcript,
                             )
 
+                    if trace is not None:
+                        trace.add_span("conversation.construct", construct_started_at, time.monotonic())
+
+                    # Time to first agent audio (the first message, no LLM turn) tracks TTS latency per voice
+                    if voice_id:
+                        session_started_at = time.monotonic()
+                        audio_interface.on_first_audio = lambda sent_at, measured_voice=voice_id: \
+                            voice_manager.record_voice_latency(measured_voice, (sent_at - session_started_at) * 1000)
+                    
                     # Start the conversation session
+                    start_session_at = time.monotonic()
                     conversation.start_session()
+                    if trace is not None:
+                        trace.add_span("elevenlabs.start_session", start_session_at, time.monotonic())
                     
-                    print(f"ElevenLabs conversation started successfully\n")
-                    #print(f"Era: {session_vars['era_name']} | Language: {lang} | Year: {year}")
+                    media_log.info("media.conversation_started", "ElevenLabs conversation started successfully", call_sid=call_sid)
                 except Exception as e:
-                    print(f"Error starting ElevenLabs conversation: {str(e)}")
-                    traceback.print_exc()
+                    media_log.exception("media.conversation_error", "Error starting ElevenLabs conversation", call_sid=call_sid, error=str(e))
                     # Send error message to user via TwiML
                     try:
                         error_response = VoiceResponse()
@@ -691,34 +1126,34 @@ async def handle_outbound_media_stream(websocket: WebSocket):
                 try:
                     await audio_interface.handle_twilio_message(data)
                 except Exception as e:
-                    print(f"Error handling audio: {str(e)}")
-                    traceback.print_exc()
+                    media_log.exception("media.audio_error", "Error handling audio", call_sid=call_sid, error=str(e))
 
             # Handle stop event
             elif event_type == "stop":
-                print(f"Call ended - StreamSid: {stream_sid}")
+                media_log.info("media.call_ended", "Call ended", stream_sid=stream_sid, call_sid=call_sid)
+                trace_outcome = "completed"
+                if trace is not None:
+                    trace.mark("stream.stop")
                 # Mark call as ended
                 if call_sid:
-                    existing = CALL_STATUS.get(call_sid) or {}
-                    existing.update({
-                        "status": "ended",
-                    })
-                    CALL_STATUS[call_sid] = existing
+                    update_call_status(call_sid, status="ended")
+                    await CALL_ADMISSION.release(call_sid)
                     # Delay cleanup to allow frontend pollers to read final state
                     schedule_call_status_cleanup(call_sid)
                 if conversation:
                     try:
                         conversation.end_session()
-                        print("ElevenLabs conversation ended")
+                        media_log.debug("media.conversation_ended", "ElevenLabs conversation ended", call_sid=call_sid)
                     except Exception as e:
-                        print(f"Error ending conversation: {str(e)}")
+                        media_log.error("media.end_error", "Error ending conversation", call_sid=call_sid, error=str(e))
 
     except Exception as e:
-        print(f"WebSocket error: {str(e)}")
-        traceback.print_exc()
+        media_log.exception("media.websocket_error", "WebSocket error", call_sid=call_sid, error=str(e))
+        trace_outcome = "error"
         
         # Clean up call status if we have a call_sid and there was an error
         if call_sid:
+            await CALL_ADMISSION.release(call_sid)
             cleanup_call_status(call_sid)
 
     finally:
@@ -726,40 +1161,99 @@ async def handle_outbound_media_stream(websocket: WebSocket):
             try:
                 conversation.end_session()
                 conversation.wait_for_session_end()
-                print("Conversation cleanup completed")
+                media_log.debug("media.cleanup", "Conversation cleanup completed", call_sid=call_sid)
             except Exception as e:
-                print(f"Error in conversation cleanup: {str(e)}")
+                media_log.error("media.cleanup_error", "Error in conversation cleanup", call_sid=call_sid, error=str(e))
+        
+        # Buffer this call's latency record; the flusher writes it out (idempotent)
+        CALL_METRICS.finish_call(probe)
+        CALL_TRACER.finish(trace, outcome=trace_outcome)
+        ACTIVE_STREAMS.dec()
         
-        # Do not cleanup immediately; status cleanup is scheduled where appropriate
-        pass
+        # Free the call slot if neither stop nor an error released it (idempotent)
+        if call_sid:
+            await CALL_ADMISSION.release(call_sid)
+        # Do not cleanup status immediately; status cleanup is scheduled where appropriate
 
 @app.get("/call-status/{call_sid}")
 async def get_call_status(call_sid: str, current_user: dict = Depends(get_current_user)):
-    if DEBUG_LOGS:
-        print(f"📊 Status check for call: {call_sid}")
+    log.debug("call_status.check", "📊 Status check for call", call_sid=call_sid)
     status = CALL_STATUS.get(call_sid)
     if not status:
         return JSONResponse({"success": False, "status": "unknown"}, status_code=404)
+    if status.get("status") == "queued":
+        # Queue IDs are polled like callSids; report the live position and ETA
+        position = CALL_ADMISSION.position(call_sid)
+        if position:
+            status = dict(status)
+            status["position"] = position
+            status["estimated_start"] = datetime.fromtimestamp(CALL_ADMISSION.estimate_start(position)).isoformat()
     return JSONResponse({"success": True, "status": status.get("status"), "details": status})
 
+@app.get("/call-status")
+async def get_call_statuses(
+    sids: str = None,
+    status: str = None,
+    since: float = None,
+    until: float = None,
+    if_none_match: str = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Batch call status lookup by comma-separated SIDs or by status/time-window filter.
+
+    Filter queries (no `sids`) only return calls created by the caller's session.
+    Responses carry an ETag; a matching If-None-Match returns 304 with no body.
+    """
+    call_sids = parse_call_sids(sids) if sids is not None else None
+    if call_sids is not None and len(call_sids) > BATCH_CALL_STATUS_MAX:
+        return JSONResponse({
+            "success": False,
+            "error": f"Too many call SIDs (maximum {BATCH_CALL_STATUS_MAX})",
+            "error_code": "VALIDATION_ERROR"
+        }, status_code=400)
+
+    result = query_call_statuses(
+        call_sids=call_sids,
+        status=status,
+        since=since,
+        until=until,
+        session_id=current_user.get("session_id"),
+    )
+    payload = {
+        "success": True,
+        "count": len(result["calls"]),
+        "calls": {
+            sid: {"status": details.get("status"), "details": details}
+            for sid, details in result["calls"].items()
+        },
+        "missing": result["missing"],
+    }
+
+    etag = compute_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
 @app.post("/end-call/{call_sid}")
 async def end_call(call_sid: str, request: Request = None, twilio_client: Client = Depends(get_twilio_client), current_user: dict = Depends(get_current_user)):
     try:
         reason = request.query_params.get("reason") if request else None
-        # Attempt to complete the call via Twilio
-        try:
-            twilio_client.calls(call_sid).update(status="completed")
-        except Exception as twilio_err:
-            # If update fails (e.g., call already ended), continue to update local state
-            if DEBUG_LOGS:
-                print(f"Warning ending call via Twilio: {twilio_err}")
-
-        existing = CALL_STATUS.get(call_sid) or {}
-        existing.update({
-            "status": "failed" if reason == "no-answer" else "ended",
-            "ended_reason": reason or "manual",
-        })
-        CALL_STATUS[call_sid] = existing
+        # A call still waiting in the admission queue has no Twilio call yet: just drop it
+        if not CALL_ADMISSION.cancel(call_sid):
+            # Attempt to complete the call via Twilio
+            try:
+                twilio_client.calls(call_sid).update(status="completed")
+            except Exception as twilio_err:
+                # If update fails (e.g., call already ended), continue to update local state
+                log.debug("call.end_twilio_error", "Warning ending call via Twilio", call_sid=call_sid, error=str(twilio_err))
+
+        update_call_status(
+            call_sid,
+            status="failed" if reason == "no-answer" else "ended",
+            ended_reason=reason or "manual",
+        )
+        await CALL_ADMISSION.release(call_sid)
         # Delay cleanup so clients can read the final state at least once
         schedule_call_status_cleanup(call_sid)
         
@@ -0,0 +1,308 @@
+"""
+Offline latency report over call metrics NDJSON (latency.ndjson / calls.ndjson).
+
+Streams one or more NDJSON files (plain or .gz) line by line and joins each
+call with its LLM/TTS timings from a latency-ui.json style file. The timings
+are keyed by call_sid, or by "call N model M" meaning the Nth call of agent M
+in file order. From these it derives `llm_plus_tts_ms` and `setup_overhead_ms`,
+then summarises each metric per agent, voice, language and era: mean, p50,
+p95, p99 and vectorised bootstrap confidence intervals. Groups are sorted and
+the bootstrap is seeded per (dimension, group, metric), so reports from two
+releases can be diffed and a new group never shifts the intervals of the others.
+
+Usage (from apps/server):
+    python metrics/analyze_latency.py metrics/latency.ndjson --timings metrics/latency-ui.json
+    python metrics/analyze_latency.py metrics/calls.ndjson --by agent era --format json -o report.json
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+# Report columns: name -> path into the NDJSON record (None = joined/derived)
+METRIC_FIELDS = {
+    "setup_ms": ("setup_ms",),
+    "first_audio_ms": ("first_audio_ms",),
+    "first_sentence_delta_ms": ("first_sentence_delta_ms",),
+    "last_agent_text_delta_ms": ("last_agent_text_delta_ms",),
+    "sentences_spoken": ("sentences_spoken",),
+    "avg_out_interval_ms": ("audio", "avg_out_interval_ms"),
+    "p95_out_interval_ms": ("audio", "p95_out_interval_ms"),
+    "min_round_trip_ms": ("audio", "min_round_trip_ms"),
+    "llm_ms": None,
+    "tts_ms": None,
+    "llm_plus_tts_ms": None,
+    "setup_overhead_ms": None,
+}
+DEFAULT_METRICS = ("setup_ms", "first_audio_ms", "llm_plus_tts_ms", "setup_overhead_ms",
+                   "avg_out_interval_ms", "p95_out_interval_ms")
+DIMENSIONS = ("agent", "voice", "lang", "era")
+QUANTILES = (0.50, 0.95, 0.99)
+# Bootstrap resamples are drawn in chunks of at most this many values
+BOOTSTRAP_CHUNK_VALUES = 4_000_000
+
+
+def iter_records(paths: Iterable[str], errors: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Yield records one line at a time; malformed lines are counted, not fatal"""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    errors["malformed_lines"] = errors.get("malformed_lines", 0) + 1
+                    continue
+                if isinstance(record, dict):
+                    yield record
+                else:
+                    errors["malformed_lines"] = errors.get("malformed_lines", 0) + 1
+
+
+def load_timings(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """Per-call ElevenLabs timings: {call_sid or "call N model M": {"avg_llm", "avg_tts"}}"""
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def era_for_year(year: Optional[int]) -> str:
+    if year is None:
+        return "unknown"
+    try:
+        from era_config import get_era_config
+        return get_era_config(int(year)).era_name
+    except Exception:
+        return str(year)
+
+
+def _field(record: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    value: Any = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def flatten(record: Dict[str, Any], timing: Optional[Dict[str, float]]) -> Dict[str, Optional[float]]:
+    """One call's metric values, with the LLM/TTS join and derived columns"""
+    values = {name: _field(record, path) for name, path in METRIC_FIELDS.items() if path}
+    llm = timing.get("avg_llm") if timing else None
+    tts = timing.get("avg_tts") if timing else None
+    values["llm_ms"] = llm
+    values["tts_ms"] = tts
+    values["llm_plus_tts_ms"] = llm + tts if llm is not None and tts is not None else None
+    setup = values["setup_ms"]
+    values["setup_overhead_ms"] = (
+        setup - values["llm_plus_tts_ms"] if setup is not None and values["llm_plus_tts_ms"] is not None else None
+    )
+    return values
+
+
+def group_keys(record: Dict[str, Any]) -> Dict[str, str]:
+    agent = record.get("agent") or {}
+    return {
+        "agent": str(agent.get("agent_id") or "unknown"),
+        "voice": str(agent.get("voice_id") or "unknown"),
+        "lang": str(agent.get("lang") or "unknown"),
+        "era": era_for_year(agent.get("year")),
+    }
+
+
+class Collector:
+    """Compact per-group columns (array('d'), NaN for missing) built while streaming."""
+
+    def __init__(self, dimensions: Iterable[str], metrics: Iterable[str],
+                 timings: Dict[str, Dict[str, float]]):
+        self.dimensions = list(dimensions)
+        self.metrics = list(metrics)
+        self.timings = timings
+        self.columns: Dict[Tuple[str, str], Dict[str, array]] = {}
+        self.calls = 0
+        self.joined = 0
+        self._agent_ordinals: Dict[str, int] = {}
+
+    def _timing(self, record: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        agent_id = str((record.get("agent") or {}).get("agent_id"))
+        ordinal = self._agent_ordinals[agent_id] = self._agent_ordinals.get(agent_id, 0) + 1
+        timing = self.timings.get(record.get("call_sid") or "")
+        return timing or self.timings.get(f"call {ordinal} model {agent_id}")
+
+    def add(self, record: Dict[str, Any]):
+        timing = self._timing(record)
+        values = flatten(record, timing)
+        keys = group_keys(record)
+        self.calls += 1
+        self.joined += timing is not None
+        for dimension in ["all"] + self.dimensions:
+            group = (dimension, "all" if dimension == "all" else keys[dimension])
+            columns = self.columns.get(group)
+            if columns is None:
+                columns = self.columns[group] = {metric: array("d") for metric in self.metrics}
+            for metric in self.metrics:
+                value = values[metric]
+                columns[metric].append(np.nan if value is None else value)
+
+
+def bootstrap_ci(values: np.ndarray, resamples: int, confidence: float,
+                 rng: np.random.Generator) -> Dict[str, List[float]]:
+    """Percentile-bootstrap intervals for the mean and each quantile (resamples x n matrix)"""
+    n = len(values)
+    chunk = max(1, min(resamples, BOOTSTRAP_CHUNK_VALUES // n))
+    means: List[np.ndarray] = []
+    quantiles: List[np.ndarray] = []
+    for start in range(0, resamples, chunk):
+        samples = values[rng.integers(0, n, size=(min(chunk, resamples - start), n))]
+        means.append(samples.mean(axis=1))
+        quantiles.append(np.quantile(samples, QUANTILES, axis=1))
+    alpha = (1 - confidence) / 2
+    bounds = (alpha, 1 - alpha)
+    intervals = {"mean": np.quantile(np.concatenate(means), bounds).tolist()}
+    stacked = np.concatenate(quantiles, axis=1)
+    for q, row in zip(QUANTILES, stacked):
+        intervals[f"p{int(q * 100)}"] = np.quantile(row, bounds).tolist()
+    return intervals
+
+
+def summarize(column: array, resamples: int, confidence: float,
+              rng: np.random.Generator) -> Dict[str, Any]:
+    values = np.frombuffer(column, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    summary: Dict[str, Any] = {"n": int(values.size)}
+    if not values.size:
+        return summary
+    summary["mean"] = float(values.mean())
+    for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+        summary[f"p{int(q * 100)}"] = float(value)
+    if resamples > 0 and values.size > 1:
+        summary["ci"] = bootstrap_ci(values, resamples, confidence, rng)
+    return summary
+
+
+def _rounded(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, 1)
+    if isinstance(value, list):
+        return [_rounded(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    return value
+
+
+def group_rng(seed: int, dimension: str, group: str, metric: str) -> np.random.Generator:
+    """Bootstrap generator for one cell, independent of which other groups exist"""
+    key = hashlib.blake2b(f"{dimension}\0{group}\0{metric}".encode("utf-8"), digest_size=8).digest()
+    return np.random.default_rng([seed, int.from_bytes(key, "big")])
+
+
+def build_report(collector: Collector, resamples: int = 2000, confidence: float = 0.95,
+                 seed: int = 0, errors: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Nested {dimension: {group: {metric: summary}}}, deterministic for a given seed"""
+    groups: Dict[str, Dict[str, Any]] = {}
+    for (dimension, group) in sorted(collector.columns):
+        columns = collector.columns[(dimension, group)]
+        groups.setdefault(dimension, {})[group] = {
+            metric: summarize(columns[metric], resamples, confidence, group_rng(seed, dimension, group, metric))
+            for metric in collector.metrics
+        }
+    return {
+        "calls": collector.calls,
+        "joined_timings": collector.joined,
+        "errors": errors or {},
+        "bootstrap": {"resamples": resamples, "confidence": confidence, "seed": seed},
+        "metrics": collector.metrics,
+        "groups": _rounded(groups),
+    }
+
+
+def _cell(summary: Dict[str, Any], stat: str) -> str:
+    if stat not in summary:
+        return "–"
+    interval = summary.get("ci", {}).get(stat)
+    if interval is None:
+        return f"{summary[stat]:g}"
+    return f"{summary[stat]:g} [{interval[0]:g}, {interval[1]:g}]"
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    confidence = int(report["bootstrap"]["confidence"] * 100)
+    lines = [
+        "# Call latency report",
+        "",
+        f"- Calls: {report['calls']} ({report['joined_timings']} joined with LLM/TTS timings)",
+        f"- Intervals: {confidence}% bootstrap, {report['bootstrap']['resamples']} resamples, "
+        f"seed {report['bootstrap']['seed']}",
+    ]
+    for name, count in sorted(report["errors"].items()):
+        lines.append(f"- Skipped {name.replace('_', ' ')}: {count}")
+    dimensions = ["all"] + [d for d in report["groups"] if d != "all"]
+    for dimension in dimensions:
+        if dimension not in report["groups"]:
+            continue
+        lines += ["", f"## By {dimension}" if dimension != "all" else "## All calls"]
+        for metric in report["metrics"]:
+            lines += [
+                "",
+                f"### {metric}",
+                "",
+                f"| {dimension} | n | mean [{confidence}% CI] | p50 [CI] | p95 [CI] | p99 |",
+                "|---|---:|---:|---:|---:|---:|",
+            ]
+            for group, metrics in report["groups"][dimension].items():
+                summary = metrics[metric]
+                lines.append(
+                    f"| {group} | {summary['n']} | {_cell(summary, 'mean')} | {_cell(summary, 'p50')} "
+                    f"| {_cell(summary, 'p95')} | {summary['p99'] if 'p99' in summary else '–'} |"
+                )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="+", help="NDJSON metric files (.gz allowed)")
+    parser.add_argument("--timings", help="per-call LLM/TTS timings JSON (e.g. metrics/latency-ui.json)")
+    parser.add_argument("--by", nargs="+", choices=DIMENSIONS, default=list(DIMENSIONS),
+                        help="group summaries by these dimensions")
+    parser.add_argument("--metrics", nargs="+", choices=list(METRIC_FIELDS), default=list(DEFAULT_METRICS))
+    parser.add_argument("--bootstrap", type=int, default=2000, help="resamples per interval (0 = none)")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=("markdown", "json"), default="markdown")
+    parser.add_argument("-o", "--output", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    errors: Dict[str, int] = {}
+    collector = Collector(args.by, args.metrics, load_timings(args.timings))
+    for record in iter_records(args.files, errors):
+        collector.add(record)
+    report = build_report(collector, args.bootstrap, args.confidence, args.seed, errors)
+
+    if args.format == "json":
+        output = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    else:
+        output = render_markdown(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
+
+
+if __name__ == "__main__":
+    main()
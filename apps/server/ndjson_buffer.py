@@ -0,0 +1,81 @@
+"""
+Bounded in-memory buffer of JSON records, appended to an NDJSON file.
+
+Shared by the per-call latency records (call_metrics) and the call traces
+(call_tracing). record() only touches memory, so it is safe on the media path.
+A background task calls flush() through asyncio.to_thread to do the file I/O.
+If the buffer overflows between flushes, the oldest records are dropped and
+counted. Records from a failed write are kept for the next flush.
+"""
+
+import os
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+
+class NdjsonBuffer:
+    """Ring buffer of records, flushed to an NDJSON file."""
+
+    def __init__(self, path: str, buffer_size: int, enabled: bool = True, label: str = "records"):
+        self.path = path
+        self.enabled = enabled
+        self.label = label
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=max(1, buffer_size))
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def record(self, entry: Dict[str, Any]):
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(entry)
+            self.recorded += 1
+
+    def drain(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._buffer)
+            self._buffer.clear()
+        return entries
+
+    def flush(self) -> int:
+        """Append buffered records to the NDJSON file. Returns records written."""
+        entries = self.drain()
+        if not entries:
+            return 0
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        except OSError as e:
+            self.flush_errors += 1
+            print(f"⚠️  Could not write {self.label} to {self.path}: {e}")
+            # Keep them for the next flush ahead of newer records; if the buffer
+            # refilled meanwhile, the oldest retried records are the ones dropped
+            with self._lock:
+                overflow = len(self._buffer) + len(entries) - self._buffer.maxlen
+                if overflow > 0:
+                    self.dropped += overflow
+                    entries = entries[overflow:]
+                self._buffer.extendleft(reversed(entries))
+            return 0
+        self.flushed += len(entries)
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "file": self.path,
+            "buffered": len(self._buffer),
+            "buffer_size": self._buffer.maxlen,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+        }
@@ -0,0 +1,354 @@
+"""
+Rate limit storage using GCRA (generic cell rate algorithm).
+
+Each key stores a single float, its theoretical arrival time (TAT), instead of
+a deque of call timestamps. A limit of N calls per window W becomes one
+"emission interval" T = W / N: every allowed call pushes the TAT forward by T,
+and a call is allowed while the TAT stays within W of now. Memory per key is
+constant no matter how large N is.
+
+Two backends share the same interface (check / evict_expired / cleanup):
+- MemoryRateLimitStore: per-process dict + expiry heap (default)
+- SQLiteRateLimitStore: WAL-mode SQLite file shared by every worker on a host
+"""
+
+import hashlib
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# One check: (key, limit, window_seconds)
+RateCheck = Tuple[str, int, float]
+
+# Float slack (as a fraction of one emission interval) absorbing accumulated
+# rounding, so N calls at the exact same instant are all admitted
+_EPSILON = 1e-6
+
+
+def gcra_state(tat: Optional[float], now: float, limit: int, window_seconds: float) -> Dict:
+    """Derive count/remaining/reset_time for a stored TAT without changing it"""
+    emission_interval = window_seconds / limit
+    backlog = max(0.0, (tat or now) - now)
+    current_count = min(limit, math.ceil(backlog / emission_interval - _EPSILON)) if backlog else 0
+    # When the count next drops by one (i.e. when a slot frees up)
+    reset_time = tat - (current_count - 1) * emission_interval if current_count else now
+    return {
+        "current_count": current_count,
+        "remaining": max(0, limit - current_count),
+        "reset_time": reset_time,
+    }
+
+
+def gcra_update(tat: Optional[float], now: float, limit: int, window_seconds: float):
+    """
+    Apply one call to a stored TAT.
+    Returns: (allowed, new_tat) - new_tat equals the old TAT when not allowed
+    """
+    emission_interval = window_seconds / limit
+    base = max(tat or now, now)
+    new_tat = base + emission_interval
+    if new_tat - now > window_seconds + _EPSILON * emission_interval:
+        return False, tat
+    return True, new_tat
+
+
+def forwarded_client_ip(forwarded_for: Optional[str], trusted_proxies: int) -> Optional[str]:
+    """
+    Client IP from an X-Forwarded-For chain behind `trusted_proxies` proxies.
+    Each proxy appends the address it received from, so the client is the hop
+    `trusted_proxies` from the right; anything further left is caller-controlled.
+    Returns None when the chain is shorter than that (the header is not trustworthy).
+    """
+    if not forwarded_for or trusted_proxies < 1:
+        return None
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    if len(hops) < trusted_proxies:
+        return None
+    return hops[-trusted_proxies]
+
+
+def dimension_limits(session_calls: int, destination_calls: int, ip_calls: int,
+                     trust_proxy_headers: bool) -> Dict[str, int]:
+    """
+    Per-dimension limits (0 disables a dimension). Without trusted proxy headers
+    every caller behind a proxy shares the proxy's address, so the per-IP limit
+    would be one cap for the whole service; it is only enforced when trusted.
+    """
+    return {
+        "session": session_calls,
+        "destination": destination_calls,
+        "ip": ip_calls if trust_proxy_headers else 0,
+    }
+
+
+def rate_limit_key(dimension: str, value: str) -> str:
+    """
+    Store key for one limiting dimension (e.g. 'session', 'destination', 'ip').
+    Values are hashed so raw phone numbers and IPs never land in the store.
+    """
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=12).hexdigest()
+    return f"{dimension}:{digest}"
+
+
+def _apply_checks(tats: Sequence[Optional[float]], checks: Sequence[RateCheck],
+                  now: float, consume: bool):
+    """
+    Evaluate several GCRA checks as one all-or-nothing unit.
+    Returns: (results, new_tats) - new_tats is None when nothing should be written
+    """
+    if consume:
+        updates = [
+            gcra_update(tat, now, limit, window)
+            for tat, (_, limit, window) in zip(tats, checks)
+        ]
+        all_allowed = all(ok for ok, _ in updates)
+        new_tats = [tat for _, tat in updates] if all_allowed else None
+        verdicts = [ok for ok, _ in updates]
+    else:
+        new_tats = None
+        verdicts = None
+
+    results = []
+    for i, (tat, (_, limit, window)) in enumerate(zip(tats, checks)):
+        state = gcra_state(new_tats[i] if new_tats else tat, now, limit, window)
+        state["allowed"] = verdicts[i] if verdicts is not None else state["remaining"] > 0
+        results.append(state)
+    return results, new_tats
+
+
+def check_dimensions(store, identities: Dict[str, Optional[str]], limits: Dict[str, int],
+                     window_seconds: float, now: Optional[float] = None,
+                     consume: bool = True) -> Dict:
+    """
+    Apply independent limits per dimension (session, destination, ip, ...) in one pass.
+
+    identities maps dimension -> raw value (None skips the dimension); limits maps
+    dimension -> calls per window (<= 0 disables it). The call is recorded only if
+    every dimension allows it. The returned quota is the tightest one: the first
+    blocking dimension, otherwise the one with the fewest calls remaining.
+    Returns: {'allowed', 'remaining', 'reset_time', 'current_count', 'limit',
+              'limited_by', 'dimensions': {dimension: state}}
+    """
+    dimensions = [
+        dim for dim, value in identities.items()
+        if value is not None and limits.get(dim, 0) > 0
+    ]
+    if not dimensions:
+        return {"allowed": True, "remaining": None, "reset_time": now or time.time(),
+                "current_count": 0, "limit": None, "limited_by": None, "dimensions": {}}
+
+    checks = [
+        (rate_limit_key(dim, str(identities[dim])), limits[dim], window_seconds)
+        for dim in dimensions
+    ]
+    results = store.check_many(checks, now, consume)
+
+    tightest = min(
+        range(len(dimensions)),
+        key=lambda i: (results[i]["allowed"], results[i]["remaining"], -results[i]["reset_time"]),
+    )
+    chosen = results[tightest]
+    return {
+        "allowed": all(r["allowed"] for r in results),
+        "remaining": chosen["remaining"],
+        "reset_time": chosen["reset_time"],
+        "current_count": chosen["current_count"],
+        "limit": limits[dimensions[tightest]],
+        "limited_by": dimensions[tightest],
+        "dimensions": dict(zip(dimensions, results)),
+    }
+
+
+class MemoryRateLimitStore:
+    """
+    In-process GCRA store: one float (TAT) per key.
+
+    Keys are also tracked in a min-heap ordered by expiry so eviction only
+    touches keys that are actually due. The heap holds exactly one entry per
+    key; when a popped entry is stale (the key was used again since it was
+    pushed) it is re-pushed with the current TAT instead of being deleted.
+    Checks run on threadpool threads, so reads and updates hold a lock.
+    """
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def check(self, key: str, limit: int, window_seconds: float,
+              now: Optional[float] = None, consume: bool = True) -> Dict:
+        """
+        Check (and by default consume) one call for key.
+        Returns: {'allowed': bool, 'remaining': int, 'reset_time': float, 'current_count': int}
+        """
+        return self.check_many([(key, limit, window_seconds)], now, consume)[0]
+
+    def check_many(self, checks: Sequence[RateCheck], now: Optional[float] = None,
+                   consume: bool = True) -> List[Dict]:
+        """
+        Check several (key, limit, window) limits in one pass, one dict lookup each.
+        A call is only recorded when every check allows it, so a rejection in
+        one dimension never burns quota in the others.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            tats = [self._tats.get(key) for key, _, _ in checks]
+            results, new_tats = _apply_checks(tats, checks, now, consume)
+            if new_tats:
+                for (key, _, _), tat in zip(checks, new_tats):
+                    if key not in self._tats:
+                        heapq.heappush(self._expiry_heap, (tat, key))
+                    self._tats[key] = tat
+        return results
+
+    def evict_expired(self, now: Optional[float] = None, budget: Optional[int] = None) -> int:
+        """
+        Drop keys whose TAT is in the past (fully drained), earliest first.
+        At most `budget` heap entries are examined (None = all that are due),
+        so each call costs O(budget * log n). Returns keys removed.
+        """
+        now = time.time() if now is None else now
+        heap = self._expiry_heap
+        removed = 0
+        examined = 0
+        with self._lock:
+            while heap and heap[0][0] <= now and (budget is None or examined < budget):
+                _, key = heapq.heappop(heap)
+                examined += 1
+                tat = self._tats.get(key)
+                if tat is None:
+                    continue
+                if tat <= now:
+                    del self._tats[key]
+                    removed += 1
+                else:
+                    # Key was used again after this entry was pushed; reschedule it
+                    heapq.heappush(heap, (tat, key))
+        return removed
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        """Drop every key that is due. Returns keys removed."""
+        return self.evict_expired(now)
+
+    def clear(self):
+        with self._lock:
+            self._tats.clear()
+            self._expiry_heap.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tats
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SQLiteRateLimitStore:
+    """
+    Host-wide GCRA store backed by a WAL-mode SQLite file.
+
+    Every worker process opening the same path sees the same counters, so
+    N workers no longer hand out N x the configured limit. Each check is a
+    single BEGIN IMMEDIATE transaction (read TAT, GCRA update, upsert), which
+    SQLite serializes across processes.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_tat ON rate_limits (tat)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+    def check(self, key: str, limit: int, window_seconds: float,
+              now: Optional[float] = None, consume: bool = True) -> Dict:
+        """
+        Check (and by default consume) one call for key.
+        Returns: {'allowed': bool, 'remaining': int, 'reset_time': float, 'current_count': int}
+        """
+        return self.check_many([(key, limit, window_seconds)], now, consume)[0]
+
+    def check_many(self, checks: Sequence[RateCheck], now: Optional[float] = None,
+                   consume: bool = True) -> List[Dict]:
+        """
+        Check several (key, limit, window) limits in one transaction.
+        A call is only recorded when every check allows it.
+        """
+        now = time.time() if now is None else now
+        conn = self._connection()
+        if not consume:
+            return _apply_checks(self._select_tats(conn, checks), checks, now, consume)[0]
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            results, new_tats = _apply_checks(self._select_tats(conn, checks), checks, now, consume)
+            if new_tats:
+                conn.executemany(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    [(key, tat) for (key, _, _), tat in zip(checks, new_tats)],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    @staticmethod
+    def _select_tats(conn: sqlite3.Connection, checks: Sequence[RateCheck]) -> List[Optional[float]]:
+        tats = []
+        for key, _, _ in checks:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tats.append(row[0] if row else None)
+        return tats
+
+    def evict_expired(self, now: Optional[float] = None, budget: Optional[int] = None) -> int:
+        """Delete up to `budget` drained keys (None = all), earliest first. Returns keys removed."""
+        now = time.time() if now is None else now
+        cursor = self._connection().execute(
+            "DELETE FROM rate_limits WHERE key IN "
+            "(SELECT key FROM rate_limits WHERE tat <= ? ORDER BY tat LIMIT ?)",
+            (now, -1 if budget is None else budget),
+        )
+        return cursor.rowcount
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        """Drop every key that is due. Returns keys removed."""
+        return self.evict_expired(now)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM rate_limits")
+
+    def __contains__(self, key: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+def create_rate_limit_store(backend: str = "memory", path: Optional[str] = None):
+    """Build the rate limit store for a backend name ('memory' or 'sqlite')"""
+    if backend == "memory":
+        return MemoryRateLimitStore()
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("SQLite rate limit backend requires a database path")
+        return SQLiteRateLimitStore(path)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
@@ -3,94 +3,160 @@ Rate limiting functionality for API endpoints.
 """
 
 import os
+import re
 import time
-from collections import defaultdict, deque
+import asyncio
+import tempfile
 from datetime import datetime
-from fastapi import HTTPException, Depends
-from typing import Dict
+from fastapi import HTTPException, Depends, Request
+from typing import Dict, Optional
+
+from auth import get_current_user
+from rate_limit_store import create_rate_limit_store, check_dimensions, dimension_limits, forwarded_client_ip
+from server_metrics import RATE_LIMIT_REJECTIONS_TOTAL
 
 # Rate Limiting Configuration
 RATE_LIMIT_CALLS = int(os.getenv("RATE_LIMIT_CALLS", "5"))  # Max calls per window
 RATE_LIMIT_WINDOW_MINUTES = int(os.getenv("RATE_LIMIT_WINDOW_MINUTES", "5"))  # Window in minutes
 RATE_LIMIT_WINDOW_SECONDS = RATE_LIMIT_WINDOW_MINUTES * 60
+# Independent per-dimension limits over the same window (0 disables a dimension)
+RATE_LIMIT_DESTINATION_CALLS = int(os.getenv("RATE_LIMIT_DESTINATION_CALLS", "3"))  # Per destination number
+RATE_LIMIT_IP_CALLS = int(os.getenv("RATE_LIMIT_IP_CALLS", "20"))  # Per client IP (needs TRUST_PROXY_HEADERS)
+# Only enable behind a proxy that sets X-Forwarded-For; otherwise callers can spoof their IP.
+# The client is taken TRUSTED_PROXY_COUNT hops from the right of the chain.
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() == "true"
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
+RATE_LIMIT_DIMENSIONS = dimension_limits(
+    RATE_LIMIT_CALLS, RATE_LIMIT_DESTINATION_CALLS, RATE_LIMIT_IP_CALLS, TRUST_PROXY_HEADERS
+)
+# Expired keys evicted inline per request (bounded so request cost stays O(log n))
+RATE_LIMIT_EVICT_BUDGET = int(os.getenv("RATE_LIMIT_EVICT_BUDGET", "8"))
+# Background sweeper: keys examined per tick and seconds between ticks
+RATE_LIMIT_SWEEP_BUDGET = int(os.getenv("RATE_LIMIT_SWEEP_BUDGET", "500"))
+RATE_LIMIT_SWEEP_INTERVAL_SECONDS = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL_SECONDS", "5"))
+
+# Storage backend: "memory" (per process) or "sqlite" (shared by all workers on the host)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    "RATE_LIMIT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "time-traveler-rate-limits.db")
+)
 
-# Rate limiting store - tracks call timestamps per token
-RATE_LIMIT_STORE = defaultdict(lambda: deque())
+# Rate limiting store - one GCRA theoretical arrival time (float) per token
+RATE_LIMIT_STORE = create_rate_limit_store(RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH)
 
 DEBUG_LOGS = os.getenv("DEBUG_LOGS", "false").lower() == "true"
 
 
-def cleanup_rate_limit_store():
-    """Clean up old entries from rate limit store to prevent memory growth"""
-    current_time = time.time()
-    cutoff_time = current_time - RATE_LIMIT_WINDOW_SECONDS
-    
-    # Clean up old entries for all tokens
-    for token in list(RATE_LIMIT_STORE.keys()):
-        timestamps = RATE_LIMIT_STORE[token]
-        # Remove timestamps older than the window
-        while timestamps and timestamps[0] < cutoff_time:
-            timestamps.popleft()
-        
-        # If no timestamps left, remove the token entry
-        if not timestamps:
-            del RATE_LIMIT_STORE[token]
+def cleanup_rate_limit_store(budget: int = None) -> int:
+    """
+    Evict drained entries from rate limit store to prevent memory growth.
+    Only keys that are actually due are touched; `budget` caps the work done.
+    """
+    removed = RATE_LIMIT_STORE.evict_expired(time.time(), budget)
     
-    if DEBUG_LOGS:
-        print(f"🧹 Rate limit cleanup completed. Active tokens: {len(RATE_LIMIT_STORE)}")
+    if DEBUG_LOGS and removed:
+        print(f"🧹 Rate limit cleanup removed {removed}. Active tokens: {len(RATE_LIMIT_STORE)}")
+    return removed
+
+
+async def rate_limit_sweeper():
+    """Background task: evict expired keys at a fixed budget per tick"""
+    while True:
+        await asyncio.sleep(RATE_LIMIT_SWEEP_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(cleanup_rate_limit_store, RATE_LIMIT_SWEEP_BUDGET)
+        except Exception as e:
+            print(f"⚠️  Rate limit sweeper error: {e}")
+
+
+def get_client_ip(request: Optional[Request]) -> Optional[str]:
+    """Resolve the caller's IP, honoring X-Forwarded-For when behind a trusted proxy"""
+    if request is None:
+        return None
+    if TRUST_PROXY_HEADERS:
+        client_ip = forwarded_client_ip(request.headers.get("x-forwarded-for"), TRUSTED_PROXY_COUNT)
+        if client_ip:
+            return client_ip
+    return request.client.host if request.client else None
+
+
+def normalize_destination(phone: Optional[str]) -> Optional[str]:
+    """Reduce a destination number to its digits so formatting variants share a bucket"""
+    if not phone:
+        return None
+    cleaned = re.sub(r'\D', '', str(phone))
+    return cleaned or None
+
+
+def check_rate_limits(session_id: Optional[str], destination: Optional[str] = None,
+                      client_ip: Optional[str] = None, consume: bool = True) -> Dict:
+    """
+    Check session, destination-number and client-IP limits in one pass
+    Returns the tightest quota: {'allowed', 'remaining', 'reset_time', 'current_count',
+                                 'limit', 'window_minutes', 'limited_by', 'dimensions'}
+    """
+    rate_info = check_dimensions(
+        RATE_LIMIT_STORE,
+        {
+            "session": session_id,
+            "destination": normalize_destination(destination),
+            "ip": client_ip,
+        },
+        RATE_LIMIT_DIMENSIONS,
+        RATE_LIMIT_WINDOW_SECONDS,
+        consume=consume,
+    )
+    if rate_info['limit'] is None:
+        rate_info.update({'remaining': RATE_LIMIT_CALLS, 'limit': RATE_LIMIT_CALLS})
+    rate_info['window_minutes'] = RATE_LIMIT_WINDOW_MINUTES
+    return rate_info
 
 
 def check_rate_limit(token: str) -> Dict:
     """
-    Check if token is within rate limits
+    Check if token is within its session rate limit and record the call if allowed
     Returns: {'allowed': bool, 'remaining': int, 'reset_time': float}
     """
-    current_time = time.time()
-    cutoff_time = current_time - RATE_LIMIT_WINDOW_SECONDS
-    
-    # Get or create timestamps for this token
-    timestamps = RATE_LIMIT_STORE[token]
-    
-    # Remove old timestamps outside the window
-    while timestamps and timestamps[0] < cutoff_time:
-        timestamps.popleft()
-    
-    # Check if we're within the limit
-    call_count = len(timestamps)
-    allowed = call_count < RATE_LIMIT_CALLS
-    
-    if allowed:
-        # Add current timestamp
-        timestamps.append(current_time)
-        call_count += 1
-    
-    # Calculate reset time (when the oldest call in window will expire)
-    reset_time = timestamps[0] + RATE_LIMIT_WINDOW_SECONDS if timestamps else current_time
-    remaining = max(0, RATE_LIMIT_CALLS - call_count)
+    rate_info = check_rate_limits(token)
     
     return {
-        'allowed': allowed,
-        'remaining': remaining,
-        'reset_time': reset_time,
-        'current_count': call_count,
-        'limit': RATE_LIMIT_CALLS,
+        'allowed': rate_info['allowed'],
+        'remaining': rate_info['remaining'],
+        'reset_time': rate_info['reset_time'],
+        'current_count': rate_info['current_count'],
+        'limit': rate_info['limit'],
         'window_minutes': RATE_LIMIT_WINDOW_MINUTES
     }
 
 
-def rate_limit_dependency(current_user: Dict = Depends(lambda: {})):
-    """Dependency to check rate limits for authenticated users"""
-    # Use session_id as the rate limiting key (unique per token)
-    token_key = current_user.get("session_id", "unknown")
-    
-    # Clean up old entries periodically (every 10th call to avoid overhead)
-    if len(RATE_LIMIT_STORE) % 10 == 0:
-        cleanup_rate_limit_store()
-    
-    # Check rate limit
-    rate_info = check_rate_limit(token_key)
+async def rate_limit_dependency(request: Request, current_user: Dict = Depends(get_current_user)):
+    """
+    Dependency to check rate limits for authenticated users.
+    Limits apply per JWT session, per destination number (the JSON body's `to`)
+    and per client IP; the call is rejected if any of them is exhausted.
+    """
+    destination = None
+    try:
+        # FastAPI has already parsed the body, so this returns the cached JSON
+        body = await request.json()
+        if isinstance(body, dict):
+            destination = body.get("to")
+    except Exception:
+        pass
+    
+    client_ip = get_client_ip(request)
+
+    def check():
+        # Evict a bounded number of due entries (the background sweeper does the rest)
+        cleanup_rate_limit_store(RATE_LIMIT_EVICT_BUDGET)
+        # Check all rate limit dimensions at once
+        return check_rate_limits(current_user.get("session_id"), destination=destination, client_ip=client_ip)
+
+    # Off the event loop: the sqlite backend can wait up to its busy timeout under contention
+    rate_info = await asyncio.to_thread(check)
     
     if not rate_info['allowed']:
+        RATE_LIMIT_REJECTIONS_TOTAL.inc(limited_by=rate_info['limited_by'] or "unknown")
         reset_time_utc = datetime.fromtimestamp(rate_info['reset_time'])
         raise HTTPException(
             status_code=429,
@@ -100,46 +166,45 @@ def rate_limit_dependency(current_user: Dict = Depends(lambda: {})):
                 "message": f"Too many calls. Limit: {rate_info['limit']} calls per {rate_info['window_minutes']} minutes",
                 "remaining": rate_info['remaining'],
                 "reset_time": reset_time_utc.isoformat(),
-                "current_count": rate_info['current_count']
+                "current_count": rate_info['current_count'],
+                "limited_by": rate_info['limited_by']
             }
         )
     
     return current_user
 
 
-def get_rate_limit_status(token: str) -> Dict:
-    """Get current rate limit status for a token without incrementing"""
-    # Clean up old entries first
-    cleanup_rate_limit_store()
+def get_rate_limit_status(token: str, client_ip: Optional[str] = None,
+                          destination: Optional[str] = None) -> Dict:
+    """Get current (tightest) rate limit status for a token without incrementing"""
+    # Evict a bounded number of due entries first
+    cleanup_rate_limit_store(RATE_LIMIT_EVICT_BUDGET)
     
     # Get current rate limit info without incrementing
-    current_time = time.time()
-    cutoff_time = current_time - RATE_LIMIT_WINDOW_SECONDS
-    
-    timestamps = RATE_LIMIT_STORE[token]
-    # Remove old timestamps for accurate count
-    while timestamps and timestamps[0] < cutoff_time:
-        timestamps.popleft()
-    
-    call_count = len(timestamps)
-    remaining = max(0, RATE_LIMIT_CALLS - call_count)
-    reset_time = timestamps[0] + RATE_LIMIT_WINDOW_SECONDS if timestamps else current_time
+    rate_info = check_rate_limits(token, destination=destination, client_ip=client_ip, consume=False)
     
     return {
-        "limit": RATE_LIMIT_CALLS,
+        "limit": rate_info['limit'],
         "window_minutes": RATE_LIMIT_WINDOW_MINUTES,
-        "current_count": call_count,
-        "remaining": remaining,
-        "reset_time": datetime.fromtimestamp(reset_time).isoformat(),
-        "can_make_call": call_count < RATE_LIMIT_CALLS
+        "current_count": rate_info['current_count'],
+        "remaining": rate_info['remaining'],
+        "reset_time": datetime.fromtimestamp(rate_info['reset_time']).isoformat(),
+        "can_make_call": rate_info['allowed'],
+        "limited_by": rate_info['limited_by']
     }
 
 
 def get_rate_limit_config() -> Dict:
     """Get rate limiting configuration for debugging/monitoring"""
     return {
+        "algorithm": "gcra",
+        "backend": RATE_LIMIT_BACKEND,
         "calls_per_window": RATE_LIMIT_CALLS,
+        "dimension_limits": RATE_LIMIT_DIMENSIONS,
         "window_minutes": RATE_LIMIT_WINDOW_MINUTES,
         "window_seconds": RATE_LIMIT_WINDOW_SECONDS,
+        "evict_budget": RATE_LIMIT_EVICT_BUDGET,
+        "sweep_budget": RATE_LIMIT_SWEEP_BUDGET,
+        "sweep_interval_seconds": RATE_LIMIT_SWEEP_INTERVAL_SECONDS,
         "active_tokens": len(RATE_LIMIT_STORE)
     }
@@ -0,0 +1,443 @@
+"""
+Prometheus-style metrics for GET /metrics (text exposition format 0.0.4).
+
+Counters, gauges and fixed-bucket histograms are kept in process memory,
+behind one small lock per metric. Observing a value is a bisect plus an add,
+cheap enough for every outbound audio frame.
+
+With several workers (uvicorn --workers N), set METRICS_MULTIPROC_DIR to a
+directory shared by them. Each worker then writes an atomic JSON snapshot,
+`<pid>-<instance>.json`, every METRICS_SNAPSHOT_INTERVAL_SECONDS, and /metrics
+merges all the snapshots:
+- counters and histograms are summed over every file, including files of
+  exited workers, so totals never go backwards across restarts
+- gauges only come from live workers and are combined per the gauge's mode:
+  "sum" (e.g. active streams), "max" (e.g. loop lag) or "all" (one series per
+  pid)
+
+The instance suffix is random per process: a restarted container hands its
+workers the same pids again, and a new worker must not overwrite the file of
+the one it replaced. A worker counts as exited when its pid is gone or a newer
+file holds the same pid. After each snapshot, the writer folds exited workers'
+counters and histograms into `exited.json` and deletes their files, so the
+directory holds one file per live worker plus the archive (POSIX only; the
+fold is serialized with flock).
+
+Other workers' values can lag by up to one snapshot interval.
+"""
+
+import os
+import json
+import time
+import asyncio
+import bisect
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' snapshots are kept rather than folded
+    fcntl = None
+
+# Metrics Configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS", "5"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "time_traveler_"
+ARCHIVE_FILENAME = "exited.json"
+LOCK_FILENAME = ".fold.lock"
+
+# Seconds; call setup and first audio are typically 1-2s, frame gaps 20ms to several seconds
+LATENCY_BUCKETS = (0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 7.5, 10.0)
+FRAME_INTERVAL_BUCKETS = (0.01, 0.02, 0.04, 0.06, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+TWILIO_API_BUCKETS = (0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """Base: name, help text, label names and a lock around the per-label-set values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = METRIC_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 multiprocess_mode: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ("sum", "max", "all"):
+            raise ValueError(f"Unknown multiprocess_mode: {multiprocess_mode}")
+        self.multiprocess_mode = multiprocess_mode
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from `function` at collection time (unlabelled gauges only)"""
+        self._function = function
+
+    def get(self, **labels) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        if self._function is not None:
+            try:
+                return {(): float(self._function())}
+            except Exception:
+                return {}
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last = +Inf)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels) if self.labelnames else ()
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            return {key: list(series) for key, series in self._values.items()}
+
+
+def _merge_histograms(target: Dict[LabelValues, List[float]], source: Dict[LabelValues, List[float]]):
+    for key, series in source.items():
+        existing = target.get(key)
+        if existing is None:
+            target[key] = list(series)
+        else:
+            for index, value in enumerate(series):
+                existing[index] += value
+
+
+def _add_totals(metric: Metric, target: Dict[LabelValues, object], values: Dict[LabelValues, object]):
+    if isinstance(metric, Histogram):
+        _merge_histograms(target, values)
+    else:
+        for key, value in values.items():
+            target[key] = target.get(key, 0.0) + value
+
+
+def _write_json(path: str, data: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Holds every metric and renders (optionally multi-process merged) exposition text."""
+
+    def __init__(self, multiproc_dir: str = METRICS_MULTIPROC_DIR):
+        self.multiproc_dir = multiproc_dir or None
+        self._metrics: Dict[str, Metric] = {}
+        # The pid alone repeats after a container restart; the suffix keeps each process's file its own
+        self.instance_id = uuid.uuid4().hex[:12]
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              multiprocess_mode: str = "sum") -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, multiprocess_mode))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float],
+                  labelnames: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def snapshot(self) -> Dict:
+        """This process's values, JSON-serializable"""
+        return {
+            name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def _snapshot_filename(self, pid: int) -> str:
+        return f"{pid}-{self.instance_id}.json"
+
+    def write_snapshot(self, pid: Optional[int] = None):
+        """Atomically publish this process's values for the other workers"""
+        if not self.multiproc_dir:
+            return
+        pid = os.getpid() if pid is None else pid
+        _write_json(os.path.join(self.multiproc_dir, self._snapshot_filename(pid)),
+                    {"pid": pid, "written_at": time.time(), "metrics": self.snapshot()})
+
+    def _read_snapshots(self) -> Iterable[Tuple[str, Dict]]:
+        for filename in os.listdir(self.multiproc_dir):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, filename), encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data.get("metrics"), dict):
+                    continue
+                yield filename, data
+            except (OSError, ValueError, AttributeError):
+                continue  # Half-written by an older version or removed meanwhile
+
+    def _exited(self, snapshots: List[Tuple[str, Dict]]) -> Set[str]:
+        """Snapshot files whose worker is gone: its pid exited, or a newer file took the pid over"""
+        newest: Dict[int, Tuple[float, str]] = {}
+        for filename, data in snapshots:
+            pid = data.get("pid")
+            if pid is not None:
+                newest[pid] = max(newest.get(pid, (0.0, "")), (data.get("written_at", 0.0), filename))
+        own = self._snapshot_filename(os.getpid())
+        exited = set()
+        for filename, data in snapshots:
+            pid = data.get("pid")
+            if pid is None:
+                continue  # The archive
+            if pid == os.getpid():
+                gone = filename != own
+            else:
+                gone = newest[pid][1] != filename or not _pid_alive(pid)
+            if gone:
+                exited.add(filename)
+        return exited
+
+    def fold_exited(self) -> int:
+        """Fold exited workers' counters and histograms into the archive and delete their snapshots"""
+        if not self.multiproc_dir or fcntl is None:
+            return 0
+        with open(os.path.join(self.multiproc_dir, LOCK_FILENAME), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the file closes
+            archive: Dict = {"metrics": {}, "folded": []}
+            snapshots = []
+            for filename, data in self._read_snapshots():
+                if filename == ARCHIVE_FILENAME:
+                    archive = data
+                else:
+                    snapshots.append((filename, data))
+
+            # Already counted: a previous fold stopped between writing the archive and deleting them
+            already_folded = set(archive.get("folded", []))
+            for filename in already_folded:
+                self._remove_snapshot(filename)
+            snapshots = [(filename, data) for filename, data in snapshots if filename not in already_folded]
+
+            exited = self._exited(snapshots)
+            if not exited:
+                return 0
+            totals = {name: {tuple(key): value for key, value in series}
+                      for name, series in archive["metrics"].items()}
+            for filename, data in snapshots:
+                if filename not in exited:
+                    continue
+                for name, series in data["metrics"].items():
+                    metric = self._metrics.get(name)
+                    if isinstance(metric, (Counter, Histogram)):
+                        _add_totals(metric, totals.setdefault(name, {}),
+                                    {tuple(key): value for key, value in series})
+            _write_json(os.path.join(self.multiproc_dir, ARCHIVE_FILENAME), {
+                "pid": None,
+                "written_at": time.time(),
+                "metrics": {name: [[list(key), value] for key, value in series.items()]
+                            for name, series in totals.items()},
+                "folded": sorted(exited),
+            })
+            for filename in exited:
+                self._remove_snapshot(filename)
+            return len(exited)
+
+    def _remove_snapshot(self, filename: str):
+        try:
+            os.remove(os.path.join(self.multiproc_dir, filename))
+        except FileNotFoundError:
+            pass
+
+    def collect(self) -> Dict[str, Dict[LabelValues, object]]:
+        """Values per metric: this process only, or merged across workers"""
+        if not self.multiproc_dir:
+            return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+        self.write_snapshot()
+        snapshots = list(self._read_snapshots())
+        exited = self._exited(snapshots)
+        merged: Dict[str, Dict[LabelValues, object]] = {name: {} for name in self._metrics}
+        for filename, data in snapshots:
+            pid = data.get("pid")
+            alive = pid is not None and filename not in exited
+            for name, series in data["metrics"].items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                values = {tuple(key): value for key, value in series}
+                target = merged[name]
+                if isinstance(metric, (Counter, Histogram)):
+                    _add_totals(metric, target, values)
+                elif alive:
+                    for key, value in values.items():
+                        if metric.multiprocess_mode == "all":
+                            target[key + (str(pid),)] = value
+                        elif metric.multiprocess_mode == "max":
+                            target[key] = max(target.get(key, value), value)
+                        else:
+                            target[key] = target.get(key, 0.0) + value
+        return merged
+
+    def render(self) -> str:
+        """Text exposition of every metric"""
+        values = self.collect()
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            labelnames = metric.labelnames
+            if isinstance(metric, Gauge) and metric.multiprocess_mode == "all" and self.multiproc_dir:
+                labelnames = labelnames + ("pid",)
+            for key, value in sorted(values[name].items()):
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    for bound, count in zip(metric.buckets + (float("inf"),), value[:-1]):
+                        cumulative += count
+                        labels = _format_labels(labelnames + ("le",), key + (_format_value(bound),))
+                        lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+                    labels = _format_labels(labelnames, key)
+                    lines.append(f"{name}_sum{labels} {_format_value(value[-1])}")
+                    lines.append(f"{name}_count{labels} {_format_value(cumulative)}")
+                else:
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Histograms (seconds)
+CALL_SETUP_SECONDS = REGISTRY.histogram(
+    "call_setup_seconds", "WebSocket accept to first agent response", LATENCY_BUCKETS)
+FIRST_AUDIO_SECONDS = REGISTRY.histogram(
+    "call_first_audio_seconds", "WebSocket accept to first agent audio sent to Twilio", LATENCY_BUCKETS)
+OUTBOUND_FRAME_INTERVAL_SECONDS = REGISTRY.histogram(
+    "outbound_frame_interval_seconds", "Gap between consecutive agent audio chunks", FRAME_INTERVAL_BUCKETS)
+TWILIO_CREATE_SECONDS = REGISTRY.histogram(
+    "twilio_create_call_seconds", "Twilio calls.create latency including CPS pacing", TWILIO_API_BUCKETS)
+
+# Counters
+CALLS_TOTAL = REGISTRY.counter(
+    "calls_total", "Outbound call requests and queued dispatches by outcome", ("outcome",))
+RATE_LIMIT_REJECTIONS_TOTAL = REGISTRY.counter(
+    "rate_limit_rejections_total", "Calls rejected by the rate limiter", ("limited_by",))
+LOAD_SHED_REJECTIONS_TOTAL = REGISTRY.counter(
+    "load_shed_rejections_total", "Requests refused by a load-shed gate", ("gate",))
+CONVERSATION_FALLBACKS_TOTAL = REGISTRY.counter(
+    "conversation_fallbacks_total", "Calls that fell back to a simpler setup", ("fallback",))
+
+# Gauges
+ACTIVE_STREAMS = REGISTRY.gauge(
+    "active_media_streams", "Open Twilio media stream WebSockets", multiprocess_mode="sum")
+QUEUED_CALLS = REGISTRY.gauge(
+    "queued_calls", "Calls waiting for a free call slot", multiprocess_mode="sum")
+LOOP_LAG_SECONDS = REGISTRY.gauge(
+    "event_loop_lag_seconds", "Smoothed event loop lag", multiprocess_mode="max")
+
+
+async def metrics_snapshot_writer(registry: MetricsRegistry = REGISTRY,
+                                  interval_seconds: float = METRICS_SNAPSHOT_INTERVAL_SECONDS):
+    """Background task: publish this worker's metrics for the others (multi-process mode)"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(registry.write_snapshot)
+            await asyncio.to_thread(registry.fold_exited)
+        except Exception as e:
+            print(f"⚠️  Metrics snapshot error: {e}")
@@ -6,10 +6,45 @@ Handles randomization and selection of ElevenLabs agent IDs based on era and per
 import json
 import os
 import random
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
 
+def resolve_agent_id(agent_config: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Read and sanitize an agent's ID from its environment variable.
+    Returns: (agent_id, problem) - agent_id is None when the agent is unusable;
+    problem describes why, or a non-fatal oddity when agent_id is set.
+    """
+    env_var = agent_config.get("env_var")
+    if not env_var:
+        return None, f"No env_var specified for agent: {agent_config.get('name')}"
+    
+    agent_id = os.getenv(env_var)
+    if not agent_id or not agent_id.strip():
+        return None, f"Environment variable {env_var} not set"
+    
+    # Sanitize common misconfiguration patterns:
+    # - Value accidentally includes the key (e.g., "ELEVENLABS_AGENT_ID_4=agent_...")
+    # - Trailing whitespace/newlines from env files or CI
+    cleaned_agent_id = agent_id.strip()
+    if "=" in cleaned_agent_id:
+        # If someone exported like: export ELEVENLABS_AGENT_ID_4="ELEVENLABS_AGENT_ID_4=agent_abc"
+        # take the substring after the last '='
+        cleaned_agent_id = cleaned_agent_id.split("=")[-1].strip()
+        if not cleaned_agent_id:
+            return None, f"{env_var} has no value after '='"
+        print(f"Detected '=' in {env_var} value; using substring after '=': {cleaned_agent_id[:8]}...")
+    
+    # Basic validation: ElevenLabs agent IDs typically start with 'agent_'
+    if not cleaned_agent_id.startswith("agent_"):
+        return cleaned_agent_id, (
+            f"{env_var} value looks unusual (doesn't start with 'agent_'). Using as-is: {cleaned_agent_id[:12]}..."
+        )
+    
+    return cleaned_agent_id, None
+
+
 class AgentManager:
     """Manages agent selection and randomization for the Time Traveler agent."""
     
@@ -17,6 +52,8 @@ class AgentManager:
         """Initialize AgentManager with agent configuration."""
         self.agents_file = agents_file or self._get_default_agents_file()
         self.agents_data = self._load_agents()
+        # Resolved once here so call setup never touches os.environ or re-validates
+        self.available_agents, self.misconfigured_agents = self._resolve_agents()
     
     def _get_default_agents_file(self) -> str:
         """Get the default path to agents.json."""
@@ -37,59 +74,46 @@ class AgentManager:
             print(f"⚠️ Warning: Invalid JSON in agent file: {e}")
             return []
     
+    def _resolve_agents(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Split agents into selectable ones (with cached `agent_id`) and misconfigured ones."""
+        available, misconfigured = [], []
+        for agent in self.agents_data:
+            agent_id, problem = resolve_agent_id(agent)
+            if agent_id is None:
+                print(f"⚠️ Warning: Excluding agent '{agent.get('name')}': {problem}")
+                misconfigured.append({"name": agent.get("name", "unknown"), "reason": problem})
+                continue
+            if problem:
+                print(f"⚠️ Warning: {problem}")
+            available.append({**agent, "agent_id": agent_id})
+        return available, misconfigured
+    
     def get_agent_statistics(self) -> Dict[str, Any]:
         """Get statistics about available agents."""
         stats = {
             "total_agents": len(self.agents_data),
-            "agent_names": [agent.get("name", "unknown") for agent in self.agents_data]
+            "agent_names": [agent.get("name", "unknown") for agent in self.agents_data],
+            "available_agents": len(self.available_agents),
+            "misconfigured_agents": self.misconfigured_agents,
         }
         
         return stats
     
     def get_random_agent(self) -> Optional[Dict[str, Any]]:
-        """Get a random agent from all available agents."""
-        if not self.agents_data:
+        """Get a random agent (with its resolved `agent_id`) from the correctly configured agents."""
+        if not self.available_agents:
             print("⚠️ Warning: No agents available")
             return None
         
-        return random.choice(self.agents_data)
+        return random.choice(self.available_agents)
     
     # Removed era_appropriate_agent - we now use simple randomization
     
     def get_agent_id(self, agent_config: Dict[str, Any]) -> Optional[str]:
-        """Get the actual ElevenLabs agent ID from environment variables."""
-        env_var = agent_config.get("env_var")
-        if not env_var:
-            print(f"⚠️ Warning: No env_var specified for agent: {agent_config.get('name')}")
-            return None
-        
-        agent_id = os.getenv(env_var)
-        if not agent_id:
-            print(f"⚠️ Warning: Environment variable {env_var} not set")
-            # Fallback to base agent ID
-            fallback_id = os.getenv("ELEVENLABS_AGENT_ID_1")
-            if fallback_id:
-                print(f"🔄 Using fallback agent ID from ELEVENLABS_AGENT_ID_1")
-            return fallback_id
-        
-        # Sanitize common misconfiguration patterns:
-        # - Value accidentally includes the key (e.g., "ELEVENLABS_AGENT_ID_4=agent_...")
-        # - Trailing whitespace/newlines from env files or CI
-        cleaned_agent_id = agent_id.strip()
-        if "=" in cleaned_agent_id:
-            # If someone exported like: export ELEVENLABS_AGENT_ID_4="ELEVENLABS_AGENT_ID_4=agent_abc"
-            # take the substring after the last '='
-            possible_id = cleaned_agent_id.split("=")[-1].strip()
-            print(
-                f"Detected '=' in {env_var} value; using substring after '=': {possible_id[:8]}..."
-            )
-            cleaned_agent_id = possible_id
-        
-        # Basic validation: ElevenLabs agent IDs typically start with 'agent_'
-        if not cleaned_agent_id.startswith("agent_"):
-            print(
-                f"{env_var} value looks unusual (doesn't start with 'agent_'). Using as-is: {cleaned_agent_id[:12]}..."
-            )
-        
-        return cleaned_agent_id
-    
+        """Get the ElevenLabs agent ID for an agent (resolved once at load for agents from the file)."""
+        if "agent_id" in agent_config:
+            return agent_config["agent_id"]
+        agent_id, problem = resolve_agent_id(agent_config)
+        if problem:
+            print(f"⚠️ Warning: {problem}")
+        return agent_id
@@ -1,8 +1,12 @@
 import json
 import random
 import os
+import logging
 from typing import Dict, List, Optional
 
+# Per-call messages go through the server's queued log pipeline (structured_logging.py)
+logger = logging.getLogger("time_traveler.first_messages")
+
 
 class FirstMessageManager:
     def __init__(self, first_messages_file: str = None):
@@ -59,21 +63,21 @@ class FirstMessageManager:
             A random first message string, or None if not found
         """
         if era_name not in self.first_messages:
-            print(f"Warning: Era '{era_name}' not found in first messages")
+            logger.warning("Era '%s' not found in first messages", era_name)
             return None
         
         era_messages = self.first_messages[era_name]
         if language not in era_messages:
-            print(f"Warning: Language '{language}' not found for era '{era_name}'")
+            logger.warning("Language '%s' not found for era '%s'", language, era_name)
             return None
         
         messages = era_messages[language]
         if not messages:
-            print(f"Warning: No messages found for era '{era_name}', language '{language}'")
+            logger.warning("No messages found for era '%s', language '%s'", era_name, language)
             return None
         
         selected_message = random.choice(messages)
-        print(f"💬 Selected first message: '{selected_message[:50]}...' for {era_name} ({language})")
+        logger.debug("💬 Selected first message: '%s...' for %s (%s)", selected_message[:50], era_name, language)
         return selected_message
     
     def get_all_messages_for_era(self, era_name: str) -> Dict[str, List[str]]:
@@ -0,0 +1,168 @@
+"""
+Per-voice TTS latency tracking for Time Traveler Agent.
+
+Each call measures how long the agent takes to produce its first audio after
+the ElevenLabs session starts. The first utterance is the pre-selected first
+message (no LLM turn), so this delay is dominated by TTS for the chosen voice.
+Measurements are folded into an exponentially decayed average per voice and
+turned into a selection weight factor: voices consistently slower than their
+language's median are picked less often; fast or unmeasured voices keep full weight.
+Recording is in-memory only; voice_latency_saver persists changed estimates in
+the background so the media path never waits on disk.
+"""
+
+import json
+import asyncio
+import os
+import time
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Any
+
+# Tracking Configuration
+VOICE_LATENCY_ALPHA = float(os.getenv("VOICE_LATENCY_ALPHA", "0.2"))  # Weight of the newest sample
+VOICE_LATENCY_MIN_SAMPLES = int(os.getenv("VOICE_LATENCY_MIN_SAMPLES", "3"))  # Before a voice is re-weighted
+VOICE_LATENCY_MIN_FACTOR = float(os.getenv("VOICE_LATENCY_MIN_FACTOR", "0.2"))  # Slowest voices keep this share
+VOICE_LATENCY_EXPONENT = float(os.getenv("VOICE_LATENCY_EXPONENT", "2"))  # How sharply slowness is penalized
+VOICE_LATENCY_FILE = os.getenv("VOICE_LATENCY_FILE", "")  # Optional JSON persistence
+VOICE_LATENCY_SAVE_INTERVAL_SECONDS = float(os.getenv("VOICE_LATENCY_SAVE_INTERVAL_SECONDS", "60"))
+
+
+class VoiceLatency:
+    """Decayed latency estimate for one voice."""
+
+    __slots__ = ("ema_ms", "last_ms", "samples", "updated_at")
+
+    def __init__(self, ema_ms: float, last_ms: float, samples: int, updated_at: float):
+        self.ema_ms = ema_ms
+        self.last_ms = last_ms
+        self.samples = samples
+        self.updated_at = updated_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ema_ms": round(self.ema_ms, 1),
+            "last_ms": round(self.last_ms, 1),
+            "samples": self.samples,
+            "updated_at": self.updated_at,
+        }
+
+
+class VoiceLatencyTracker:
+    """Tracks per-voice latency and derives latency-based selection weight factors."""
+
+    def __init__(self, persist_file: Optional[str] = VOICE_LATENCY_FILE,
+                 alpha: float = VOICE_LATENCY_ALPHA,
+                 min_samples: int = VOICE_LATENCY_MIN_SAMPLES,
+                 min_factor: float = VOICE_LATENCY_MIN_FACTOR,
+                 exponent: float = VOICE_LATENCY_EXPONENT,
+                 save_interval_seconds: float = VOICE_LATENCY_SAVE_INTERVAL_SECONDS):
+        self.persist_file = persist_file or None
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.min_factor = min_factor
+        self.exponent = exponent
+        self.save_interval_seconds = save_interval_seconds
+        self._voices: Dict[str, VoiceLatency] = {}
+        self.dirty = False
+        # Bumped on every sample so VoiceManager knows when to re-weight its pools
+        self.version = 0
+        if self.persist_file:
+            self._load()
+
+    def record(self, voice_id: str, latency_ms: float, now: Optional[float] = None):
+        """Fold one latency measurement into the voice's decayed average"""
+        if not voice_id or latency_ms is None or latency_ms < 0:
+            return
+        now = time.time() if now is None else now
+        entry = self._voices.get(voice_id)
+        if entry is None:
+            self._voices[voice_id] = VoiceLatency(latency_ms, latency_ms, 1, now)
+        else:
+            entry.ema_ms += self.alpha * (latency_ms - entry.ema_ms)
+            entry.last_ms = latency_ms
+            entry.samples += 1
+            entry.updated_at = now
+        self.version += 1
+        self.dirty = True
+
+    def get(self, voice_id: str) -> Optional[VoiceLatency]:
+        return self._voices.get(voice_id)
+
+    def weight_factors(self, voice_ids: Iterable[str]) -> Dict[str, float]:
+        """
+        Selection weight factor per voice within one pool: (median / ema) ** exponent,
+        capped at 1 and floored at min_factor. Voices with too few samples get 1.
+        """
+        voice_ids = list(voice_ids)
+        measured = {
+            voice_id: self._voices[voice_id].ema_ms
+            for voice_id in voice_ids
+            if voice_id in self._voices and self._voices[voice_id].samples >= self.min_samples
+        }
+        factors = {voice_id: 1.0 for voice_id in voice_ids}
+        if len(measured) < 2:
+            return factors
+        pool_median = median(measured.values())
+        for voice_id, ema_ms in measured.items():
+            if ema_ms > pool_median > 0:
+                factors[voice_id] = max(self.min_factor, (pool_median / ema_ms) ** self.exponent)
+        return factors
+
+    def rank(self, voice_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Measured voices ordered fastest first"""
+        ids = self._voices.keys() if voice_ids is None else [v for v in voice_ids if v in self._voices]
+        return sorted(
+            ({"voice_id": voice_id, **self._voices[voice_id].to_dict()} for voice_id in ids),
+            key=lambda entry: entry["ema_ms"],
+        )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of the estimates for writing, taken on the thread that records them"""
+        self.dirty = False
+        return {voice_id: entry.to_dict() for voice_id, entry in self._voices.items()}
+
+    def save(self):
+        """Persist estimates atomically (no-op without a persist file)"""
+        if self.persist_file:
+            self.write(self.snapshot())
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        """Write a snapshot to the persist file (safe to run in a worker thread)"""
+        tmp_path = f"{self.persist_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.persist_file)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not save voice latency file: {e}")
+
+    def _load(self):
+        try:
+            with open(self.persist_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Warning: Could not load voice latency file: {e}")
+            return
+        for voice_id, entry in data.items():
+            try:
+                self._voices[voice_id] = VoiceLatency(
+                    float(entry["ema_ms"]), float(entry.get("last_ms", entry["ema_ms"])),
+                    int(entry["samples"]), float(entry.get("updated_at", 0)),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        self.version += 1
+
+
+async def voice_latency_saver(tracker: VoiceLatencyTracker):
+    """Background task: persist changed estimates every save_interval_seconds"""
+    while True:
+        await asyncio.sleep(tracker.save_interval_seconds)
+        if not tracker.persist_file or not tracker.dirty:
+            continue
+        try:
+            await asyncio.to_thread(tracker.write, tracker.snapshot())
+        except Exception as e:
+            print(f"⚠️  Voice latency saver error: {e}")
@@ -6,17 +6,55 @@ Handles randomization and selection of ElevenLabs voice IDs based on language an
 import json
 import os
 import random
-from typing import Dict, List, Optional, Any
+import bisect
+import logging
+from itertools import accumulate
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+from voice_latency import VoiceLatencyTracker
+
+# Per-call messages go through the server's queued log pipeline (structured_logging.py)
+logger = logging.getLogger("time_traveler.voices")
+
+# Language codes/names accepted by callers -> key in voices.json (unknown -> english)
+LANGUAGE_KEYS = {"es": "spanish", "spanish": "spanish", "en": "english", "english": "english"}
+# Seconds between background rebuilds of pool weights from new latency samples
+VOICE_LATENCY_REWEIGHT_SECONDS = float(os.getenv("VOICE_LATENCY_REWEIGHT_SECONDS", "30"))
+
+
+class VoicePool:
+    """Voices matching one filter, with cumulative weights for O(log n) weighted picks."""
+
+    __slots__ = ("voices", "cumulative", "total")
+
+    def __init__(self, voices: List[Dict[str, Any]], factors: Optional[Dict[str, float]] = None):
+        factors = factors or {}
+        self.voices = voices
+        self.cumulative = list(accumulate(
+            max(0.0, float(v.get("weight", 1.0))) * factors.get(v.get("id"), 1.0) for v in voices
+        ))
+        self.total = self.cumulative[-1] if self.cumulative else 0.0
+
+    def pick(self, rng: random.Random = random) -> Optional[Dict[str, Any]]:
+        if not self.voices:
+            return None
+        if self.total <= 0:
+            return rng.choice(self.voices)
+        index = bisect.bisect_right(self.cumulative, rng.random() * self.total)
+        return self.voices[min(index, len(self.voices) - 1)]
+
 
 class VoiceManager:
     """Manages voice selection and randomization for the Time Traveler agent."""
     
-    def __init__(self, voices_file: Optional[str] = None):
+    def __init__(self, voices_file: Optional[str] = None,
+                 latency_tracker: Optional[VoiceLatencyTracker] = None):
         """Initialize VoiceManager with voice configuration."""
         self.voices_file = voices_file or self._get_default_voices_file()
         self.voices_data = self._load_voices()
+        self.latency_tracker = latency_tracker
+        self._reindex()
     
     def _get_default_voices_file(self) -> str:
         """Get the default path to voices.json."""
@@ -36,6 +74,88 @@ class VoiceManager:
             print(f"⚠️ Warning: Invalid JSON in voice file: {e}")
             return {"spanish": [], "english": []}
     
+    def _latency_factors(self) -> Dict[str, float]:
+        """Latency weight factor per voice id, each voice compared within its language pool"""
+        if not self.latency_tracker:
+            return {}
+        factors = {}
+        for voices in self.voices_data.values():
+            factors.update(self.latency_tracker.weight_factors(v.get("id") for v in voices))
+        return factors
+
+    def _reindex(self):
+        self._indexed_version = self.latency_tracker.version if self.latency_tracker else 0
+        # Built aside and swapped in with one assignment, so selection never sees a partial index
+        self._pools = self._build_index(self.voices_data, self._latency_factors())
+
+    def reweight(self) -> bool:
+        """
+        Rebuild pool weights if new latency samples arrived. O(voices), so it runs
+        from a background task (voice_reweighter), never on the call-setup path.
+        """
+        tracker = self.latency_tracker
+        if not tracker or tracker.version == self._indexed_version:
+            return False
+        self._reindex()
+        return True
+
+    @staticmethod
+    def _build_index(voices_data: Dict[str, List[Dict[str, Any]]],
+                     factors: Optional[Dict[str, float]] = None) -> Dict[Tuple, VoicePool]:
+        """
+        Index voices by (language, gender, age_range); None in a slot matches any value.
+        Every filter combination gets its own pool, so selection is a dict lookup plus a bisect.
+        """
+        groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for lang_key, voices in voices_data.items():
+            for voice in voices:
+                gender = voice.get("gender")
+                age_range = voice.get("age_range")
+                for key in {
+                    (lang_key, None, None),
+                    (lang_key, gender, None),
+                    (lang_key, None, age_range),
+                    (lang_key, gender, age_range),
+                }:
+                    groups.setdefault(key, []).append(voice)
+        return {key: VoicePool(voices, factors) for key, voices in groups.items()}
+
+    @staticmethod
+    def _language_key(language: str) -> str:
+        return LANGUAGE_KEYS.get(language.lower(), "english")
+
+    def select_voice(self, language: str, gender: Optional[str] = None,
+                     age_range: Optional[str] = None,
+                     rng: random.Random = random) -> Optional[Dict[str, Any]]:
+        """Weighted random voice for a language, optionally filtered by gender and/or age range."""
+        pool = self._pools.get((self._language_key(language), gender, age_range))
+        return pool.pick(rng) if pool else None
+
+    def record_voice_latency(self, voice_id: str, latency_ms: float):
+        """Feed one measured TTS latency for a voice (no-op without a tracker)."""
+        if self.latency_tracker:
+            self.latency_tracker.record(voice_id, latency_ms)
+
+    def get_voice_latency_ranking(self, language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Voices ranked fastest first by measured latency, with their current selection factor."""
+        lang_keys = [self._language_key(language)] if language else list(self.voices_data)
+        ranking = []
+        for lang_key in lang_keys:
+            voices = {v.get("id"): v for v in self.voices_data.get(lang_key, [])}
+            factors = self.latency_tracker.weight_factors(voices) if self.latency_tracker else {}
+            measured = self.latency_tracker.rank(voices) if self.latency_tracker else []
+            for entry in measured:
+                voice = voices[entry["voice_id"]]
+                ranking.append({
+                    **entry,
+                    "name": voice.get("name"),
+                    "language": lang_key,
+                    "gender": voice.get("gender"),
+                    "age_range": voice.get("age_range"),
+                    "weight_factor": round(factors.get(entry["voice_id"], 1.0), 3),
+                })
+        return sorted(ranking, key=lambda entry: entry["ema_ms"])
+
     def get_voice_statistics(self) -> Dict[str, int]:
         """Get statistics about available voices."""
         stats = {}
@@ -45,31 +165,23 @@ class VoiceManager:
     
     def get_random_voice(self, language: str) -> Optional[Dict[str, Any]]:
         """Get a random voice for the specified language."""
-        # Normalize language code
-        lang_key = "spanish" if language.lower() in ["es", "spanish"] else "english"
-        
-        voices = self.voices_data.get(lang_key, [])
-        if not voices:
-            print(f"⚠️ Warning: No voices available for language: {language}")
-            return None
-        
-        return random.choice(voices)
+        voice = self.select_voice(language)
+        if voice is None:
+            logger.warning("⚠️ No voices available for language: %s", language)
+        return voice
     
-    def get_random_voice_for_language(self, language: str) -> Optional[Dict[str, Any]]:
-        """Get a random voice for the specified language (era-agnostic)."""
-        # Normalize language code  
-        lang_key = "spanish" if language.lower() in ["es", "spanish"] else "english"
-        
-        voices = self.voices_data.get(lang_key, [])
-        if not voices:
-            print(f"⚠️ Warning: No voices available for language: {language}")
+    def get_random_voice_for_language(self, language: str, gender: Optional[str] = None,
+                                      age_range: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get a random voice for the specified language (era-agnostic), optionally filtered."""
+        selected_voice = self.select_voice(language, gender, age_range)
+        if not selected_voice:
+            logger.warning("⚠️ No voices available for language: %s (%s, %s)",
+                           language, gender or 'any', age_range or 'any')
             return None
         
-        selected_voice = random.choice(voices)
-        # Enhanced logging with metadata
-        gender = selected_voice.get('gender', 'unknown')
-        age_range = selected_voice.get('age_range', 'unknown')
-        print(f"🎤 Selected voice: {selected_voice['name']} (ID: {selected_voice['id'][:8]}...) - {gender} {age_range}")
+        # Enhanced logging with metadata (formatted by the log writer, only if debug is on)
+        logger.debug("🎤 Selected voice: %s (ID: %s...) - %s %s", selected_voice['name'], selected_voice['id'][:8],
+                     selected_voice.get('gender', 'unknown'), selected_voice.get('age_range', 'unknown'))
         return selected_voice
     
     def get_voice_id_from_env(self, language: str) -> Optional[str]:
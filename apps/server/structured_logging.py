@@ -0,0 +1,227 @@
+"""
+Non-blocking structured logging for the request and media paths.
+
+Hot paths used to print() synchronously, so every call setup, transcript line
+and TwiML body contended for the stdout lock. Here a log call only does this:
+- a level check, which skips everything, including message formatting, when
+  the level is disabled
+- an optional 1-in-N sampling check for high-frequency events
+- a put_nowait of the unformatted record onto a bounded queue
+
+A background listener thread formats records (text or JSON lines) and writes
+them. When the queue is full, records are dropped and counted rather than
+blocking the event loop or the ElevenLabs callback threads.
+
+Usage:
+    log = get_logger("media")
+    log.info("call.started", "Outbound call started", call_sid=call_sid)
+    log.debug("conversation.override", "Override", override=lambda: json.dumps(override))
+
+Field values that are callables are only evaluated by the writer thread, so
+expensive renderings cost nothing when the level is disabled.
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# Logging Configuration
+DEBUG_LOGS = os.getenv("DEBUG_LOGS", "false").lower() == "true"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG_LOGS else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text | json
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "transcript.agent=1,transcript.user=1,media.message=100")
+
+ROOT_LOGGER_NAME = "time_traveler"
+
+
+def parse_sampling(raw: str) -> Dict[str, int]:
+    """Parse "event=N,..." into {event: N} (log 1 in N occurrences)"""
+    rates = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        event, every = item.split("=", 1)
+        try:
+            rates[event.strip()] = max(1, int(every))
+        except ValueError:
+            continue
+    return rates
+
+
+class Sampler:
+    """Deterministic 1-in-N sampling per event name (the first occurrence always logs)."""
+
+    def __init__(self, rates: Dict[str, int]):
+        self.rates = rates
+        self._counts: Dict[str, int] = {}
+
+    def should_log(self, event: str) -> bool:
+        every = self.rates.get(event)
+        if not every or every == 1:
+            return True
+        # Races between threads only shift which occurrence is kept
+        count = self._counts.get(event, 0)
+        self._counts[event] = count + 1
+        return count % every == 0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks or formats in the caller's thread."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens in the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _render(value: Any) -> Any:
+    return value() if callable(value) else value
+
+
+class StructuredFormatter(logging.Formatter):
+    """Render a record and its fields as a text line or a JSON object."""
+
+    def __init__(self, fmt: str = LOG_FORMAT):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {key: _render(value) for key, value in getattr(record, "fields", {}).items()}
+        message = record.getMessage()
+        if self.json:
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname.lower(),
+                "logger": record.name,
+                "event": getattr(record, "event", None),
+                "msg": message,
+                **fields,
+            }
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str, ensure_ascii=False)
+        line = message
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class EventLogger:
+    """Thin wrapper that attaches an event name and fields to each record."""
+
+    def __init__(self, logger: logging.Logger, sampler: Sampler):
+        self._logger = logger
+        self._sampler = sampler
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level: int, event: str, msg: str = "", exc_info: bool = False, **fields):
+        if not self._logger.isEnabledFor(level) or not self._sampler.should_log(event):
+            return
+        every = self._sampler.rates.get(event, 1)
+        if every > 1:
+            fields["sampled_every"] = every
+        self._logger.log(level, msg or event, exc_info=exc_info,
+                         extra={"event": event, "fields": fields})
+
+    def debug(self, event: str, msg: str = "", **fields):
+        self.log(logging.DEBUG, event, msg, **fields)
+
+    def info(self, event: str, msg: str = "", **fields):
+        self.log(logging.INFO, event, msg, **fields)
+
+    def warning(self, event: str, msg: str = "", **fields):
+        self.log(logging.WARNING, event, msg, **fields)
+
+    def error(self, event: str, msg: str = "", **fields):
+        self.log(logging.ERROR, event, msg, **fields)
+
+    def exception(self, event: str, msg: str = "", **fields):
+        """Error with the current exception's traceback"""
+        self.log(logging.ERROR, event, msg, exc_info=True, **fields)
+
+
+class LogPipeline:
+    """Owns the queue, the queue handler and the background writer."""
+
+    def __init__(self, level: str = LOG_LEVEL, fmt: str = LOG_FORMAT,
+                 queue_size: int = LOG_QUEUE_SIZE, sampling: str = LOG_SAMPLING,
+                 stream=None):
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(StructuredFormatter(fmt))
+        self.listener = QueueListener(self.queue, output, respect_handler_level=False)
+        self.sampler = Sampler(parse_sampling(sampling))
+        self.root = logging.getLogger(ROOT_LOGGER_NAME)
+        self.root.setLevel(getattr(logging, level, logging.INFO))
+        self.root.propagate = False
+        self.root.handlers = [self.handler]
+        self.started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if not self.started:
+                self.listener.start()
+                self.started = True
+
+    def stop(self):
+        """Flush queued records and stop the writer thread"""
+        with self._lock:
+            if self.started:
+                self.listener.stop()
+                self.started = False
+
+    def get_logger(self, name: str) -> EventLogger:
+        return EventLogger(self.root.getChild(name), self.sampler)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "level": logging.getLevelName(self.root.level),
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+            "sampling": self.sampler.rates,
+        }
+
+
+_PIPELINE: Optional[LogPipeline] = None
+
+
+def setup_logging(**kwargs) -> LogPipeline:
+    """Create and start the process-wide pipeline (idempotent)"""
+    global _PIPELINE
+    if _PIPELINE is None:
+        _PIPELINE = LogPipeline(**kwargs)
+        _PIPELINE.start()
+        atexit.register(_PIPELINE.stop)
+    return _PIPELINE
+
+
+def get_logger(name: str) -> EventLogger:
+    return setup_logging().get_logger(name)
+
+
+def shutdown_logging():
+    if _PIPELINE is not None:
+        _PIPELINE.stop()
@@ -0,0 +1,148 @@
+"""
+Bounded LRU cache of verified JWT payloads.
+
+The frontend polls /call-status (and friends) with the same bearer token many
+times per call; each poll used to re-run the HMAC verification in
+`jwt.decode`. Verified payloads are cached under a digest of the token (the
+raw token is never kept as a key) until the token's own `exp`, or sooner when
+its signing key retires (`verify_until`), so a cached token can never outlive
+the signature check it replaced. Entries are also
+indexed by session_id so a revoked session can be dropped in one call.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple
+
+# Cache Configuration
+JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "4096"))
+
+
+def token_digest(token: str) -> bytes:
+    """Fixed-size cache key for a token"""
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+class TokenCache:
+    """LRU map of token digest -> (exp, payload) with hit-rate counters.
+
+    Shared by the event loop and threadpool handlers, so every read-modify of
+    the OrderedDict and the session index happens under one lock.
+    """
+
+    def __init__(self, max_entries: int = JWT_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+        self._by_session: Dict[str, Set[bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict]:
+        """Cached payload for a still-unexpired token, or None (a miss)"""
+        digest = token_digest(token)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if now >= expires_at:
+                self._remove(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+        # Callers get their own copy so they cannot mutate the cached payload
+        return dict(payload)
+
+    def put(self, token: str, payload: Dict, not_after: Optional[float] = None):
+        """
+        Cache a verified payload until its `exp` (tokens without exp are not cached),
+        or until `not_after` if sooner, e.g. when the signing key is retired.
+        """
+        if self.max_entries <= 0:
+            return
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        if not_after is not None:
+            expires_at = min(expires_at, not_after)
+        if self.clock() >= expires_at:
+            return
+        digest = token_digest(token)
+        entry = (float(expires_at), dict(payload))
+        session_id = payload.get("session_id")
+        with self._lock:
+            self._remove(digest)
+            self._entries[digest] = entry
+            if session_id:
+                self._by_session.setdefault(session_id, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> bool:
+        """Drop one token. Returns True if it was cached."""
+        digest = token_digest(token)
+        with self._lock:
+            if not self._remove(digest):
+                return False
+            self.invalidations += 1
+        return True
+
+    def invalidate_session(self, session_id: str) -> int:
+        """Drop every cached token of a revoked session. Returns entries removed."""
+        with self._lock:
+            digests = self._by_session.pop(session_id, set())
+            for digest in digests:
+                self._entries.pop(digest, None)
+            self.invalidations += len(digests)
+        return len(digests)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_session.clear()
+
+    def _remove(self, digest: bytes) -> bool:
+        """Drop an entry and its session index (caller holds the lock)"""
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return False
+        session_id = entry[1].get("session_id")
+        digests = self._by_session.get(session_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                self._by_session.pop(session_id, None)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            size = len(self._entries)
+            lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+TOKEN_CACHE = TokenCache(JWT_CACHE_MAX_ENTRIES if JWT_CACHE_ENABLED else 0)
@@ -6,6 +6,7 @@ from elevenlabs.conversational_ai.conversation import AudioInterface
 from starlette.websockets import WebSocketDisconnect, WebSocketState
 import audioop 
 import os
+import time
 
 class TwilioAudioInterface(AudioInterface):
     def __init__(self, websocket: WebSocket):
@@ -15,6 +16,13 @@ class TwilioAudioInterface(AudioInterface):
         self.loop = asyncio.get_event_loop()
         self.frames = 0
         self.debug_logs = os.getenv("DEBUG_LOGS", "false").lower() == "true"
+        # Monotonic time the first agent audio chunk was sent, and an optional hook for it
+        self.first_out_at = None
+        self.on_first_audio = None
+        # Optional call_metrics.CallLatencyProbe (None when instrumentation is off)
+        self.metrics = None
+        # Optional call_tracing.CallTrace for the first-audio event
+        self.trace = None
 
     def start(self, input_callback):
         self.input_callback = input_callback
@@ -58,6 +66,14 @@ class TwilioAudioInterface(AudioInterface):
             try:
                 if self.websocket.application_state == WebSocketState.CONNECTED:
                     await self.websocket.send_text(json.dumps(audio_delta))
+                    if self.metrics is not None:
+                        self.metrics.audio_out()
+                    if self.first_out_at is None:
+                        self.first_out_at = time.monotonic()
+                        if self.on_first_audio:
+                            self.on_first_audio(self.first_out_at)
+                        if self.trace is not None:
+                            self.trace.mark("audio.first_out", at=self.first_out_at)
             except (WebSocketDisconnect, RuntimeError):
                 pass
 
@@ -78,6 +94,8 @@ class TwilioAudioInterface(AudioInterface):
             self.stream_id = message["start"]["streamSid"]
         elif event_type == "media" and self.input_callback:
             self.frames += 1
+            if self.metrics is not None:
+                self.metrics.audio_in()
             mu = base64.b64decode(message["media"]["payload"])  # μ-law 8k
             pcm = self._mulaw8k_to_pcm16(mu, target_rate=16000) # s16le 16k
             self.input_callback(pcm)
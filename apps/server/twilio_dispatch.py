@@ -0,0 +1,154 @@
+"""
+Calls-per-second aware dispatch for Twilio outbound call creation.
+
+Twilio limits how fast an account may create outbound calls (CPS). Instead of
+calling `calls.create` the moment a request arrives, each `from` number gets a
+token bucket (CPS rate + burst) scheduled in virtual time: every request
+reserves the next conforming start time on arrival, so waiters are served
+strictly in arrival order and the reservation costs O(1). The blocking Twilio
+HTTP request itself runs in a worker thread so the event loop (and live media
+streams) are not stalled while it is in flight.
+"""
+
+import os
+import time
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from errors import TwilioServiceError
+
+# Dispatch Configuration
+TWILIO_CPS = float(os.getenv("TWILIO_CPS", "1"))  # Calls per second per from-number
+TWILIO_CPS_BURST = int(os.getenv("TWILIO_CPS_BURST", "1"))  # Back-to-back calls allowed after idle
+TWILIO_DISPATCH_MAX_WAIT_SECONDS = float(os.getenv("TWILIO_DISPATCH_MAX_WAIT_SECONDS", "30"))
+TWILIO_DISPATCH_MAX_RETRIES = int(os.getenv("TWILIO_DISPATCH_MAX_RETRIES", "2"))
+
+DEBUG_LOGS = os.getenv("DEBUG_LOGS", "false").lower() == "true"
+
+
+def is_throttled_error(error: Exception) -> bool:
+    """Whether Twilio rejected the request for exceeding the CPS/concurrency limit"""
+    return getattr(error, "status", None) == 429 or getattr(error, "code", None) == 20429
+
+
+class NumberBucket:
+    """Token bucket for one from-number, kept as a GCRA theoretical arrival time."""
+
+    __slots__ = ("cps", "burst", "tat", "pending", "dispatched_total", "throttled_total")
+
+    def __init__(self, cps: float, burst: int):
+        self.cps = cps
+        self.burst = max(1, burst)
+        self.tat = 0.0
+        self.pending = 0
+        self.dispatched_total = 0
+        self.throttled_total = 0
+
+    def reserve(self, now: float) -> float:
+        """Reserve the next conforming start time (>= now) and advance the bucket"""
+        interval = 1.0 / self.cps
+        tolerance = (self.burst - 1) * interval
+        start = max(now, self.tat - tolerance)
+        self.tat = max(self.tat, start) + interval
+        return start
+
+    def wait_estimate(self, now: float) -> float:
+        """Seconds a request arriving now would wait"""
+        tolerance = (self.burst - 1) / self.cps
+        return max(0.0, self.tat - tolerance - now)
+
+
+class TwilioCallDispatcher:
+    """Paces `calls.create` per from-number and exposes queue depth."""
+
+    def __init__(self, cps: float = TWILIO_CPS, burst: int = TWILIO_CPS_BURST,
+                 max_wait_seconds: float = TWILIO_DISPATCH_MAX_WAIT_SECONDS,
+                 max_retries: int = TWILIO_DISPATCH_MAX_RETRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_cps = cps
+        self.default_burst = burst
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.clock = clock
+        self._buckets: Dict[str, NumberBucket] = {}
+
+    def set_rate(self, from_number: str, cps: float, burst: int = 1):
+        """Override the CPS budget for one from-number"""
+        bucket = self._bucket(from_number)
+        bucket.cps = cps
+        bucket.burst = max(1, burst)
+
+    def _bucket(self, from_number: str) -> NumberBucket:
+        bucket = self._buckets.get(from_number)
+        if bucket is None:
+            bucket = self._buckets[from_number] = NumberBucket(self.default_cps, self.default_burst)
+        return bucket
+
+    def wait_estimate(self, from_number: str) -> float:
+        """Seconds a new call from this number would wait for its CPS slot"""
+        return self._bucket(from_number).wait_estimate(self.clock())
+
+    def queue_depth(self, from_number: Optional[str] = None) -> int:
+        """Calls currently waiting for (or inside) a CPS slot"""
+        if from_number is not None:
+            bucket = self._buckets.get(from_number)
+            return bucket.pending if bucket else 0
+        return sum(bucket.pending for bucket in self._buckets.values())
+
+    async def create_call(self, from_number: str, create_fn: Callable[[], Any]) -> Any:
+        """
+        Wait for a CPS slot on `from_number`, then run the blocking `create_fn`
+        (e.g. `lambda: client.calls.create(...)`) in a worker thread.
+        Throttling responses (HTTP 429 / 20429) are retried on the next slot.
+        """
+        bucket = self._bucket(from_number)
+        bucket.pending += 1
+        try:
+            attempt = 0
+            while True:
+                now = self.clock()
+                if bucket.wait_estimate(now) > self.max_wait_seconds:
+                    raise TwilioServiceError(
+                        f"Call dispatch queue for {from_number} exceeds {self.max_wait_seconds}s",
+                        "CALL_DISPATCH_BUSY",
+                        "We're placing a lot of calls right now. Please try again in a moment."
+                    )
+                start = bucket.reserve(now)
+                if start > now:
+                    await asyncio.sleep(start - now)
+                try:
+                    result = await asyncio.to_thread(create_fn)
+                except Exception as e:
+                    if is_throttled_error(e) and attempt < self.max_retries:
+                        attempt += 1
+                        bucket.throttled_total += 1
+                        if DEBUG_LOGS:
+                            print(f"⏳ Twilio throttled {from_number}; retry {attempt}/{self.max_retries}")
+                        continue
+                    raise
+                bucket.dispatched_total += 1
+                return result
+        finally:
+            bucket.pending -= 1
+
+    def get_stats(self) -> Dict:
+        now = self.clock()
+        return {
+            "default_cps": self.default_cps,
+            "default_burst": self.default_burst,
+            "queue_depth": self.queue_depth(),
+            "numbers": {
+                number: {
+                    "cps": bucket.cps,
+                    "burst": bucket.burst,
+                    "queue_depth": bucket.pending,
+                    "wait_seconds": round(bucket.wait_estimate(now), 3),
+                    "dispatched_total": bucket.dispatched_total,
+                    "throttled_total": bucket.throttled_total,
+                }
+                for number, bucket in self._buckets.items()
+            },
+        }
+
+
+TWILIO_DISPATCHER = TwilioCallDispatcher()
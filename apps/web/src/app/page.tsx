@@ -187,6 +187,7 @@ export default function Home() {
       overlayStatus: "Connection bridging temporal dimensions...",
       callEnded: "Call ended.",
       callNotAnswered: "Call not answered.",
+      callQueued: "All lines to the past are busy. You are number {position} in line...",
       returningToMachine: "Returning to the time machine...",
       about: "About",
       randomYear: "Random year",
@@ -214,6 +215,7 @@ export default function Home() {
       overlayStatus: "Conexión uniendo dimensiones temporales...",
       callEnded: "Llamada finalizada.",
       callNotAnswered: "Llamada no contestada.",
+      callQueued: "Todas las líneas al pasado están ocupadas. Eres el número {position} en la cola...",
       returningToMachine: "Regresando a la máquina del tiempo...",
       about: "Acerca de",
       randomYear: "Año aleatorio",
@@ -366,7 +368,9 @@ export default function Home() {
       }
 
       // Success → run spiral + overlay animation
-      const newCallSid: string | undefined = result.callSid;
+      // A 202 means the call is queued: track the queue ID until it is dispatched
+      const queued = Boolean(result.queued && result.queueId);
+      const newCallSid: string | undefined = queued ? result.queueId : result.callSid;
       if (newCallSid) {
         setCallSid(newCallSid);
       }
@@ -381,9 +385,11 @@ export default function Home() {
         setPreOverlay(false);
         setLoading(true);
         setShowSpiral(false);
-        setOverlayInfo(t.overlayStatus);
+        setOverlayInfo(
+          queued ? t.callQueued.replace("{position}", String(result.position ?? 1)) : t.overlayStatus
+        );
         if (newCallSid) {
-          startCallStatusTracking(newCallSid);
+          startCallStatusTracking(newCallSid, queued);
         }
       }, preDelay);
     } catch (err: any) {
@@ -427,27 +433,34 @@ export default function Home() {
     }, 3000);
   }
 
-  async function startCallStatusTracking(callSidToTrack: string) {
+  async function startCallStatusTracking(callSidToTrack: string, queued = false) {
     const backend = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
     let answered = false;
-
-    // 20s no-answer timeout
-    noAnswerTimeoutRef.current = window.setTimeout(async () => {
-      if (!answered) {
-        try {
-          await makeAuthenticatedRequest(`/end-call/${callSidToTrack}?reason=no-answer`, { 
-            method: 'POST'
-          });
-        } catch {}
-        clearTimers();
-        showFinalMessageAndReset(t.callNotAnswered);
-      }
-    }, 20000);
+    // Queue ID while waiting for a line, then the real callSid once dispatched
+    let trackedSid = callSidToTrack;
+
+    // 20s no-answer timeout, started once the call is actually dialing
+    const startNoAnswerTimeout = () => {
+      noAnswerTimeoutRef.current = window.setTimeout(async () => {
+        if (!answered) {
+          try {
+            await makeAuthenticatedRequest(`/end-call/${trackedSid}?reason=no-answer`, { 
+              method: 'POST'
+            });
+          } catch {}
+          clearTimers();
+          showFinalMessageAndReset(t.callNotAnswered);
+        }
+      }, 20000);
+    };
+    if (!queued) {
+      startNoAnswerTimeout();
+    }
 
     // Poll status every 1.5s
     pollIntervalRef.current = window.setInterval(async () => {
       try {
-        const res = await makeAuthenticatedRequest(`/call-status/${callSidToTrack}`);
+        const res = await makeAuthenticatedRequest(`/call-status/${trackedSid}`);
         // If backend already cleaned up after we observed 'answered', treat 404 as ended
         if (res.status === 404 && answered) {
           clearTimers();
@@ -457,6 +470,21 @@ export default function Home() {
         if (!res.ok) return;
         const data = await res.json();
         const status = data.status as string;
+        if (status === 'queued') {
+          const position = data.details?.position;
+          if (position) {
+            setOverlayInfo(t.callQueued.replace("{position}", String(position)));
+          }
+          return;
+        }
+        if (status === 'dispatched' && data.details?.call_sid) {
+          // A line freed up: follow the real call from here on
+          trackedSid = data.details.call_sid as string;
+          setCallSid(trackedSid);
+          setOverlayInfo(t.overlayStatus);
+          startNoAnswerTimeout();
+          return;
+        }
         if (status === 'answered') {
           if (!answered) {
             answered = true;
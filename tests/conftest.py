@@ -22,9 +22,20 @@ def voice_manager():
     return VoiceManager()
 
 
+AGENT_ENV = {f"ELEVENLABS_AGENT_ID_{i}": f"agent_test_{i}" for i in range(1, 5)}
+
+
+@pytest.fixture
+def agent_env(monkeypatch):
+    """Set the agent ID environment variables referenced by agents.json."""
+    for name, value in AGENT_ENV.items():
+        monkeypatch.setenv(name, value)
+    return AGENT_ENV
+
+
 @pytest.fixture
-def agent_manager():
-    """Create an AgentManager instance for testing."""
+def agent_manager(agent_env):
+    """Create an AgentManager instance for testing (agent IDs resolve at load)."""
     return AgentManager()
 
 
@@ -52,3 +63,87 @@ def sample_agent_data():
             {"name": "Test Agent 2", "env_var": "TEST_AGENT_2"}
         ]
     }
+
+
+class FakeTwilioServer:
+    """
+    Local stand-in for Twilio's Calls endpoint
+    (POST /2010-04-01/Accounts/{sid}/Calls.json).
+
+    Records every request and, like a real account, answers 429 / error 20429
+    when calls from one `From` number arrive faster than `cps`.
+    """
+
+    def __init__(self, cps: float = 1.0):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs
+
+        self.cps = cps
+        self.requests = []  # (monotonic time, form fields)
+        self.throttled = 0
+        self._last_by_from = {}
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                import json
+                import time
+                length = int(self.headers.get("Content-Length", 0))
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                now = time.monotonic()
+                with fake._lock:
+                    last = fake._last_by_from.get(form.get("From"))
+                    # Small slack for timer jitter between client and server
+                    if last is not None and now - last < (1.0 / fake.cps) * 0.9:
+                        fake.throttled += 1
+                        status, body = 429, {"code": 20429, "message": "Too Many Requests", "status": 429}
+                    else:
+                        fake._last_by_from[form.get("From")] = now
+                        fake.requests.append((now, form))
+                        status, body = 201, {"sid": f"CA{len(fake.requests):032d}", "status": "queued"}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/2010-04-01/Accounts/ACtest/Calls.json"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def create_call(self, from_: str, to: str, url: str = "https://example.com/twiml") -> dict:
+        """Minimal blocking client mirroring `client.calls.create` error attributes"""
+        import json
+        from urllib.error import HTTPError
+        from urllib.parse import urlencode
+        from urllib.request import urlopen
+
+        data = urlencode({"From": from_, "To": to, "Url": url}).encode()
+        try:
+            with urlopen(self.url, data=data, timeout=5) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            body = json.loads(e.read() or b"{}")
+            error = RuntimeError(body.get("message", "Twilio error"))
+            error.status = e.code
+            error.code = body.get("code")
+            raise error
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_twilio():
+    """Local fake Twilio endpoint enforcing 5 calls/sec per From number."""
+    server = FakeTwilioServer(cps=5.0)
+    yield server
+    server.close()
@@ -61,12 +61,12 @@ class TestAgentManager:
             assert agent_id == 'agent_12345'
 
     def test_get_agent_id_missing_env_var(self, agent_manager):
-        """Test getting agent ID when environment variable is missing."""
+        """Test that a missing environment variable no longer falls back to ELEVENLABS_AGENT_ID_1."""
         test_agent = {"name": "Test Agent", "env_var": "MISSING_AGENT_ID"}
         
         with patch.dict('os.environ', {'ELEVENLABS_AGENT_ID_1': 'fallback_agent'}, clear=True):
             agent_id = agent_manager.get_agent_id(test_agent)
-            assert agent_id == 'fallback_agent'
+            assert agent_id is None
 
     def test_get_agent_id_no_env_var_key(self, agent_manager):
         """Test getting agent ID when agent config has no env_var."""
@@ -107,8 +107,9 @@ class TestAgentManager:
 
     def test_empty_agents_list(self, agent_manager):
         """Test behavior when agents list is empty."""
-        # Mock empty agents data
+        # Mock empty agents data (available_agents is derived from it at load)
         agent_manager.agents_data = []
+        agent_manager.available_agents = []
         
         agent = agent_manager.get_random_agent()
         assert agent is None
@@ -116,3 +117,53 @@ class TestAgentManager:
         stats = agent_manager.get_agent_statistics()
         assert stats['total_agents'] == 0
         assert stats['agent_names'] == []
+
+
+class TestAgentIdResolution:
+    """Test cases for resolving agent IDs once at load."""
+
+    def test_ids_cached_on_entries(self, agent_manager, agent_env):
+        """Test that selectable agents carry their resolved agent_id."""
+        agent = agent_manager.get_random_agent()
+        assert agent["agent_id"] == agent_env[agent["env_var"]]
+        assert agent_manager.get_agent_id(agent) == agent["agent_id"]
+
+    def test_selection_does_not_read_environment(self, agent_manager):
+        """Test that picking an agent and its ID never touches os.getenv."""
+        with patch('agent_manager.os.getenv', side_effect=AssertionError("getenv during call setup")):
+            for _ in range(20):
+                agent = agent_manager.get_random_agent()
+                assert agent_manager.get_agent_id(agent)
+
+    def test_misconfigured_agents_excluded(self, sample_agent_data, tmp_path, monkeypatch):
+        """Test that agents with a missing or empty ID are never selected."""
+        sample_agent_data["agents"].append({"name": "No Env Var"})
+        agents_file = tmp_path / "agents.json"
+        agents_file.write_text(json.dumps(sample_agent_data))
+        monkeypatch.setenv("TEST_AGENT_1", "agent_one")
+        monkeypatch.setenv("TEST_AGENT_2", "   ")
+        monkeypatch.setenv("ELEVENLABS_AGENT_ID_1", "fallback_agent")
+
+        am = AgentManager(agents_file=str(agents_file))
+        assert [a["name"] for a in am.available_agents] == ["Test Agent 1"]
+        assert {a["name"] for a in am.misconfigured_agents} == {"Test Agent 2", "No Env Var"}
+        assert all(am.get_random_agent()["agent_id"] == "agent_one" for _ in range(10))
+        stats = am.get_agent_statistics()
+        assert stats["total_agents"] == 3
+        assert stats["available_agents"] == 1
+
+    def test_sanitized_at_load(self, sample_agent_data, tmp_path, monkeypatch):
+        """Test that 'KEY=value' and stray whitespace are cleaned once at load."""
+        agents_file = tmp_path / "agents.json"
+        agents_file.write_text(json.dumps(sample_agent_data))
+        monkeypatch.setenv("TEST_AGENT_1", " TEST_AGENT_1=agent_abc\n")
+        monkeypatch.setenv("TEST_AGENT_2", "TEST_AGENT_2=")
+
+        am = AgentManager(agents_file=str(agents_file))
+        assert [a["agent_id"] for a in am.available_agents] == ["agent_abc"]
+        assert am.misconfigured_agents[0]["name"] == "Test Agent 2"
+
+    def test_no_resolvable_agents(self, agent_manager):
+        """Test that get_random_agent returns None when every agent is misconfigured."""
+        agent_manager.available_agents = []
+        assert agent_manager.get_random_agent() is None
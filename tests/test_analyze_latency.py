@@ -0,0 +1,118 @@
+"""
+Unit tests for the offline latency report (metrics/analyze_latency.py).
+"""
+
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+from metrics.analyze_latency import Collector, build_report, iter_records, main, render_markdown
+
+
+def call(sid, agent_id, setup_ms, voice_id="v1", lang="es", year=1850):
+    """A minimal metrics NDJSON record."""
+    return {
+        "call_sid": sid,
+        "agent": {"agent_id": agent_id, "agent_name": "a", "voice_id": voice_id, "lang": lang, "year": year},
+        "setup_ms": setup_ms,
+        "first_audio_ms": setup_ms - 50,
+        "audio": {"avg_out_interval_ms": 100.0, "p95_out_interval_ms": None},
+    }
+
+
+def write_ndjson(path, records, extra_lines=()):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        for line in extra_lines:
+            f.write(line + "\n")
+
+
+class TestStreaming:
+    """Test cases for reading metric files."""
+
+    def test_plain_and_gzip_files(self, tmp_path):
+        """Test that several files, including .gz, are read in order and bad lines counted."""
+        write_ndjson(tmp_path / "a.ndjson", [call("CA1", "1", 1500)], extra_lines=["{oops", "", "[1]"])
+        write_ndjson(tmp_path / "b.ndjson.gz", [call("CA2", "2", 1600)])
+        errors = {}
+        records = list(iter_records([str(tmp_path / "a.ndjson"), str(tmp_path / "b.ndjson.gz")], errors))
+        assert [r["call_sid"] for r in records] == ["CA1", "CA2"]
+        assert errors == {"malformed_lines": 2}
+
+
+class TestReport:
+    """Test cases for the joined, grouped summaries."""
+
+    def collect(self, timings):
+        collector = Collector(["agent", "lang"], ["setup_ms", "llm_plus_tts_ms", "setup_overhead_ms",
+                                                  "p95_out_interval_ms"], timings)
+        for record in (call("CA1", "1", 1500), call("CA2", "1", 1700), call("CA3", "2", 1600, lang="en")):
+            collector.add(record)
+        return collector
+
+    def test_timings_join_by_sid_or_ordinal(self):
+        """Test the join by call_sid and by "call N model M" (Nth call of agent M)."""
+        timings = {
+            "CA1": {"avg_llm": 500.0, "avg_tts": 100.0},
+            "call 2 model 1": {"avg_llm": 700.0, "avg_tts": 100.0},
+        }
+        report = build_report(self.collect(timings), resamples=0)
+        assert report["calls"] == 3
+        assert report["joined_timings"] == 2
+        agent_1 = report["groups"]["agent"]["1"]
+        assert agent_1["llm_plus_tts_ms"]["mean"] == 700.0
+        assert agent_1["setup_overhead_ms"]["mean"] == 900.0
+        assert report["groups"]["agent"]["2"]["llm_plus_tts_ms"] == {"n": 0}
+
+    def test_percentiles_and_bootstrap_are_deterministic(self):
+        """Test group percentiles and that a fixed seed reproduces the intervals."""
+        first = build_report(self.collect({}), resamples=500, seed=3)
+        second = build_report(self.collect({}), resamples=500, seed=3)
+        assert first == second
+        setup = first["groups"]["all"]["all"]["setup_ms"]
+        assert setup["n"] == 3
+        assert setup["p50"] == 1600.0
+        low, high = setup["ci"]["mean"]
+        assert 1500.0 <= low <= setup["mean"] <= high <= 1700.0
+        assert first["groups"]["lang"]["en"]["setup_ms"]["n"] == 1
+        assert "ci" not in first["groups"]["lang"]["en"]["setup_ms"]
+
+    def test_new_group_keeps_other_intervals(self):
+        """Test that adding a group does not change the bootstrap of existing groups."""
+        collector = Collector(["agent", "lang"], ["setup_ms"], {})
+        for i in range(20):
+            collector.add(call(f"CA{i}", "1", 1000 + 37 * i))
+        before = build_report(collector, resamples=200, seed=3)
+        for i in range(20, 30):
+            collector.add(call(f"CA{i}", "0", 1000 + 53 * i, lang="en"))
+        after = build_report(collector, resamples=200, seed=3)
+        assert "0" in after["groups"]["agent"]
+        assert after["groups"]["agent"]["1"] == before["groups"]["agent"]["1"]
+        assert after["groups"]["lang"]["es"] == before["groups"]["lang"]["es"]
+
+    def test_markdown_report(self):
+        """Test that the Markdown report has a table per dimension and metric."""
+        markdown = render_markdown(build_report(self.collect({}), resamples=100))
+        assert "## All calls" in markdown
+        assert "## By agent" in markdown
+        assert "### setup_ms" in markdown
+        assert "| 1 | 2 |" in markdown
+
+
+class TestCli:
+    """Test cases for the command line."""
+
+    def test_json_output(self, tmp_path):
+        """Test the JSON report written by the CLI."""
+        write_ndjson(tmp_path / "calls.ndjson", [call("CA1", "1", 1500), call("CA2", "1", 1700)])
+        (tmp_path / "timings.json").write_text(json.dumps({"CA1": {"avg_llm": 600, "avg_tts": 100}}))
+        output = tmp_path / "report.json"
+        main([str(tmp_path / "calls.ndjson"), "--timings", str(tmp_path / "timings.json"),
+              "--by", "agent", "--format", "json", "--bootstrap", "50", "-o", str(output)])
+        report = json.loads(output.read_text())
+        assert report["joined_timings"] == 1
+        assert report["groups"]["agent"]["1"]["setup_overhead_ms"]["mean"] == 800.0
@@ -0,0 +1,246 @@
+"""
+Unit tests for call admission control (concurrency cap, FIFO queue, ETA).
+"""
+
+import asyncio
+import pytest
+from call_admission import CallAdmissionController, HostCallCounter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestCallAdmissionController:
+    """Test cases for CallAdmissionController."""
+
+    def test_acquire_up_to_cap(self):
+        """Test that slots are granted up to the worker cap."""
+        governor = CallAdmissionController(max_active=2, max_queue=2)
+        assert run(governor.try_acquire("a", now=0)) is True
+        assert run(governor.try_acquire("b", now=0)) is True
+        assert run(governor.try_acquire("c", now=0)) is False
+
+    def test_queue_position_and_full(self):
+        """Test FIFO positions and rejection when the queue is full."""
+        governor = CallAdmissionController(max_active=1, max_queue=2)
+        run(governor.try_acquire("a", now=0))
+
+        async def dispatch(slot_id):
+            pass
+
+        first = governor.enqueue(dispatch, now=0)
+        second = governor.enqueue(dispatch, now=0)
+        assert first["position"] == 1
+        assert second["position"] == 2
+        assert governor.enqueue(dispatch, now=0) is None
+        assert governor.get_stats()["rejected_total"] == 1
+        assert governor.position(second["queue_id"]) == 2
+
+    def test_release_dispatches_queue_head(self):
+        """Test that releasing a slot starts the oldest queued call."""
+        started = []
+
+        async def scenario():
+            governor = CallAdmissionController(max_active=1, max_queue=5)
+            await governor.try_acquire("a", now=0)
+
+            async def dispatch(slot_id):
+                started.append(slot_id)
+                await governor.bind(slot_id, f"CA-{len(started)}")
+
+            first = governor.enqueue(dispatch, now=0)
+            governor.enqueue(dispatch, now=0)
+            assert await governor.release("a", now=10) is True
+            await asyncio.sleep(0)
+            assert started == [first["queue_id"]]
+            assert governor.get_stats()["queued_calls"] == 1
+            assert await governor.release("CA-1", now=20) is True
+
+        run(scenario())
+        assert len(started) == 2
+
+    def test_release_is_idempotent(self):
+        """Test that double release (stop + finally + /end-call) is harmless."""
+        governor = CallAdmissionController(max_active=1, max_queue=1)
+        run(governor.try_acquire("slot", now=0))
+        run(governor.bind("slot", "CA1"))
+        assert run(governor.release("CA1", now=5)) is True
+        assert run(governor.release("CA1", now=5)) is False
+        assert governor.get_stats()["active_calls"] == 0
+
+    def test_queue_takes_priority_over_new_requests(self):
+        """Test that a new request cannot jump ahead of queued calls."""
+        governor = CallAdmissionController(max_active=1, max_queue=1)
+        run(governor.try_acquire("a", now=0))
+
+        async def dispatch(slot_id):
+            pass
+
+        governor.enqueue(dispatch, now=0)
+        governor._active.clear()  # capacity frees without a dispatch pass
+        assert run(governor.try_acquire("b", now=0)) is False
+
+    def test_estimate_start(self):
+        """Test ETA from active call start times and average duration."""
+        governor = CallAdmissionController(max_active=2, max_queue=5, avg_call_seconds=100)
+        run(governor.try_acquire("a", now=0))
+        run(governor.try_acquire("b", now=50))
+        assert governor.estimate_start(1, now=60) == 100
+        assert governor.estimate_start(2, now=60) == 150
+        assert governor.estimate_start(3, now=60) == 200
+        assert governor.retry_after_seconds(now=60) == 40
+
+    def test_queue_entries_expire(self):
+        """Test that calls waiting too long are dropped and reported."""
+        expired = []
+        governor = CallAdmissionController(
+            max_active=1, max_queue=2, max_queue_wait_seconds=30, on_expired=expired.append
+        )
+        run(governor.try_acquire("a", now=0))
+
+        async def dispatch(slot_id):
+            pass
+
+        ticket = governor.enqueue(dispatch, now=0)
+        governor.enqueue(dispatch, now=40)
+        assert expired == [ticket["queue_id"]]
+        assert governor.get_stats()["queued_calls"] == 1
+
+    def test_cancelled_queued_call_is_not_dispatched(self):
+        """Test enqueue -> end-call (cancel) -> release: the cancelled call never dials."""
+        started = []
+
+        async def scenario():
+            governor = CallAdmissionController(max_active=1, max_queue=5)
+            await governor.try_acquire("a", now=0)
+
+            async def dispatch(slot_id):
+                started.append(slot_id)
+
+            ticket = governor.enqueue(dispatch, now=0)
+            assert governor.cancel(ticket["queue_id"]) is True
+            assert governor.cancel(ticket["queue_id"]) is False
+            assert await governor.release(ticket["queue_id"], now=5) is False
+            assert await governor.release("a", now=10) is True
+            await asyncio.sleep(0)
+            assert governor.get_stats()["active_calls"] == 0
+
+        run(scenario())
+        assert started == []
+
+    def test_entries_marked_ended_are_skipped(self):
+        """Test that dispatch skips queued calls whose status is already failed/ended."""
+        started = []
+        ended = set()
+
+        async def scenario():
+            governor = CallAdmissionController(max_active=1, max_queue=5, is_cancelled=ended.__contains__)
+            await governor.try_acquire("a", now=0)
+
+            async def dispatch(slot_id):
+                started.append(slot_id)
+
+            first = governor.enqueue(dispatch, now=0)
+            second = governor.enqueue(dispatch, now=0)
+            ended.add(first["queue_id"])
+            await governor.release("a", now=10)
+            await asyncio.sleep(0)
+            assert started == [second["queue_id"]]
+            assert governor.get_stats()["queued_calls"] == 0
+
+        run(scenario())
+
+    def test_unanswered_call_released_by_status_callback(self):
+        """Test that a busy/no-answer call frees its slot (and starts the queue) without a media stream."""
+        started = []
+
+        async def scenario():
+            governor = CallAdmissionController(max_active=1, max_queue=5)
+            await governor.try_acquire("slot", now=0)
+            await governor.bind("slot", "CA1")
+
+            async def dispatch(slot_id):
+                started.append(slot_id)
+
+            ticket = governor.enqueue(dispatch, now=0)
+            assert await governor.release_on_status("CA1", "ringing", now=5) is False
+            assert await governor.release_on_status("CA1", "no-answer", now=30) is True
+            await asyncio.sleep(0)
+            assert started == [ticket["queue_id"]]
+            # A retried callback finds nothing left to free
+            assert await governor.release_on_status("CA1", "completed", now=31) is False
+
+        run(scenario())
+
+    def test_average_duration_learns(self):
+        """Test that observed call durations update the running average."""
+        governor = CallAdmissionController(max_active=1, max_queue=1, avg_call_seconds=100)
+        run(governor.try_acquire("a", now=0))
+        run(governor.release("a", now=200))
+        assert governor.avg_call_seconds == pytest.approx(120)
+
+
+class TestHostCallCounter:
+    """Test cases for the host-wide slot counter."""
+
+    def test_host_cap_shared_between_workers(self, tmp_path):
+        """Test that two workers share the host-wide cap."""
+        path = str(tmp_path / "calls.db")
+
+        async def scenario():
+            worker_a = CallAdmissionController(max_active=5, max_queue=1, host_counter=HostCallCounter(path, 2))
+            worker_b = CallAdmissionController(max_active=5, max_queue=1, host_counter=HostCallCounter(path, 2))
+            assert await worker_a.try_acquire("a1", now=0) is True
+            assert await worker_b.try_acquire("b1", now=0) is True
+            assert await worker_b.try_acquire("b2", now=0) is False
+            assert worker_b.get_stats()["active_calls"] == 1
+            await worker_a.bind("a1", "CA-a1")
+            await worker_a.release("CA-a1", now=1)
+            assert await worker_b.try_acquire("b2", now=1) is True
+
+        run(scenario())
+
+    def test_concurrent_acquires_respect_host_cap(self, tmp_path):
+        """Test that acquires racing through the worker thread never overshoot the caps."""
+        counter = HostCallCounter(str(tmp_path / "calls.db"), 3)
+
+        async def scenario():
+            governor = CallAdmissionController(max_active=2, max_queue=1, host_counter=counter)
+            results = await asyncio.gather(*(governor.try_acquire(f"s{i}", now=0) for i in range(5)))
+            assert results.count(True) == 2
+            assert governor.get_stats()["active_calls"] == 2
+
+        run(scenario())
+        assert counter.active_count() == 2
+
+    def test_dispatch_tasks_are_kept_until_done(self, tmp_path):
+        """Test that queued dispatches admitted through the host counter run to completion."""
+        started = []
+
+        async def scenario():
+            counter = HostCallCounter(str(tmp_path / "calls.db"), 1)
+            governor = CallAdmissionController(max_active=1, max_queue=2, host_counter=counter)
+            await governor.try_acquire("a", now=0)
+
+            async def dispatch(slot_id):
+                await asyncio.sleep(0.01)
+                started.append(slot_id)
+
+            ticket = governor.enqueue(dispatch, now=0)
+            await governor.release("a", now=1)
+            assert len(governor._tasks) == 1
+            await asyncio.gather(*governor._tasks)
+            assert started == [ticket["queue_id"]]
+            assert not governor._tasks
+
+        run(scenario())
+
+    def test_dead_worker_slots_purged(self, tmp_path):
+        """Test that slots left by a dead process are reclaimed when full."""
+        counter = HostCallCounter(str(tmp_path / "calls.db"), 1)
+        counter._connection().execute(
+            "INSERT INTO active_calls (slot_id, pid, started_at) VALUES ('ghost', 999999999, 0)"
+        )
+        assert counter.try_acquire("live") is True
+        assert counter.active_count() == 1
@@ -0,0 +1,197 @@
+"""
+Unit tests for per-call latency instrumentation.
+"""
+
+import json
+import random
+
+import pytest
+from call_metrics import CallLatencyProbe, CallMetricsRecorder, QuantileSketch, percentile
+
+
+def make_call():
+    """A probe driven through a short scripted call (times in ms since connect)."""
+    probe = CallLatencyProbe(connected_ms=1000)
+    probe.started("CA1", "MZ1", "es", 1850)
+    probe.selected("agent_1", "Street Realist", "voice_1")
+    probe.audio_in(now_ms=1400)
+    probe.agent_text("¿Quién llama", now_ms=2200)
+    probe.audio_out(now_ms=2500)
+    probe.agent_text("¿Quién llama?", now_ms=2600)
+    probe.audio_out(now_ms=2600)
+    probe.audio_in(now_ms=4000)
+    probe.audio_out(now_ms=4050)
+    probe.agent_text("Soy un herrero.", now_ms=4100)
+    return probe
+
+
+class TestCallLatencyProbe:
+    """Test cases for CallLatencyProbe."""
+
+    def test_export_schema(self):
+        """Test that a call exports the metrics/latency.ndjson fields relative to connect."""
+        record = make_call().export()
+        assert record["call_sid"] == "CA1"
+        assert record["agent"] == {
+            "agent_id": "agent_1", "agent_name": "Street Realist", "voice_id": "voice_1",
+            "lang": "es", "year": 1850,
+        }
+        assert record["setup_ms"] == 1200
+        assert record["first_audio_ms"] == 1500
+        assert record["first_sentence_delta_ms"] == 1600
+        assert record["last_agent_text_delta_ms"] == 3100
+        assert record["sentences_spoken"] == 2
+
+    def test_audio_stats(self):
+        """Test outbound interval stats and the minimum round trip."""
+        audio = make_call().export()["audio"]
+        assert audio["first_out_ms"] == 1500
+        assert audio["out_intervals_count"] == 2
+        assert audio["avg_out_interval_ms"] == (100 + 1450) / 2
+        assert audio["p50_out_interval_ms"] == 1450
+        assert audio["p95_out_interval_ms"] == 1450
+        assert audio["min_round_trip_ms"] == 50
+        assert QuantileSketch.from_dict(audio["out_interval_sketch"]).count == 2
+
+    def test_silent_call(self):
+        """Test that a call with no agent output exports nulls, not errors."""
+        record = CallLatencyProbe(connected_ms=0).export()
+        assert record["setup_ms"] is None
+        assert record["first_audio_ms"] is None
+        assert record["audio"]["avg_out_interval_ms"] is None
+        assert record["audio"]["p95_out_interval_ms"] is None
+
+    def test_percentile_rank(self):
+        """Test the nearest-rank percentile used for p95 intervals."""
+        values = list(range(1, 21))
+        assert percentile(values, 0.95) == 20
+        assert percentile(values, 0.5) == 11
+        assert percentile([], 0.95) is None
+
+
+class TestQuantileSketch:
+    """Test cases for the streaming quantile sketch."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Test p50/p95/p99 against exact nearest-rank percentiles."""
+        rng = random.Random(7)
+        values = [int(rng.lognormvariate(4, 1)) for _ in range(5000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        exact = sorted(values)
+        for fraction in (0.5, 0.95, 0.99):
+            assert sketch.quantile(fraction) == pytest.approx(percentile(exact, fraction), rel=0.011)
+        assert sketch.quantile(0.0) == exact[0]
+        assert sketch.quantile(1.0) == exact[-1]
+        assert sketch.mean == pytest.approx(sum(values) / len(values))
+
+    def test_memory_is_bounded(self):
+        """Test that the bucket count stays under max_bins and the tail stays accurate."""
+        sketch = QuantileSketch(relative_accuracy=0.01, max_bins=64)
+        for value in range(1, 100000):
+            sketch.add(value)
+        assert len(sketch.bins) <= 64
+        assert sketch.quantile(0.99) == pytest.approx(99000, rel=0.011)
+
+    def test_merge_matches_single_sketch(self):
+        """Test that merged per-call sketches equal one sketch over all values."""
+        combined, merged = QuantileSketch(), QuantileSketch()
+        for call in ([0, 20, 20, 40], [15, 3000], [60, 80, 100]):
+            sketch = QuantileSketch()
+            for value in call:
+                sketch.add(value)
+                combined.add(value)
+            merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict()))))
+        assert merged.summary() == combined.summary()
+        assert merged.zero_count == 1
+        with pytest.raises(ValueError):
+            merged.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+class TestCallMetricsRecorder:
+    """Test cases for the ring buffer and NDJSON flush."""
+
+    def test_disabled_returns_no_probe(self, tmp_path):
+        """Test that no probe is created when instrumentation is off."""
+        recorder = CallMetricsRecorder(str(tmp_path / "calls.ndjson"), enabled=False)
+        assert recorder.start_call() is None
+        recorder.finish_call(None)
+        assert recorder.get_stats()["recorded"] == 0
+
+    def test_flush_appends_ndjson(self, tmp_path):
+        """Test that finished calls are appended as one JSON object per line."""
+        path = tmp_path / "metrics" / "calls.ndjson"
+        recorder = CallMetricsRecorder(str(path), enabled=True)
+        probe = make_call()
+        recorder.finish_call(probe)
+        recorder.finish_call(probe)  # Idempotent: stop event and finally block
+        assert recorder.flush() == 1
+        recorder.finish_call(make_call())
+        assert recorder.flush() == 1
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)["setup_ms"] for line in lines] == [1200, 1200]
+        assert recorder.flush() == 0
+
+    def test_ring_buffer_drops_oldest(self, tmp_path):
+        """Test that overflow between flushes keeps the newest records and counts drops."""
+        recorder = CallMetricsRecorder(str(tmp_path / "calls.ndjson"), buffer_size=2, enabled=True)
+        for sid in ("CA1", "CA2", "CA3"):
+            recorder.record({"call_sid": sid})
+        assert [entry["call_sid"] for entry in recorder.drain()] == ["CA2", "CA3"]
+        assert recorder.get_stats()["dropped"] == 1
+
+    def test_failed_flush_keeps_records(self, tmp_path):
+        """Test that records survive a write error for the next flush."""
+        blocker = tmp_path / "not_a_dir"
+        blocker.write_text("")
+        recorder = CallMetricsRecorder(str(blocker / "calls.ndjson"), enabled=True)
+        recorder.record({"call_sid": "CA1"})
+        assert recorder.flush() == 0
+        assert recorder.get_stats()["flush_errors"] == 1
+        assert recorder.get_stats()["buffered"] == 1
+
+    def test_failed_flush_overflow_keeps_newest(self, tmp_path):
+        """Test that records arriving during a failed write win over the retried oldest ones."""
+        blocker = tmp_path / "not_a_dir"
+        blocker.write_text("")
+        recorder = CallMetricsRecorder(str(blocker / "calls.ndjson"), buffer_size=3, enabled=True)
+        for sid in ("CA1", "CA2", "CA3"):
+            recorder.record({"call_sid": sid})
+        drain = recorder.drain
+
+        def drain_then_record():
+            entries = drain()
+            recorder.record({"call_sid": "CA4"})
+            recorder.record({"call_sid": "CA5"})
+            return entries
+
+        recorder.drain = drain_then_record
+        assert recorder.flush() == 0
+        del recorder.drain
+        assert [entry["call_sid"] for entry in recorder.drain()] == ["CA3", "CA4", "CA5"]
+        assert recorder.get_stats()["dropped"] == 2
+
+    def test_hooks_feed_live_metrics(self, tmp_path):
+        """Test that outbound gaps and finished records reach the optional hooks."""
+        recorder = CallMetricsRecorder(str(tmp_path / "calls.ndjson"), enabled=True)
+        intervals, records = [], []
+        recorder.on_interval = intervals.append
+        recorder.on_record = records.append
+        probe = recorder.start_call()
+        probe.audio_out(now_ms=100)
+        probe.audio_out(now_ms=120)
+        probe.audio_out(now_ms=160)
+        recorder.finish_call(probe)
+        assert intervals == [20, 40]
+        assert len(records) == 1
+
+    def test_intervals_merged_per_agent_and_node(self, tmp_path):
+        """Test that finished calls feed the node and per-agent interval percentiles."""
+        recorder = CallMetricsRecorder(str(tmp_path / "calls.ndjson"), enabled=True)
+        recorder.finish_call(make_call())
+        recorder.finish_call(CallLatencyProbe(connected_ms=0))
+        stats = recorder.get_stats()["out_interval_ms"]
+        assert stats["node"]["count"] == 2
+        assert stats["by_agent"]["agent_1"]["p95"] == 1450
+        assert stats["by_agent"]["unknown"]["count"] == 0
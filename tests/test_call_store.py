@@ -0,0 +1,92 @@
+"""
+Unit tests for call_store module (batch call status queries and ETags).
+"""
+
+import time
+import pytest
+from call_store import (
+    CALL_STATUS, update_call_status, parse_call_sids, query_call_statuses,
+    compute_etag, etag_matches
+)
+
+
+class TestCallStore:
+    """Test cases for the call status store."""
+
+    def setup_method(self):
+        """Clear the call store before each test."""
+        CALL_STATUS.clear()
+
+    def test_update_call_status_stamps_times(self):
+        """Test that created_at is kept and updated_at moves forward."""
+        first = update_call_status("CA1", status="initiated")
+        created_at = first["created_at"]
+        second = update_call_status("CA1", status="answered")
+        assert second["created_at"] == created_at
+        assert second["updated_at"] >= created_at
+        assert CALL_STATUS["CA1"]["status"] == "answered"
+
+    def test_parse_call_sids(self):
+        """Test comma-separated SID parsing drops blanks and duplicates."""
+        assert parse_call_sids("CA1, CA2,,CA1 ") == ["CA1", "CA2"]
+        assert parse_call_sids("") == []
+        assert parse_call_sids(None) == []
+
+    def test_query_by_sids_reports_missing(self):
+        """Test lookup by explicit SIDs."""
+        update_call_status("CA1", status="initiated")
+        update_call_status("CA2", status="ended")
+        result = query_call_statuses(call_sids=["CA1", "CA2", "CA3"])
+        assert set(result["calls"]) == {"CA1", "CA2"}
+        assert result["missing"] == ["CA3"]
+
+    def test_query_by_filter(self):
+        """Test filtering by status and owning session."""
+        update_call_status("CA1", status="ended", session_id="s1")
+        update_call_status("CA2", status="answered", session_id="s1")
+        update_call_status("CA3", status="ended", session_id="s2")
+        result = query_call_statuses(status="ended", session_id="s1")
+        assert list(result["calls"]) == ["CA1"]
+
+    def test_query_by_time_window(self):
+        """Test filtering by updated_at window."""
+        update_call_status("CA1", status="ended")
+        CALL_STATUS["CA1"]["updated_at"] = time.time() - 3600
+        update_call_status("CA2", status="ended")
+        result = query_call_statuses(since=time.time() - 60)
+        assert list(result["calls"]) == ["CA2"]
+
+    def test_query_limit_newest_first(self):
+        """Test that filtered results are capped and ordered newest first."""
+        for i in range(5):
+            update_call_status(f"CA{i}", status="ended")
+            CALL_STATUS[f"CA{i}"]["updated_at"] = 1000 + i
+        result = query_call_statuses(limit=2)
+        assert list(result["calls"]) == ["CA4", "CA3"]
+
+    def test_query_returns_copies(self):
+        """Test that results do not alias the live store entries."""
+        update_call_status("CA1", status="initiated")
+        result = query_call_statuses(call_sids=["CA1"])
+        result["calls"]["CA1"]["status"] = "mutated"
+        assert CALL_STATUS["CA1"]["status"] == "initiated"
+
+    def test_etag_stable_and_sensitive(self):
+        """Test that the ETag only changes when the payload changes."""
+        payload = {"calls": {"CA1": {"status": "ended"}}, "missing": []}
+        same = {"missing": [], "calls": {"CA1": {"status": "ended"}}}
+        changed = {"calls": {"CA1": {"status": "answered"}}, "missing": []}
+        assert compute_etag(payload) == compute_etag(same)
+        assert compute_etag(payload) != compute_etag(changed)
+
+    @pytest.mark.parametrize("header,expected", [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc"', True),
+        ('"xyz"', False),
+        ("*", True),
+    ])
+    def test_etag_matches(self, header, expected):
+        """Test If-None-Match comparison."""
+        assert etag_matches(header, '"abc"') is expected
@@ -0,0 +1,107 @@
+"""
+Unit tests for call lifecycle tracing.
+"""
+
+import json
+
+import pytest
+from call_tracing import CallTrace, CallTracer
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    """A tracer exporting to a temporary NDJSON file."""
+    return CallTracer(str(tmp_path / "traces.ndjson"), buffer_size=10, max_open=3,
+                      open_ttl_seconds=60, enabled=True)
+
+
+class TestCallTrace:
+    """Test cases for spans on a single trace."""
+
+    def test_spans_are_offsets_from_first_event(self):
+        """Test that spans are ordered, in ms from the trace start, with durations."""
+        trace = CallTrace("CA1", started_at=100.0)
+        trace.add_span("twilio.create", 100.0, 100.25)
+        trace.mark("stream.start", at=101.5, lang="es")
+        trace.add_span("selection", 101.5, 101.502)
+        exported = trace.export()
+        assert [(s["name"], s["start_ms"], s["duration_ms"]) for s in exported["spans"]] == [
+            ("twilio.create", 0.0, 250.0),
+            ("stream.start", 1500.0, 0.0),
+            ("selection", 1500.0, 2.0),
+        ]
+        assert exported["spans"][1]["attrs"] == {"lang": "es"}
+        assert exported["duration_ms"] == 1502.0
+
+    def test_earlier_span_rebases_trace(self):
+        """Test that a span starting before the first event moves the trace start back."""
+        trace = CallTrace("CA1", started_at=10.0)
+        trace.mark("twiml.served", at=10.0)
+        trace.add_span("twilio.create", 9.5, 9.9)
+        spans = {s["name"]: s["start_ms"] for s in trace.export()["spans"]}
+        assert spans == {"twilio.create": 0.0, "twiml.served": 500.0}
+
+    def test_mark_once(self):
+        """Test that only the first agent text is recorded."""
+        trace = CallTrace("CA1", started_at=0.0)
+        trace.mark_once("agent.first_text", at=1.0)
+        trace.mark_once("agent.first_text", at=2.0)
+        assert [s["start_ms"] for s in trace.export()["spans"]] == [1000.0]
+
+    def test_span_context_records_errors(self):
+        """Test that the span context manager times the block and notes exceptions."""
+        trace = CallTrace("CA1")
+        with pytest.raises(RuntimeError):
+            with trace.span("conversation.construct", agent="a1"):
+                raise RuntimeError("boom")
+        span = trace.export()["spans"][0]
+        assert span["attrs"] == {"agent": "a1", "error": "RuntimeError"}
+
+
+class TestCallTracer:
+    """Test cases for correlating, finishing and querying traces."""
+
+    def test_same_call_sid_same_trace(self, tracer):
+        """Test that the HTTP and WebSocket sides share one trace per callSid."""
+        assert tracer.trace("CA1") is tracer.trace("CA1")
+        assert tracer.trace(None) is None
+        assert CallTracer(enabled=False).trace("CA1") is None
+
+    def test_finish_exports_once(self, tracer, tmp_path):
+        """Test that finishing is idempotent and the trace is flushed as NDJSON."""
+        trace = tracer.trace("CA1")
+        trace.mark("stream.stop")
+        tracer.finish(trace, outcome="completed")
+        tracer.finish(trace, outcome="error")
+        assert tracer.get("CA1")["outcome"] == "completed"
+        assert tracer.trace("CA1") is not trace  # A new call with a reused sid starts fresh
+        assert tracer.exporter.flush() == 1
+        assert tracer.get_stats()["export"]["flushed"] == 1
+        assert "out_interval_ms" not in tracer.get_stats()["export"]
+        record = json.loads((tmp_path / "traces.ndjson").read_text())
+        assert record["call_sid"] == "CA1"
+        assert record["spans"][0]["name"] == "stream.stop"
+
+    def test_open_traces_bounded_and_expired(self, tracer):
+        """Test eviction past max_open and expiry of calls that never streamed."""
+        for sid in ("CA1", "CA2", "CA3", "CA4"):
+            tracer.trace(sid)
+        assert tracer.get("CA1") is None
+        assert tracer.get_stats()["evicted"] == 1
+        assert tracer.sweep(now=tracer.trace("CA4").last_activity + 120) == 3
+        assert tracer.get("CA2")["outcome"] == "expired"
+        assert tracer.get_stats()["open"] == 0
+
+    def test_query_by_span_offset(self, tracer):
+        """Test finding calls where a stage ended late, newest first."""
+        for sid, first_audio in (("CA1", 1.2), ("CA2", 2.5), ("CA3", None)):
+            trace = tracer.trace(sid)
+            trace.t0 = 0.0
+            if first_audio is not None:
+                trace.mark("audio.first_out", at=first_audio)
+            trace.mark("stream.stop", at=3.0)
+            tracer.finish(trace)
+        assert [t["call_sid"] for t in tracer.query(span="audio.first_out")] == ["CA2", "CA1"]
+        assert [t["call_sid"] for t in tracer.query(span="audio.first_out", min_ms=2000)] == ["CA2"]
+        assert [t["call_sid"] for t in tracer.query(limit=1)] == ["CA3"]
+        assert tracer.query(include_open=True, min_ms=5000) == []
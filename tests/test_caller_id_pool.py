@@ -0,0 +1,103 @@
+"""
+Unit tests for the caller-ID pool (destination-aware from-number selection).
+"""
+
+import json
+import pytest
+from caller_id_pool import CallerIdPool, CallerNumber, parse_caller_numbers, build_caller_id_pool
+from errors import ConfigurationError
+from twilio_dispatch import TwilioCallDispatcher
+
+
+def make_pool(waits=None):
+    numbers = [
+        CallerNumber("+34910000001", "ES", ["34"]),
+        CallerNumber("+34910000002", "ES", ["34"]),
+        CallerNumber("+12125550001", "US-NY", ["1212"]),
+        CallerNumber("+15550000001", "US", ["1"]),
+        CallerNumber("+15559999999", "US"),  # global fallback
+    ]
+    waits = waits or {}
+    return CallerIdPool(numbers, wait_fn=lambda number: waits.get(number, 0.0))
+
+
+class TestCallerIdPool:
+    """Test cases for CallerIdPool."""
+
+    def test_local_number_preferred(self):
+        """Test that a destination gets a number tagged with its prefix."""
+        assert make_pool().select("+34 600 000 000").number == "+34910000001"
+
+    def test_longest_prefix_wins(self):
+        """Test that a more specific prefix beats the country prefix."""
+        pool = make_pool()
+        assert pool.select("+12125551234").number == "+12125550001"
+        assert pool.select("+13055551234").number == "+15550000001"
+
+    def test_unknown_destination_uses_global(self):
+        """Test that untagged numbers serve destinations without a local number."""
+        assert make_pool().select("+447700900000").number == "+15559999999"
+
+    def test_falls_back_when_saturated(self):
+        """Test fallback across the pool when preferred numbers are busy."""
+        pool = make_pool({"+34910000001": 1.0})
+        assert pool.select("+34600000000").number == "+34910000002"
+        pool = make_pool({"+34910000001": 1.0, "+34910000002": 1.0})
+        assert pool.select("+34600000000").number == "+15559999999"
+
+    def test_all_saturated_picks_shortest_wait(self):
+        """Test that the least-loaded number is used when all are busy."""
+        waits = {n: 5.0 for n in ["+34910000001", "+34910000002", "+12125550001", "+15550000001", "+15559999999"]}
+        waits["+12125550001"] = 0.5
+        assert make_pool(waits).select("+34600000000").number == "+12125550001"
+        assert make_pool(waits).min_wait_seconds() == 0.5
+
+    def test_candidates_include_whole_pool(self):
+        """Test that every number is a candidate, local ones first."""
+        candidates = [c.number for c in make_pool().candidates("+34600000000")]
+        assert candidates[:2] == ["+34910000001", "+34910000002"]
+        assert len(candidates) == 5
+
+
+class TestParseCallerNumbers:
+    """Test cases for TWILIO_NUMBER_POOL parsing."""
+
+    def test_fallback_to_single_number(self):
+        """Test that an empty pool uses TWILIO_PHONE_NUMBER."""
+        numbers = parse_caller_numbers("", "+15550000000")
+        assert [n.number for n in numbers] == ["+15550000000"]
+        assert numbers[0].prefixes == []
+        assert parse_caller_numbers("", None) == []
+
+    def test_parse_pool(self):
+        """Test parsing prefixes and per-number budgets."""
+        raw = json.dumps([{"number": "+34910000001", "country": "ES", "prefixes": ["+34"], "cps": 2, "burst": 3}])
+        entry = parse_caller_numbers(raw)[0]
+        assert entry.prefixes == ["34"]
+        assert entry.cps == 2.0 and entry.burst == 3
+
+    @pytest.mark.parametrize("raw", [
+        "not json",
+        json.dumps({"number": "+34910000001"}),
+        json.dumps([{"number": "34910000001"}]),
+        json.dumps([{"number": "+34910000001", "prefixes": ["3a"]}]),
+        json.dumps([{"number": "+34910000001", "prefixes": "+34"}]),
+        json.dumps([{"number": "+34910000001", "prefixes": [34]}]),
+        json.dumps([{"number": "+34910000001", "cps": 0}]),
+        json.dumps([{"number": "+34910000001", "cps": -1}]),
+        json.dumps([{"number": "+34910000001", "cps": "fast"}]),
+        json.dumps([{"number": "+34910000001", "cps": 1, "burst": 0}]),
+    ])
+    def test_invalid_pool(self, raw):
+        """Test that misconfigured pools fail loudly at startup."""
+        with pytest.raises(ConfigurationError):
+            parse_caller_numbers(raw)
+
+    def test_build_registers_rate_budgets(self):
+        """Test that per-number CPS budgets reach the dispatcher."""
+        dispatcher = TwilioCallDispatcher(cps=1, burst=1)
+        raw = json.dumps([{"number": "+34910000001", "prefixes": ["34"], "cps": 5, "burst": 2}])
+        pool = build_caller_id_pool(raw, None, dispatcher)
+        assert pool.select("+34600000000").number == "+34910000001"
+        stats = dispatcher.get_stats()["numbers"]["+34910000001"]
+        assert stats["cps"] == 5 and stats["burst"] == 2
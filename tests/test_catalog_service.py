@@ -0,0 +1,175 @@
+"""
+Unit tests for the hot-reloadable voice/agent/first-message catalog.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+from catalog_service import CatalogService, catalog_watcher
+from era_config import ERA_CATALOG_FILE, EraCatalogLoader, get_era_catalog
+from voice_latency import VoiceLatencyTracker
+
+DATA_DIR = Path(__file__).parent.parent / "apps" / "server" / "shared_py" / "data"
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    """Copies of the shipped voices, agents and first messages files."""
+    files = {}
+    for name in ("voices", "agents", "first_messages"):
+        files[name] = tmp_path / f"{name}.json"
+        shutil.copy(DATA_DIR / f"{name}.json", files[name])
+    return files
+
+
+def make_service(data_files, latency_tracker=None):
+    return CatalogService(
+        str(data_files["voices"]), str(data_files["agents"]), str(data_files["first_messages"]),
+        latency_tracker=latency_tracker,
+    )
+
+
+def rewrite(path, mutate):
+    """Apply mutate() to a JSON file and bump its mtime so the change is always seen."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    mutate(data)
+    path.write_text(json.dumps(data), encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestCatalogService:
+    """Test cases for CatalogService."""
+
+    def test_shipped_data_is_valid(self, data_files, agent_env):
+        """Test that the bundled data files load without errors or warnings."""
+        service = make_service(data_files)
+        assert service.last_errors == []
+        assert service.last_warnings == []
+        assert service.get_stats()["first_message_eras"] == len(get_era_catalog()["eras"])
+
+    def test_unchanged_files_do_not_reload(self, data_files):
+        """Test that reload_if_changed is a no-op while the files are untouched."""
+        service = make_service(data_files)
+        assert service.reload_if_changed() is None
+        assert service.reloads == 0
+
+    def test_changed_file_swaps_snapshot(self, data_files):
+        """Test that an edited file produces a new snapshot while the old one stays usable."""
+        service = make_service(data_files)
+        old = service.current
+        rewrite(data_files["first_messages"], lambda d: d["renaissance"]["en"].append("Hello from the future?"))
+
+        result = service.reload_if_changed()
+        assert result["reloaded"] is True
+        assert service.current is not old
+        assert "Hello from the future?" in service.current.first_messages.first_messages["renaissance"]["en"]
+        # A call that captured the old snapshot keeps using it unchanged
+        assert "Hello from the future?" not in old.first_messages.first_messages["renaissance"]["en"]
+        assert old.voices.get_random_voice_for_language("en") is not None
+
+    def test_missing_greeting_rejects_reload(self, data_files):
+        """Test that an era without greetings for a language keeps the current snapshot."""
+        service = make_service(data_files)
+        old = service.current
+        rewrite(data_files["first_messages"], lambda d: d["renaissance"].pop("es"))
+
+        result = service.reload_if_changed()
+        assert result["reloaded"] is False
+        assert any("'renaissance'" in error and "'es'" in error for error in result["errors"])
+        assert service.current is old
+        assert service.reload_errors == 1
+        # The same broken files are not retried on the next tick
+        assert service.reload_if_changed() is None
+
+    def test_duplicate_voice_id_is_error(self, data_files):
+        """Test that a voice id listed twice rejects the reload."""
+        service = make_service(data_files)
+        rewrite(data_files["voices"], lambda d: d["english"].append(dict(d["spanish"][0])))
+
+        result = service.reload()
+        assert result["reloaded"] is False
+        assert any("duplicate id" in error for error in result["errors"])
+
+    def test_agent_without_env_var_is_error(self, data_files):
+        """Test that an agent entry missing env_var rejects the reload."""
+        service = make_service(data_files)
+        rewrite(data_files["agents"], lambda d: d["agents"].append({"name": "Nameless"}))
+
+        assert service.reload()["reloaded"] is False
+
+    def test_unknown_era_only_warns(self, data_files):
+        """Test that greetings for an era not in the era catalog are a warning, not an error."""
+        service = make_service(data_files)
+        rewrite(data_files["first_messages"], lambda d: d.update({"atlantis": {"en": ["Beep?"], "es": ["¿Bip?"]}}))
+
+        result = service.reload()
+        assert result["reloaded"] is True
+        assert any("atlantis" in warning for warning in result["warnings"])
+
+    def test_misconfigured_agents_only_warn(self, data_files, monkeypatch):
+        """Test that agents whose ID env var is unset are excluded with a warning."""
+        for i in range(1, 5):
+            monkeypatch.delenv(f"ELEVENLABS_AGENT_ID_{i}", raising=False)
+        monkeypatch.setenv("ELEVENLABS_AGENT_ID_2", "agent_two")
+        service = make_service(data_files)
+        assert service.last_errors == []
+        assert sum("excluded" in warning for warning in service.last_warnings) == 3
+        assert service.get_stats()["agents"] == 1
+
+    def test_latency_tracker_survives_reload(self, data_files):
+        """Test that voice latency estimates are shared across catalog reloads."""
+        tracker = VoiceLatencyTracker(persist_file=None)
+        service = make_service(data_files, latency_tracker=tracker)
+        voice_id = service.current.voices.voices_data["english"][0]["id"]
+        service.current.voices.record_voice_latency(voice_id, 400)
+
+        rewrite(data_files["agents"], lambda d: None)
+        assert service.reload_if_changed()["reloaded"] is True
+        assert service.current.voices.latency_tracker is tracker
+        assert tracker.get(voice_id).samples == 1
+
+    def test_watcher_reloads_off_the_event_loop(self, data_files):
+        """Test that the watcher reloads in a worker thread, not on the loop's thread."""
+        service = make_service(data_files)
+        reload_threads = []
+        reload_if_changed = service.reload_if_changed
+
+        def tracked_reload():
+            reload_threads.append(threading.get_ident())
+            return reload_if_changed()
+
+        service.reload_if_changed = tracked_reload
+        rewrite(data_files["agents"], lambda d: None)
+
+        async def scenario():
+            task = asyncio.create_task(catalog_watcher(service, interval_seconds=0.01))
+            while not service.reloads:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+        assert reload_threads and loop_thread not in reload_threads
+
+    def test_era_rename_rejected_while_first_messages_use_it(self, data_files, tmp_path):
+        """Test that an era reload is cross-checked against the current first messages."""
+        service = make_service(data_files)
+        source, compiled = tmp_path / "eras.json", tmp_path / "eras.compiled.json"
+        catalog = json.loads(Path(ERA_CATALOG_FILE).read_text(encoding="utf-8"))
+        source.write_text(json.dumps(catalog), encoding="utf-8")
+        loader = EraCatalogLoader(str(source), str(compiled), validate=service.era_reference_errors)
+        current = loader.get()
+
+        renamed = next(era for era in catalog["eras"] if era["era_name"] == "renaissance")
+        renamed["era_name"] = "rebirth"
+        source.write_text(json.dumps(catalog), encoding="utf-8")
+        result = loader.reload()
+        assert result["reloaded"] is False
+        assert "era 'rebirth' has no" in result["error"]
+        assert loader.get() is current
@@ -0,0 +1,124 @@
+"""
+Unit tests for the externalized era catalog (validation, compile step, hot reload).
+"""
+
+import copy
+import json
+import os
+from pathlib import Path
+
+import pytest
+from era_config import (
+    ERA_CATALOG_FILE, EraCatalogLoader, compile_era_catalog, compile_era_source,
+    validate_era_entries
+)
+from errors import ConfigurationError
+
+
+@pytest.fixture
+def era_entries():
+    """The shipped era entries."""
+    return json.loads(Path(ERA_CATALOG_FILE).read_text(encoding="utf-8"))["eras"]
+
+
+def write_catalog(path, entries):
+    path.write_text(json.dumps({"eras": entries}), encoding="utf-8")
+
+
+class TestEraValidation:
+    """Test cases for era catalog validation."""
+
+    def test_shipped_catalog_is_valid(self, era_entries):
+        """Test that the bundled eras.json passes validation."""
+        assert validate_era_entries(era_entries) == []
+
+    def test_gap_and_overlap(self, era_entries):
+        """Test that range gaps and overlaps are reported."""
+        entries = copy.deepcopy(era_entries)
+        entries[1]["start_year"] = -700
+        entries[3]["end_year"] = 1100
+        errors = validate_era_entries(entries)
+        assert any("Gap" in e for e in errors)
+        assert any("overlaps" in e for e in errors)
+
+    def test_languages(self, era_entries):
+        """Test that missing and unsupported languages are reported."""
+        entries = copy.deepcopy(era_entries)
+        del entries[0]["expressions"]["es"]
+        entries[1]["expressions"]["fr"] = ["a", "b", "c"]
+        errors = validate_era_entries(entries)
+        assert any("'es' expressions" in e for e in errors)
+        assert any("unsupported language 'fr'" in e for e in errors)
+
+    def test_voice_settings_bounds(self, era_entries):
+        """Test voice-settings bounds, required keys and unknown keys."""
+        entries = copy.deepcopy(era_entries)
+        entries[0]["voice_settings"]["speed"] = 1.5
+        del entries[1]["voice_settings"]["stability"]
+        entries[2]["voice_settings"]["pitch"] = 0.5
+        errors = validate_era_entries(entries)
+        assert any("speed=1.5" in e for e in errors)
+        assert any("missing voice setting 'stability'" in e for e in errors)
+        assert any("unknown voice setting 'pitch'" in e for e in errors)
+
+    def test_compile_rejects_invalid(self):
+        """Test that compiling an invalid document raises ConfigurationError."""
+        with pytest.raises(ConfigurationError):
+            compile_era_source(b"{not json")
+        with pytest.raises(ConfigurationError):
+            compile_era_source(b'{"eras": []}')
+
+
+class TestEraCatalogLoader:
+    """Test cases for lazy loading and hot reload."""
+
+    def test_compile_then_load_artifact(self, tmp_path, era_entries):
+        """Test that a fresh compiled artifact is loaded without recompiling."""
+        source, compiled = tmp_path / "eras.json", tmp_path / "eras.compiled.json"
+        write_catalog(source, era_entries)
+        artifact = compile_era_catalog(str(source), str(compiled))
+        loader = EraCatalogLoader(str(source), str(compiled))
+        assert loader.get().version == artifact["version"]
+        assert loader.loaded_from == str(compiled)
+
+    def test_stale_artifact_is_rebuilt(self, tmp_path, era_entries):
+        """Test that an artifact compiled from other source content is ignored."""
+        source, compiled = tmp_path / "eras.json", tmp_path / "eras.compiled.json"
+        write_catalog(source, era_entries)
+        compile_era_catalog(str(source), str(compiled))
+        era_entries[0]["description"] = "Edited"
+        write_catalog(source, era_entries)
+        loader = EraCatalogLoader(str(source), str(compiled))
+        assert loader.get().configs[(-1500, -800)].description == "Edited"
+        assert loader.loaded_from == str(source)
+        assert json.loads(compiled.read_text())["source_digest"] != ""
+
+    def test_reload_swaps_catalog(self, tmp_path, era_entries):
+        """Test that a changed file is swapped in while old payloads stay usable."""
+        source, compiled = tmp_path / "eras.json", tmp_path / "eras.compiled.json"
+        write_catalog(source, era_entries)
+        loader = EraCatalogLoader(str(source), str(compiled))
+        old = loader.get()
+        old_payload = old.payloads[("renaissance", "en")]
+
+        era_entries[6]["time_period"] = "Rebirth"
+        write_catalog(source, era_entries)
+        os.utime(source, ns=(1, 1))  # Guarantee a different mtime
+        assert loader.reload_if_changed()["reloaded"] is True
+        assert loader.get() is not old
+        assert loader.get().configs[(1400, 1600)].time_period == "Rebirth"
+        assert old_payload.time_period == "Renaissance"
+        assert loader.reload_if_changed() is None
+
+    def test_invalid_reload_keeps_current(self, tmp_path, era_entries):
+        """Test that a broken edit never replaces the live catalog."""
+        source, compiled = tmp_path / "eras.json", tmp_path / "eras.compiled.json"
+        write_catalog(source, era_entries)
+        loader = EraCatalogLoader(str(source), str(compiled))
+        current = loader.get()
+        era_entries[0]["end_year"] = -900  # Opens a gap
+        write_catalog(source, era_entries)
+        result = loader.reload()
+        assert result["reloaded"] is False and "Gap" in result["error"]
+        assert loader.get() is current
+        assert loader.get_stats()["reload_errors"] == 1
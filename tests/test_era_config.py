@@ -154,3 +154,128 @@ class TestEraConfig:
         # Should have different expressions
         assert medieval['expression_1'] != modern['expression_1']
         assert modern['expression_1'] != future['expression_1']
+
+
+class TestEraCatalog:
+    """Test cases for the public era catalog served to clients."""
+
+    def test_catalog_covers_all_eras(self):
+        """Test that every era is listed in year order without prompt context."""
+        from era_config import get_era_catalog
+        catalog = get_era_catalog()
+        assert len(catalog["eras"]) == len(ERA_CONFIGS)
+        starts = [era["start_year"] for era in catalog["eras"]]
+        assert starts == sorted(starts)
+        assert catalog["min_year"] == -1500 and catalog["max_year"] == 3000
+        assert all("context_hint" not in era for era in catalog["eras"])
+
+    def test_catalog_version_is_stable(self):
+        """Test that the catalog is built once with a content version."""
+        from era_config import get_era_catalog
+        assert get_era_catalog() is get_era_catalog()
+        assert len(get_era_catalog()["version"]) == 16
+
+
+def _linear_era_lookup(year):
+    """Reference: the original first-match scan with inclusive bounds, clamped."""
+    for (start_year, end_year), config in ERA_CONFIGS.items():
+        if start_year <= year <= end_year:
+            return config
+    return ERA_CONFIGS[(2500, 3000)] if year > 3000 else ERA_CONFIGS[(-1500, -800)]
+
+
+class TestEraIndex:
+    """Test cases for the bisect-indexed era lookup."""
+
+    def test_every_year_matches_reference(self):
+        """Test every year from -1500 to 3000 against the linear scan."""
+        for year in range(-1500, 3001):
+            assert get_era_config(year) is _linear_era_lookup(year), year
+
+    def test_every_year_in_its_half_open_range(self):
+        """Test that each resolved year lies in (start, end] of its era."""
+        ranges = {config.era_name: key for key, config in ERA_CONFIGS.items()}
+        for year in range(-1499, 3001):
+            start_year, end_year = ranges[get_era_config(year).era_name]
+            assert start_year < year <= end_year, year
+
+    def test_boundaries_belong_to_ending_era(self):
+        """Test that boundary years resolve to the era ending there."""
+        assert get_era_config(1300).era_name == "high_medieval"
+        assert get_era_config(1301).era_name == "late_medieval"
+        assert get_era_config(2030).era_name == "mobile_social_cloud"
+
+    def test_clamps_out_of_range(self):
+        """Test clamping below and above the covered span."""
+        from era_config import ERA_INDEX
+        assert ERA_INDEX.min_year == -1500 and ERA_INDEX.max_year == 3000
+        assert get_era_config(-100000).era_name == "late_bronze_early_iron"
+        assert get_era_config(100000).era_name == "far_future"
+
+    def test_gap_detected(self):
+        """Test that a gap between eras fails at build time."""
+        from era_config import EraIndex
+        from errors import ConfigurationError
+        era = ERA_CONFIGS[(0, 500)]
+        with pytest.raises(ConfigurationError, match="Gap"):
+            EraIndex({(0, 500): era, (600, 700): era})
+
+    def test_overlap_detected(self):
+        """Test that overlapping eras fail at build time."""
+        from era_config import EraIndex
+        from errors import ConfigurationError
+        era = ERA_CONFIGS[(0, 500)]
+        with pytest.raises(ConfigurationError, match="overlaps"):
+            EraIndex({(0, 500): era, (400, 700): era})
+        with pytest.raises(ConfigurationError):
+            EraIndex({(5, 5): era})
+
+    def test_session_variables_always_resolve(self):
+        """Test that session variables never hit a missing fallback era."""
+        for year in (-5000, 2000, 2030, 9999):
+            assert get_era_session_variables(year, "en")["era_name"]
+
+
+class TestEraSessionPayloads:
+    """Test cases for the precomputed per-(era, language) session payloads."""
+
+    def test_all_eras_and_languages_precomputed(self):
+        """Test that every era x supported language is built at import."""
+        from era_config import SESSION_PAYLOADS, SUPPORTED_LANGUAGES
+        assert len(SESSION_PAYLOADS) == len(ERA_CONFIGS) * len(SUPPORTED_LANGUAGES)
+
+    def test_payload_is_shared_and_frozen(self):
+        """Test that calls in the same era share one read-only payload."""
+        from era_config import get_era_session_payload
+        payload = get_era_session_payload(1350, "es")
+        assert payload is get_era_session_payload(1399, "es")
+        with pytest.raises(TypeError):
+            payload.dynamic_variables["era_name"] = "changed"
+        with pytest.raises(TypeError):
+            payload.tts_override["speed"] = 2.0
+
+    def test_dynamic_variables_per_call(self):
+        """Test that per-call fields are added without touching the shared payload."""
+        from era_config import get_era_session_payload, build_dynamic_variables
+        payload = get_era_session_payload(1580, "en")
+        variables = build_dynamic_variables(payload, 1580, {"gender": "female", "age_range": "adult"})
+        assert variables["era_year"] == 1580
+        assert variables["voice_gender"] == "female"
+        assert "voice_settings" not in variables
+        assert "era_year" not in payload.dynamic_variables
+
+    def test_conversation_override(self):
+        """Test the ElevenLabs override shape and that 'style' is excluded."""
+        from era_config import get_era_session_payload, build_conversation_override
+        payload = get_era_session_payload(1580, "en")
+        override = build_conversation_override(payload, "voice123", "Hello!")
+        assert override["agent"] == {"first_message": "Hello!"}
+        assert override["tts"]["voice_id"] == "voice123"
+        assert set(override["tts"]) == {"voice_id", "stability", "similarity_boost", "speed"}
+        assert build_conversation_override(payload) == {"agent": {}, "tts": dict(payload.tts_override)}
+
+    def test_session_variables_compatible(self):
+        """Test that the legacy dict matches the payload plus year and voice settings."""
+        variables = get_era_session_variables(1350, "es")
+        variables["voice_settings"]["speed"] = 99  # Mutating the copy must not leak
+        assert get_era_session_variables(1350, "es")["voice_settings"]["speed"] != 99
@@ -0,0 +1,94 @@
+"""
+Unit tests for the JWT signing key ring.
+"""
+
+import json
+import pytest
+from errors import ConfigurationError
+from jwt_keys import JwtKey, KeyRing, derive_kid, parse_jwt_keys, load_key_ring, load_host_key
+
+
+class TestKeyRing:
+    """Test cases for KeyRing."""
+
+    def test_first_key_signs(self):
+        """Test that the first key is the active signing key."""
+        ring = KeyRing([JwtKey("new", "s-new"), JwtKey("old", "s-old")])
+        assert ring.active.kid == "new"
+        assert ring.verification_secret("old") == "s-old"
+
+    def test_unknown_kid_rejected(self):
+        """Test that tokens with an unknown kid have no verification key."""
+        ring = KeyRing([JwtKey("a", "s")])
+        assert ring.verification_secret("b") is None
+
+    def test_legacy_token_uses_active_key(self):
+        """Test that tokens minted before kids verify with the active key."""
+        ring = KeyRing([JwtKey("a", "s")])
+        assert ring.verification_secret(None) == "s"
+
+    def test_retired_key_ages_out(self):
+        """Test that a rotated-out key stops verifying after verify_until."""
+        ring = KeyRing([JwtKey("new", "s-new"), JwtKey("old", "s-old", verify_until=100)])
+        assert ring.verification_secret("old", now=99) == "s-old"
+        assert ring.verification_secret("old", now=100) is None
+
+    def test_verify_until_lookup(self):
+        """Test the retirement time used to cap cached tokens."""
+        ring = KeyRing([JwtKey("new", "s-new"), JwtKey("old", "s-old", verify_until=1000)])
+        assert ring.verify_until("old") == 1000
+        assert ring.verify_until("new") is None
+        assert ring.verify_until(None) is None
+        assert ring.verify_until("gone") is None
+
+    def test_duplicate_kid(self):
+        """Test that duplicate kids are a configuration error."""
+        with pytest.raises(ConfigurationError):
+            KeyRing([JwtKey("a", "1"), JwtKey("a", "2")])
+
+
+class TestLoadKeyRing:
+    """Test cases for key ring loading."""
+
+    def test_from_jwt_keys(self):
+        """Test loading several keys from JWT_KEYS."""
+        raw = json.dumps([{"kid": "k2", "secret": "two"}, {"kid": "k1", "secret": "one", "verify_until": 5}])
+        ring = load_key_ring(raw, "ignored")
+        assert ring.source == "JWT_KEYS"
+        assert ring.kids() == ["k2", "k1"]
+
+    def test_from_jwt_secret(self):
+        """Test that a bare JWT_SECRET gets a stable derived kid."""
+        ring = load_key_ring("", "secret")
+        assert ring.active.kid == derive_kid("secret")
+        assert "secret" not in ring.active.kid
+
+    @pytest.mark.parametrize("raw", ["nope", "[]", json.dumps([{"kid": "a"}])])
+    def test_invalid_jwt_keys(self, raw):
+        """Test that malformed JWT_KEYS fails at startup."""
+        with pytest.raises(ConfigurationError):
+            parse_jwt_keys(raw)
+
+    def test_host_key_shared(self, tmp_path):
+        """Test that workers on one host load the same generated key."""
+        path = str(tmp_path / "jwt.key")
+        first = load_key_ring("", "", path)
+        second = load_key_ring("", "", path)
+        assert first.source == "host_key_file"
+        assert first.active.secret == second.active.secret
+        assert load_host_key(path) == first.active.secret
+
+
+class TestTokenRoundTrip:
+    """Tokens signed by one worker verify on another sharing the ring."""
+
+    def test_rotation(self):
+        """Test that tokens signed with the old key verify after rotation."""
+        jwt = pytest.importorskip("jwt")
+        old_ring = KeyRing([JwtKey("k1", "one" * 12)])
+        token = jwt.encode({"sub": "x"}, old_ring.active.secret, algorithm="HS256",
+                           headers={"kid": old_ring.active.kid})
+
+        rotated = KeyRing([JwtKey("k2", "two" * 12), JwtKey("k1", "one" * 12)])
+        kid = jwt.get_unverified_header(token)["kid"]
+        assert jwt.decode(token, rotated.verification_secret(kid), algorithms=["HS256"]) == {"sub": "x"}
@@ -0,0 +1,87 @@
+"""
+Unit tests for loop-lag based load shedding.
+"""
+
+import asyncio
+import time
+import pytest
+from load_shedding import LoadShedGate, LoopLagMonitor
+
+
+class TestLoadShedGate:
+    """Test cases for the hysteresis gate."""
+
+    def test_hysteresis(self):
+        """Test that a gate sheds above shed_ms and recovers only below recover_ms."""
+        gate = LoadShedGate("calls", shed_ms=100, recover_ms=50)
+        assert gate.update(80) is False and gate.shedding is False
+        assert gate.update(120) is True and gate.shedding is True
+        assert gate.update(80) is False and gate.shedding is True
+        assert gate.update(40) is True and gate.shedding is False
+        assert gate.transitions == 2
+
+    def test_invalid_thresholds(self):
+        """Test that recover above shed is rejected."""
+        with pytest.raises(ValueError):
+            LoadShedGate("bad", shed_ms=50, recover_ms=100)
+
+
+class TestLoopLagMonitor:
+    """Test cases for LoopLagMonitor."""
+
+    def _monitor(self):
+        monitor = LoopLagMonitor(interval_ms=10)
+        monitor.add_gate("outbound_call", 100, 50)
+        monitor.add_gate("login", 300, 150)
+        return monitor
+
+    def test_gates_shed_independently(self):
+        """Test that calls are shed before logins."""
+        monitor = self._monitor()
+        for _ in range(20):
+            monitor.record(200)
+        assert monitor.should_shed("outbound_call") is True
+        assert monitor.should_shed("login") is False
+        stats = monitor.get_stats()["gates"]
+        assert stats["outbound_call"]["shed_total"] == 1
+        assert stats["login"]["admitted_total"] == 1
+
+    def test_single_spike_is_smoothed(self):
+        """Test that one slow tick does not trip the gate."""
+        monitor = self._monitor()
+        monitor.record(200)
+        assert monitor.should_shed("outbound_call") is False
+        assert monitor.max_lag_ms == 200
+
+    def test_recovers_after_lag_drops(self):
+        """Test recovery once smoothed lag falls below recover_ms."""
+        monitor = self._monitor()
+        for _ in range(20):
+            monitor.record(200)
+        for _ in range(20):
+            monitor.record(0)
+        assert monitor.should_shed("outbound_call") is False
+
+    def test_disabled_and_unknown_gates(self):
+        """Test that a disabled monitor or unknown gate never sheds."""
+        monitor = self._monitor()
+        for _ in range(20):
+            monitor.record(1000)
+        assert monitor.should_shed("media_stream") is False
+        monitor.enabled = False
+        assert monitor.should_shed("outbound_call") is False
+
+    def test_run_measures_blocking(self):
+        """Test that blocking the loop shows up as lag."""
+        monitor = self._monitor()
+
+        async def scenario():
+            task = asyncio.create_task(monitor.run())
+            await asyncio.sleep(0.02)
+            time.sleep(0.08)  # Block the loop
+            await asyncio.sleep(0.03)
+            task.cancel()
+
+        asyncio.run(scenario())
+        assert monitor.samples >= 2
+        assert monitor.max_lag_ms >= 40
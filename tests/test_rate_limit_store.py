@@ -0,0 +1,257 @@
+"""
+Unit tests for the GCRA rate limit store.
+"""
+
+import pytest
+from rate_limit_store import (
+    MemoryRateLimitStore, SQLiteRateLimitStore, create_rate_limit_store,
+    check_dimensions, dimension_limits, rate_limit_key, gcra_state, gcra_update, forwarded_client_ip
+)
+
+LIMIT = 5
+WINDOW = 300.0
+INTERVAL = WINDOW / LIMIT
+
+
+class TestMemoryRateLimitStore:
+    """Test cases for MemoryRateLimitStore."""
+
+    def setup_method(self):
+        self.store = MemoryRateLimitStore()
+
+    def test_burst_up_to_limit(self):
+        """Test that a full burst is allowed and the next call is blocked."""
+        for i in range(LIMIT):
+            result = self.store.check("t", LIMIT, WINDOW, now=1000.0)
+            assert result['allowed'] is True
+            assert result['current_count'] == i + 1
+            assert result['remaining'] == LIMIT - (i + 1)
+
+        result = self.store.check("t", LIMIT, WINDOW, now=1000.0)
+        assert result['allowed'] is False
+        assert result['current_count'] == LIMIT
+        assert result['remaining'] == 0
+
+    def test_slot_frees_after_emission_interval(self):
+        """Test that one slot frees every window/limit seconds."""
+        for _ in range(LIMIT):
+            self.store.check("t", LIMIT, WINDOW, now=1000.0)
+        blocked = self.store.check("t", LIMIT, WINDOW, now=1000.0)
+        assert blocked['reset_time'] == pytest.approx(1000.0 + INTERVAL)
+
+        assert self.store.check("t", LIMIT, WINDOW, now=1000.0 + INTERVAL - 1)['allowed'] is False
+        assert self.store.check("t", LIMIT, WINDOW, now=1000.0 + INTERVAL)['allowed'] is True
+
+    def test_full_reset_after_window(self):
+        """Test that the whole quota is back after one window."""
+        for _ in range(LIMIT):
+            self.store.check("t", LIMIT, WINDOW, now=1000.0)
+        result = self.store.check("t", LIMIT, WINDOW, now=1000.0 + WINDOW, consume=False)
+        assert result['current_count'] == 0
+        assert result['remaining'] == LIMIT
+
+    def test_peek_does_not_consume(self):
+        """Test that consume=False leaves the quota untouched."""
+        for _ in range(3):
+            result = self.store.check("t", LIMIT, WINDOW, now=1000.0, consume=False)
+            assert result['current_count'] == 0
+            assert result['allowed'] is True
+        assert "t" not in self.store
+
+    def test_independent_keys(self):
+        """Test that keys are limited independently."""
+        for _ in range(LIMIT):
+            self.store.check("a", LIMIT, WINDOW, now=1000.0)
+        assert self.store.check("a", LIMIT, WINDOW, now=1000.0)['allowed'] is False
+        assert self.store.check("b", LIMIT, WINDOW, now=1000.0)['allowed'] is True
+
+    def test_cleanup_removes_drained_keys(self):
+        """Test that cleanup drops keys whose quota has fully recovered."""
+        self.store.check("old", LIMIT, WINDOW, now=1000.0)
+        self.store.check("new", LIMIT, WINDOW, now=1000.0 + WINDOW)
+        removed = self.store.cleanup(now=1000.0 + WINDOW)
+        assert removed == 1
+        assert "old" not in self.store
+        assert "new" in self.store
+
+    def test_evict_expired_respects_budget(self):
+        """Test that eviction stops after examining `budget` due keys."""
+        for i in range(10):
+            self.store.check(f"k{i}", LIMIT, WINDOW, now=1000.0 + i)
+        removed = self.store.evict_expired(now=1000.0 + WINDOW + 100, budget=3)
+        assert removed == 3
+        assert len(self.store) == 7
+        # Earliest-expiring keys go first
+        assert "k0" not in self.store and "k3" in self.store
+
+    def test_evict_expired_skips_keys_not_due(self):
+        """Test that keys used again after insertion are rescheduled, not dropped."""
+        self.store.check("busy", LIMIT, WINDOW, now=1000.0)
+        self.store.check("busy", LIMIT, WINDOW, now=1000.0 + INTERVAL - 1)
+        # First heap entry is due, but the key's current TAT is not
+        assert self.store.evict_expired(now=1000.0 + INTERVAL + 1) == 0
+        assert "busy" in self.store
+        assert len(self.store._expiry_heap) == 1
+        assert self.store.evict_expired(now=1000.0 + 3 * INTERVAL) == 1
+        assert "busy" not in self.store
+
+    def test_heap_has_one_entry_per_key(self):
+        """Test that repeated calls do not grow the expiry heap."""
+        for _ in range(LIMIT):
+            self.store.check("t", LIMIT, WINDOW, now=1000.0)
+        assert len(self.store._expiry_heap) == 1
+
+    def test_large_limit_constant_memory(self):
+        """Test that a large limit still stores one float per key."""
+        limit = 100000
+        for _ in range(1000):
+            self.store.check("t", limit, WINDOW, now=1000.0)
+        assert len(self.store) == 1
+        assert isinstance(self.store._tats["t"], float)
+        assert self.store.check("t", limit, WINDOW, now=1000.0)['current_count'] == 1001
+
+    def test_concurrent_checks_never_overshoot(self):
+        """Test that checks from threadpool threads admit exactly the limit."""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self.store.check("t", LIMIT, WINDOW, now=1000.0), range(200)))
+        assert sum(result['allowed'] for result in results) == LIMIT
+
+
+class TestSQLiteRateLimitStore:
+    """Test cases for the shared SQLite backend."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "rate_limits.db")
+
+    def test_limit_shared_between_instances(self, db_path):
+        """Test that two stores on one file (two workers) share a quota."""
+        worker_a = SQLiteRateLimitStore(db_path)
+        worker_b = SQLiteRateLimitStore(db_path)
+        admitted = 0
+        for i in range(LIMIT * 2):
+            store = worker_a if i % 2 else worker_b
+            if store.check("t", LIMIT, WINDOW, now=1000.0)['allowed']:
+                admitted += 1
+        assert admitted == LIMIT
+        status = worker_a.check("t", LIMIT, WINDOW, now=1000.0, consume=False)
+        assert status['current_count'] == LIMIT
+        assert status['allowed'] is False
+
+    def test_evict_expired(self, db_path):
+        """Test budgeted eviction of drained keys."""
+        store = SQLiteRateLimitStore(db_path)
+        for i in range(4):
+            store.check(f"k{i}", LIMIT, WINDOW, now=1000.0 + i)
+        assert store.evict_expired(now=1000.0 + WINDOW, budget=2) == 2
+        assert len(store) == 2
+        assert store.cleanup(now=1000.0 + WINDOW) == 2
+        assert "k3" not in store
+
+
+class TestCheckDimensions:
+    """Test cases for multi-dimension (session/destination/ip) limiting."""
+
+    LIMITS = {"session": 5, "destination": 2, "ip": 10}
+
+    def setup_method(self):
+        self.store = MemoryRateLimitStore()
+
+    def _check(self, session, destination=None, ip=None, consume=True):
+        identities = {"session": session, "destination": destination, "ip": ip}
+        return check_dimensions(self.store, identities, self.LIMITS, WINDOW, now=1000.0, consume=consume)
+
+    def test_tightest_quota_reported(self):
+        """Test that the dimension with the fewest remaining calls is reported."""
+        result = self._check("s1", "+34600000000", "1.2.3.4")
+        assert result['allowed'] is True
+        assert result['limited_by'] == "destination"
+        assert result['remaining'] == 1
+        assert result['limit'] == 2
+        assert set(result['dimensions']) == {"session", "destination", "ip"}
+
+    def test_destination_limited_across_sessions(self):
+        """Test that one victim number cannot be rung from many sessions."""
+        assert self._check("s1", "+34600000000")['allowed'] is True
+        assert self._check("s2", "+34600000000")['allowed'] is True
+        blocked = self._check("s3", "+34600000000")
+        assert blocked['allowed'] is False
+        assert blocked['limited_by'] == "destination"
+        # Other numbers from the same sessions are unaffected
+        assert self._check("s3", "+34611111111")['allowed'] is True
+
+    def test_rejection_does_not_consume_other_dimensions(self):
+        """Test that a blocked call burns no quota in the allowing dimensions."""
+        self._check("s1", "+34600000000")
+        self._check("s1", "+34600000000")
+        before = self._check("s1", consume=False)['dimensions']['session']['current_count']
+        assert self._check("s1", "+34600000000")['allowed'] is False
+        after = self._check("s1", consume=False)['dimensions']['session']['current_count']
+        assert before == after == 2
+
+    def test_missing_and_disabled_dimensions_skipped(self):
+        """Test that None values and zero limits skip a dimension."""
+        result = check_dimensions(
+            self.store, {"session": "s1", "ip": "1.2.3.4"}, {"session": 5, "ip": 0}, WINDOW, now=1000.0
+        )
+        assert set(result['dimensions']) == {"session"}
+        empty = check_dimensions(self.store, {"session": None}, self.LIMITS, WINDOW, now=1000.0)
+        assert empty['allowed'] is True
+        assert empty['limited_by'] is None
+
+    def test_keys_are_hashed(self):
+        """Test that raw phone numbers never appear in store keys."""
+        self._check("s1", "+34600000000")
+        assert rate_limit_key("destination", "+34600000000") in self.store
+        assert not any("34600000000" in key for key in self.store._tats)
+
+    def test_sqlite_backend_all_or_nothing(self, tmp_path):
+        """Test check_many semantics on the SQLite backend."""
+        store = SQLiteRateLimitStore(str(tmp_path / "rl.db"))
+        identities = {"session": "s1", "destination": "+34600000000"}
+        for _ in range(2):
+            assert check_dimensions(store, identities, self.LIMITS, WINDOW, now=1000.0)['allowed']
+        assert not check_dimensions(store, identities, self.LIMITS, WINDOW, now=1000.0)['allowed']
+        session = check_dimensions(store, {"session": "s1"}, self.LIMITS, WINDOW, now=1000.0, consume=False)
+        assert session['current_count'] == 2
+
+
+def test_create_rate_limit_store(tmp_path):
+    """Test backend selection."""
+    assert isinstance(create_rate_limit_store("memory"), MemoryRateLimitStore)
+    assert isinstance(create_rate_limit_store("sqlite", str(tmp_path / "rl.db")), SQLiteRateLimitStore)
+    with pytest.raises(ValueError):
+        create_rate_limit_store("sqlite")
+    with pytest.raises(ValueError):
+        create_rate_limit_store("redis")
+
+
+def test_gcra_helpers_roundtrip():
+    """Test the pure GCRA helpers."""
+    assert gcra_state(None, 10.0, LIMIT, WINDOW)['current_count'] == 0
+    allowed, tat = gcra_update(None, 10.0, LIMIT, WINDOW)
+    assert allowed is True
+    assert tat == pytest.approx(10.0 + INTERVAL)
+    assert gcra_state(tat, 10.0, LIMIT, WINDOW)['current_count'] == 1
+
+
+def test_forwarded_client_ip_ignores_spoofed_hops():
+    """Test that the client IP is taken from the trusted end of X-Forwarded-For."""
+    # Caller sent "X-Forwarded-For: 1.2.3.4"; our single proxy appended the real address
+    assert forwarded_client_ip("1.2.3.4, 203.0.113.7", 1) == "203.0.113.7"
+    assert forwarded_client_ip("1.2.3.4, 203.0.113.7, 10.0.0.2", 2) == "203.0.113.7"
+    assert forwarded_client_ip("203.0.113.7", 2) is None
+    assert forwarded_client_ip("", 1) is None
+    assert forwarded_client_ip("203.0.113.7", 0) is None
+
+
+def test_ip_dimension_off_without_trusted_proxy_headers():
+    """Test that the per-IP limit is not enforced when every caller shares the proxy's address."""
+    store = MemoryRateLimitStore()
+    limits = dimension_limits(LIMIT, 0, 1, trust_proxy_headers=False)
+    assert limits["ip"] == 0
+    for i in range(3):
+        info = check_dimensions(store, {"session": f"s{i}", "ip": "10.0.0.1"}, limits, WINDOW)
+        assert info["allowed"]
+    assert dimension_limits(LIMIT, 0, 1, trust_proxy_headers=True)["ip"] == 1
@@ -0,0 +1,199 @@
+"""
+Unit tests for the Prometheus-style metrics registry.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from server_metrics import MetricsRegistry
+
+
+def parse(text):
+    """Exposition text -> {series: value} (comments skipped)."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = value
+    return samples
+
+
+@pytest.fixture
+def registry():
+    """A single-process registry with one metric of each kind."""
+    reg = MetricsRegistry(multiproc_dir="")
+    reg.calls = reg.counter("calls_total", "Calls by outcome", ("outcome",))
+    reg.streams = reg.gauge("active_media_streams", "Open streams")
+    reg.lag = reg.gauge("event_loop_lag_seconds", "Loop lag", multiprocess_mode="max")
+    reg.setup = reg.histogram("call_setup_seconds", "Setup latency", (0.5, 1.0, 2.0))
+    return reg
+
+
+class TestExposition:
+    """Test cases for the text exposition format."""
+
+    def test_help_and_type_lines(self, registry):
+        """Test that every metric is announced with HELP and TYPE."""
+        text = registry.render()
+        assert "# HELP time_traveler_calls_total Calls by outcome" in text
+        assert "# TYPE time_traveler_calls_total counter" in text
+        assert "# TYPE time_traveler_active_media_streams gauge" in text
+        assert "# TYPE time_traveler_call_setup_seconds histogram" in text
+
+    def test_counter_and_gauge_samples(self, registry):
+        """Test labelled counters and gauge inc/dec."""
+        registry.calls.inc(outcome="initiated")
+        registry.calls.inc(outcome="initiated")
+        registry.calls.inc(outcome="twilio_error")
+        registry.streams.inc()
+        registry.streams.inc()
+        registry.streams.dec()
+        samples = parse(registry.render())
+        assert samples['time_traveler_calls_total{outcome="initiated"}'] == "2"
+        assert samples['time_traveler_calls_total{outcome="twilio_error"}'] == "1"
+        assert samples["time_traveler_active_media_streams"] == "1"
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Test histogram buckets, +Inf, sum and count."""
+        for value in (0.4, 0.5, 1.5, 3.0):
+            registry.setup.observe(value)
+        samples = parse(registry.render())
+        assert samples['time_traveler_call_setup_seconds_bucket{le="0.5"}'] == "2"
+        assert samples['time_traveler_call_setup_seconds_bucket{le="1"}'] == "2"
+        assert samples['time_traveler_call_setup_seconds_bucket{le="2"}'] == "3"
+        assert samples['time_traveler_call_setup_seconds_bucket{le="+Inf"}'] == "4"
+        assert samples["time_traveler_call_setup_seconds_count"] == "4"
+        assert samples["time_traveler_call_setup_seconds_sum"] == "5.4"
+
+    def test_function_gauge(self, registry):
+        """Test that function gauges are read at collection time."""
+        value = {"lag": 0.012}
+        registry.lag.set_function(lambda: value["lag"])
+        assert parse(registry.render())["time_traveler_event_loop_lag_seconds"] == "0.012"
+        value["lag"] = 0.2
+        assert parse(registry.render())["time_traveler_event_loop_lag_seconds"] == "0.2"
+
+    def test_label_escaping_and_validation(self, registry):
+        """Test label value escaping and that wrong label names are rejected."""
+        registry.calls.inc(outcome='say "hi"\n')
+        assert 'outcome="say \\"hi\\"\\n"' in registry.render()
+        with pytest.raises(ValueError):
+            registry.calls.inc(reason="x")
+
+
+def build(multiproc_dir):
+    """A registry sharing snapshots through multiproc_dir."""
+    reg = MetricsRegistry(multiproc_dir=str(multiproc_dir))
+    reg.calls = reg.counter("calls_total", "Calls by outcome", ("outcome",))
+    reg.streams = reg.gauge("active_media_streams", "Open streams")
+    reg.lag = reg.gauge("event_loop_lag_seconds", "Loop lag", multiprocess_mode="max")
+    reg.setup = reg.histogram("call_setup_seconds", "Setup latency", (0.5, 1.0, 2.0))
+    return reg
+
+
+def dead_pid():
+    """PID of a process that has already exited."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestMultiProcess:
+    """Test cases for merging worker snapshots."""
+
+    def test_workers_are_merged(self, tmp_path):
+        """Test that counters/histograms are summed and gauges follow their mode."""
+        other = build(tmp_path)
+        other.calls.inc(3, outcome="initiated")
+        other.streams.inc(2)
+        other.lag.set(0.3)
+        other.setup.observe(0.7)
+        # A live worker (the test runner's parent process stands in for it)
+        other.write_snapshot(pid=os.getppid())
+
+        this = build(tmp_path)
+        this.calls.inc(outcome="initiated")
+        this.streams.inc()
+        this.lag.set(0.1)
+        this.setup.observe(1.5)
+        samples = parse(this.render())
+        assert samples['time_traveler_calls_total{outcome="initiated"}'] == "4"
+        assert samples["time_traveler_active_media_streams"] == "3"
+        assert samples["time_traveler_event_loop_lag_seconds"] == "0.3"
+        assert samples["time_traveler_call_setup_seconds_count"] == "2"
+        assert samples['time_traveler_call_setup_seconds_bucket{le="1"}'] == "1"
+
+    def test_exited_worker_keeps_counters_not_gauges(self, tmp_path):
+        """Test that a dead worker's counters still count but its gauges are dropped."""
+        exited = build(tmp_path)
+        exited.calls.inc(5, outcome="initiated")
+        exited.streams.inc(4)
+        exited.write_snapshot(pid=dead_pid())
+
+        this = build(tmp_path)
+        samples = parse(this.render())
+        assert samples['time_traveler_calls_total{outcome="initiated"}'] == "5"
+        assert "time_traveler_active_media_streams" not in samples
+
+    def test_reused_pid_does_not_overwrite_predecessor(self, tmp_path):
+        """Test that a restarted worker with the same pid adds to, not replaces, the old counters."""
+        before_restart = build(tmp_path)
+        before_restart.calls.inc(5, outcome="initiated")
+        before_restart.streams.inc(4)
+        before_restart.write_snapshot()
+
+        this = build(tmp_path)
+        this.calls.inc(outcome="initiated")
+        samples = parse(this.render())
+        assert samples['time_traveler_calls_total{outcome="initiated"}'] == "6"
+        assert "time_traveler_active_media_streams" not in samples
+
+    def test_exited_workers_folded_into_archive(self, tmp_path):
+        """Test that exited workers' files are folded into one archive without changing the totals."""
+        for count in (2, 3):
+            exited = build(tmp_path)
+            exited.calls.inc(count, outcome="initiated")
+            exited.setup.observe(0.7)
+            exited.write_snapshot(pid=dead_pid())
+        live = build(tmp_path)
+        live.calls.inc(outcome="initiated")
+        live.write_snapshot(pid=os.getppid())
+
+        this = build(tmp_path)
+        this.write_snapshot()
+        before = parse(this.render())
+        assert this.fold_exited() == 2
+        assert this.fold_exited() == 0
+        assert sorted(os.listdir(tmp_path)) == sorted([
+            ".fold.lock", "exited.json",
+            live._snapshot_filename(os.getppid()), this._snapshot_filename(os.getpid()),
+        ])
+        after = parse(this.render())
+        assert after == before
+        assert after['time_traveler_calls_total{outcome="initiated"}'] == "6"
+        assert after["time_traveler_call_setup_seconds_count"] == "2"
+
+    def test_interrupted_fold_not_counted_twice(self, tmp_path):
+        """Test that snapshots already in the archive are deleted, not folded again."""
+        exited = build(tmp_path)
+        exited.calls.inc(5, outcome="initiated")
+        exited.write_snapshot(pid=dead_pid())
+        (leftover,) = os.listdir(tmp_path)
+        contents = (tmp_path / leftover).read_text()
+        this = build(tmp_path)
+        assert this.fold_exited() == 1
+        # Simulate a crash after the archive was written but before the snapshot was deleted
+        (tmp_path / leftover).write_text(contents)
+
+        assert this.fold_exited() == 0
+        assert not (tmp_path / leftover).exists()
+        assert parse(this.render())['time_traveler_calls_total{outcome="initiated"}'] == "5"
+
+    def test_corrupt_snapshot_ignored(self, tmp_path):
+        """Test that an unreadable snapshot file does not break /metrics."""
+        (tmp_path / "123.json").write_text("{not json")
+        this = build(tmp_path)
+        this.calls.inc(outcome="queued")
+        assert parse(this.render())['time_traveler_calls_total{outcome="queued"}'] == "1"
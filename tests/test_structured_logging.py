@@ -0,0 +1,110 @@
+"""
+Unit tests for the queued structured logging pipeline.
+"""
+
+import io
+import json
+import logging
+
+import pytest
+from structured_logging import LogPipeline, Sampler, parse_sampling
+
+
+@pytest.fixture
+def pipeline():
+    """A JSON pipeline writing to an in-memory stream (listener not started)."""
+    stream = io.StringIO()
+    pipe = LogPipeline(level="INFO", fmt="json", queue_size=100, sampling="noisy=3", stream=stream)
+    pipe.stream = stream
+    yield pipe
+    pipe.stop()
+
+
+def written(pipe):
+    pipe.start()
+    pipe.stop()
+    return [json.loads(line) for line in pipe.stream.getvalue().splitlines()]
+
+
+class TestSampling:
+    """Test cases for sampling configuration."""
+
+    def test_parse_sampling(self):
+        """Test that malformed entries are skipped and N is at least 1."""
+        assert parse_sampling("a=10, b=0,c,d=x") == {"a": 10, "b": 1}
+
+    def test_one_in_n(self):
+        """Test that the first of every N occurrences is kept."""
+        sampler = Sampler({"noisy": 4})
+        kept = [sampler.should_log("noisy") for _ in range(8)]
+        assert kept == [True, False, False, False, True, False, False, False]
+        assert sampler.should_log("other")
+
+
+class TestLogPipeline:
+    """Test cases for LogPipeline."""
+
+    def test_structured_json_records(self, pipeline):
+        """Test that events and fields are written as JSON lines by the writer thread."""
+        log = pipeline.get_logger("media")
+        log.info("call.started", "Outbound call started", call_sid="CA1", year=1850)
+        records = written(pipeline)
+        assert records == [{
+            "ts": records[0]["ts"], "level": "info", "logger": "time_traveler.media",
+            "event": "call.started", "msg": "Outbound call started", "call_sid": "CA1", "year": 1850,
+        }]
+
+    def test_disabled_level_skips_rendering(self, pipeline):
+        """Test that a disabled level never enqueues or evaluates lazy fields."""
+        rendered = []
+        log = pipeline.get_logger("media")
+        log.debug("conversation.override", override=lambda: rendered.append(1))
+        assert pipeline.queue.qsize() == 0
+        assert written(pipeline) == []
+        assert rendered == []
+
+    def test_lazy_fields_rendered_by_writer(self, pipeline):
+        """Test that callable field values are evaluated when the record is written."""
+        log = pipeline.get_logger("media")
+        log.info("conversation.override", override=lambda: json.dumps({"tts": {"voice_id": "v1"}}))
+        assert written(pipeline)[0]["override"] == '{"tts": {"voice_id": "v1"}}'
+
+    def test_sampled_events(self, pipeline):
+        """Test that sampled events are thinned and carry their sampling rate."""
+        log = pipeline.get_logger("media")
+        for i in range(9):
+            log.info("noisy", frame=i)
+        records = written(pipeline)
+        assert [r["frame"] for r in records] == [0, 3, 6]
+        assert all(r["sampled_every"] == 3 for r in records)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that records beyond the queue size are dropped and counted."""
+        pipe = LogPipeline(level="INFO", queue_size=2, sampling="", stream=io.StringIO())
+        log = pipe.get_logger("http")
+        for i in range(5):
+            log.info("burst", i=i)
+        assert pipe.get_stats()["dropped"] == 3
+        assert pipe.get_stats()["queued"] == 2
+
+    def test_stdlib_loggers_share_pipeline(self, pipeline):
+        """Test that module loggers under time_traveler.* use the queue with lazy %-formatting."""
+        logging.getLogger("time_traveler.voices").warning("No voices for %s", "es")
+        records = written(pipeline)
+        assert records[0]["msg"] == "No voices for es"
+        assert records[0]["level"] == "warning"
+
+    def test_text_format_with_exception(self):
+        """Test the text format appends fields and the traceback."""
+        stream = io.StringIO()
+        pipe = LogPipeline(level="INFO", fmt="text", sampling="", stream=stream)
+        log = pipe.get_logger("media")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            log.exception("media.audio_error", "Error handling audio", call_sid="CA1")
+        pipe.start()
+        pipe.stop()
+        output = stream.getvalue()
+        assert output.startswith("Error handling audio call_sid=CA1\n")
+        assert "RuntimeError: boom" in output
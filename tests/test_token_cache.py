@@ -0,0 +1,131 @@
+"""
+Unit tests for the verified-JWT payload cache.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from token_cache import TokenCache, token_digest
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def payload(session_id="s1", exp=2000):
+    return {"user_id": "u", "session_id": session_id, "exp": exp}
+
+
+class TestTokenCache:
+    """Test cases for TokenCache."""
+
+    def test_hit_after_put(self):
+        """Test that a verified payload is served from the cache."""
+        cache = TokenCache(10, clock=FakeClock())
+        assert cache.get("tok") is None
+        cache.put("tok", payload())
+        assert cache.get("tok")["session_id"] == "s1"
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_expires_at_token_exp(self):
+        """Test that entries are never served at or past the token's exp."""
+        clock = FakeClock()
+        cache = TokenCache(10, clock=clock)
+        cache.put("tok", payload(exp=1010))
+        clock.now = 1009.9
+        assert cache.get("tok") is not None
+        clock.now = 1010
+        assert cache.get("tok") is None
+        assert len(cache) == 0
+
+    def test_capped_at_key_retirement(self):
+        """Test that an entry is not served past its signing key's verify_until."""
+        clock = FakeClock()
+        cache = TokenCache(10, clock=clock)
+        cache.put("tok", payload(exp=2000), not_after=1100)
+        clock.now = 1099
+        assert cache.get("tok") is not None
+        clock.now = 1100
+        assert cache.get("tok") is None
+        cache.put("retired", payload(exp=2000), not_after=1000)
+        assert len(cache) == 0
+
+    def test_not_cached_without_exp_or_when_expired(self):
+        """Test that tokens without a usable exp are not cached."""
+        cache = TokenCache(10, clock=FakeClock())
+        cache.put("a", {"session_id": "s1"})
+        cache.put("b", payload(exp=999))
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used token is evicted first."""
+        cache = TokenCache(2, clock=FakeClock())
+        cache.put("a", payload("s1"))
+        cache.put("b", payload("s2"))
+        cache.get("a")
+        cache.put("c", payload("s3"))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_invalidate_session(self):
+        """Test that revoking a session drops all of its tokens."""
+        cache = TokenCache(10, clock=FakeClock())
+        cache.put("a", payload("s1"))
+        cache.put("b", payload("s1"))
+        cache.put("c", payload("s2"))
+        assert cache.invalidate_session("s1") == 2
+        assert cache.get("a") is None and cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.invalidate_session("s1") == 0
+
+    def test_invalidate_token(self):
+        """Test dropping a single token."""
+        cache = TokenCache(10, clock=FakeClock())
+        cache.put("a", payload())
+        assert cache.invalidate("a") is True
+        assert cache.invalidate("a") is False
+        assert cache.invalidate_session("s1") == 0
+
+    def test_returned_payload_is_a_copy(self):
+        """Test that callers cannot mutate the cached payload."""
+        cache = TokenCache(10, clock=FakeClock())
+        cache.put("tok", payload())
+        cache.get("tok")["session_id"] = "tampered"
+        assert cache.get("tok")["session_id"] == "s1"
+
+    def test_disabled_cache(self):
+        """Test that a zero-capacity cache stores nothing."""
+        cache = TokenCache(0, clock=FakeClock())
+        cache.put("tok", payload())
+        assert cache.get("tok") is None
+
+    def test_digest_keys(self):
+        """Test that raw tokens are not used as keys."""
+        assert token_digest("tok") != b"tok"
+        assert len(token_digest("x" * 500)) == 16
+
+    def test_concurrent_access(self):
+        """Test that threads hitting get/put/invalidate_session together stay consistent."""
+        cache = TokenCache(8, clock=FakeClock())
+
+        def worker(n):
+            for i in range(500):
+                token = f"tok-{(n + i) % 32}"
+                cache.put(token, payload(session_id=f"s{i % 4}"))
+                cache.get(token)
+                if i % 7 == 0:
+                    cache.invalidate_session(f"s{i % 4}")
+                if i % 11 == 0:
+                    cache.invalidate(token)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(worker, range(8)))
+        assert len(cache) <= 8
+        indexed = set().union(*cache._by_session.values()) if cache._by_session else set()
+        assert indexed == set(cache._entries)
@@ -0,0 +1,116 @@
+"""
+Unit tests for CPS-paced Twilio call dispatch (against a local fake Twilio endpoint).
+"""
+
+import asyncio
+import pytest
+from errors import TwilioServiceError, map_twilio_error
+from twilio_dispatch import NumberBucket, TwilioCallDispatcher, is_throttled_error
+
+FROM = "+15550000001"
+
+
+class TestNumberBucket:
+    """Test cases for the per-number token bucket."""
+
+    def test_reservations_are_spaced(self):
+        """Test that back-to-back reservations are 1/cps apart."""
+        bucket = NumberBucket(cps=2, burst=1)
+        assert [bucket.reserve(0.0) for _ in range(3)] == [0.0, 0.5, 1.0]
+
+    def test_burst_allows_immediate_calls(self):
+        """Test that burst calls start immediately after idle."""
+        bucket = NumberBucket(cps=1, burst=3)
+        assert [bucket.reserve(10.0) for _ in range(4)] == [10.0, 10.0, 10.0, 11.0]
+        assert bucket.wait_estimate(10.0) == pytest.approx(2.0)
+
+
+class TestTwilioCallDispatcher:
+    """Test cases for TwilioCallDispatcher."""
+
+    def test_paces_burst_to_cps(self, fake_twilio):
+        """Test that a burst of requests never trips the fake Twilio CPS limit."""
+        dispatcher = TwilioCallDispatcher(cps=5, burst=1, max_wait_seconds=10)
+
+        async def scenario():
+            calls = [
+                dispatcher.create_call(FROM, lambda i=i: fake_twilio.create_call(FROM, f"+3460000000{i}"))
+                for i in range(6)
+            ]
+            return await asyncio.gather(*calls)
+
+        results = asyncio.run(scenario())
+        assert len({r["sid"] for r in results}) == 6
+        assert fake_twilio.throttled == 0
+        # Served in arrival order
+        assert [form["To"] for _, form in fake_twilio.requests] == [f"+3460000000{i}" for i in range(6)]
+        times = [t for t, _ in fake_twilio.requests]
+        assert times[-1] - times[0] >= 5 * 0.2 * 0.9
+
+    def test_unpaced_burst_is_throttled(self, fake_twilio):
+        """Sanity check: the fake endpoint rejects unpaced bursts."""
+        errors = 0
+        for i in range(3):
+            try:
+                fake_twilio.create_call(FROM, f"+3461000000{i}")
+            except RuntimeError as e:
+                assert is_throttled_error(e)
+                errors += 1
+        assert errors >= 1
+
+    def test_numbers_paced_independently(self, fake_twilio):
+        """Test that each from-number has its own budget."""
+        dispatcher = TwilioCallDispatcher(cps=5, burst=1)
+
+        async def scenario():
+            return await asyncio.gather(
+                dispatcher.create_call("+15550000001", lambda: fake_twilio.create_call("+15550000001", "+34600000001")),
+                dispatcher.create_call("+15550000002", lambda: fake_twilio.create_call("+15550000002", "+34600000002")),
+            )
+
+        asyncio.run(scenario())
+        times = [t for t, _ in fake_twilio.requests]
+        assert abs(times[1] - times[0]) < 0.15
+        assert fake_twilio.throttled == 0
+
+    def test_throttled_request_is_retried(self, fake_twilio):
+        """Test that a 429 from Twilio is retried on the next slot."""
+        fake_twilio.create_call(FROM, "+34600000000")  # Uses up the fake's current slot
+        dispatcher = TwilioCallDispatcher(cps=5, burst=2, max_retries=3)
+
+        async def scenario():
+            return await dispatcher.create_call(FROM, lambda: fake_twilio.create_call(FROM, "+34600000001"))
+
+        result = asyncio.run(scenario())
+        assert result["sid"]
+        assert fake_twilio.throttled >= 1
+        assert dispatcher.get_stats()["numbers"][FROM]["throttled_total"] >= 1
+
+    def test_queue_depth_and_max_wait(self):
+        """Test queue depth reporting and rejection past max wait."""
+        dispatcher = TwilioCallDispatcher(cps=1, burst=1, max_wait_seconds=1.5)
+        depths = []
+
+        async def scenario():
+            async def slow_create(i):
+                return await dispatcher.create_call(FROM, lambda: i)
+
+            first = asyncio.create_task(slow_create(1))
+            second = asyncio.create_task(slow_create(2))
+            await asyncio.sleep(0.05)
+            depths.append(dispatcher.queue_depth(FROM))
+            with pytest.raises(TwilioServiceError):
+                await dispatcher.create_call(FROM, lambda: 3)
+            return await asyncio.gather(first, second)
+
+        assert asyncio.run(scenario()) == [1, 2]
+        assert depths == [1]
+        assert dispatcher.queue_depth() == 0
+
+
+def test_throttle_error_mapping():
+    """Test that Twilio's CPS error maps to a specific user-facing message."""
+    class FakeError:
+        code = 20429
+
+    assert map_twilio_error(FakeError())["error_code"] == "CALL_RATE_LIMITED"
@@ -0,0 +1,136 @@
+"""
+Unit tests for per-voice latency tracking and latency-weighted voice selection.
+"""
+
+import asyncio
+import json
+import os
+import random
+import pytest
+from voice_latency import VoiceLatencyTracker, voice_latency_saver
+from voice_manager import VoiceManager
+
+
+def feed(tracker, voice_id, latency_ms, times=5):
+    for _ in range(times):
+        tracker.record(voice_id, latency_ms)
+
+
+class TestVoiceLatencyTracker:
+    """Test cases for VoiceLatencyTracker."""
+
+    def test_decayed_average(self):
+        """Test that the estimate moves toward new samples by alpha."""
+        tracker = VoiceLatencyTracker(persist_file=None, alpha=0.5)
+        tracker.record("v1", 100)
+        tracker.record("v1", 200)
+        entry = tracker.get("v1")
+        assert entry.ema_ms == 150 and entry.last_ms == 200 and entry.samples == 2
+
+    def test_ignores_invalid_samples(self):
+        """Test that negative or missing measurements are dropped."""
+        tracker = VoiceLatencyTracker(persist_file=None)
+        tracker.record("v1", -5)
+        tracker.record("", 100)
+        tracker.record("v1", None)
+        assert tracker.get("v1") is None and tracker.version == 0
+
+    def test_slow_voice_down_weighted(self):
+        """Test that only voices slower than the pool median lose weight."""
+        tracker = VoiceLatencyTracker(persist_file=None, min_samples=3, exponent=2, min_factor=0.2)
+        feed(tracker, "fast", 100)
+        feed(tracker, "mid", 120)
+        feed(tracker, "slow", 240)
+        factors = tracker.weight_factors(["fast", "mid", "slow", "new"])
+        assert factors["fast"] == 1.0 and factors["mid"] == 1.0 and factors["new"] == 1.0
+        assert factors["slow"] == pytest.approx(0.25)
+
+    def test_min_samples_and_floor(self):
+        """Test that sparse data is ignored and factors never drop below the floor."""
+        tracker = VoiceLatencyTracker(persist_file=None, min_samples=3, min_factor=0.3)
+        feed(tracker, "a", 100)
+        feed(tracker, "b", 10000)
+        feed(tracker, "c", 50, times=2)
+        factors = tracker.weight_factors(["a", "b", "c"])
+        assert factors["b"] == 0.3
+        assert factors["c"] == 1.0
+
+    def test_persistence(self, tmp_path):
+        """Test that estimates survive a restart via the persist file."""
+        path = str(tmp_path / "latency.json")
+        tracker = VoiceLatencyTracker(persist_file=path)
+        feed(tracker, "v1", 180)
+        assert not os.path.exists(path)
+        tracker.save()
+        restored = VoiceLatencyTracker(persist_file=path)
+        assert restored.get("v1").samples == 5
+        assert restored.rank()[0]["voice_id"] == "v1"
+
+    def test_background_saver(self, tmp_path):
+        """Test that the saver task writes changed estimates off the record path."""
+        path = str(tmp_path / "latency.json")
+        tracker = VoiceLatencyTracker(persist_file=path, save_interval_seconds=0.01)
+
+        async def scenario():
+            task = asyncio.create_task(voice_latency_saver(tracker))
+            feed(tracker, "v1", 180)
+            assert tracker.dirty
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        asyncio.run(scenario())
+        assert not tracker.dirty
+        assert json.loads(open(path).read())["v1"]["samples"] == 5
+
+
+class TestLatencyWeightedSelection:
+    """Test cases for VoiceManager with a latency tracker."""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        voices = {"english": [
+            {"id": "fast", "name": "Fast"},
+            {"id": "mid", "name": "Mid"},
+            {"id": "slow", "name": "Slow"},
+        ], "spanish": []}
+        path = tmp_path / "voices.json"
+        path.write_text(json.dumps(voices))
+        tracker = VoiceLatencyTracker(persist_file=None, min_factor=0.05)
+        return VoiceManager(str(path), latency_tracker=tracker)
+
+    def test_selection_prefers_faster_voices(self, manager):
+        """Test that a consistently slow voice is picked less often."""
+        for voice_id, latency in (("fast", 100), ("mid", 110), ("slow", 400)):
+            for _ in range(5):
+                manager.record_voice_latency(voice_id, latency)
+        assert manager.reweight() is True
+        rng = random.Random(7)
+        picks = [manager.select_voice("en", rng=rng)["id"] for _ in range(3000)]
+        assert picks.count("slow") < picks.count("fast") / 5
+
+    def test_selection_never_reweights_inline(self, manager):
+        """Test that picks use the last built weights until the background reweight swaps new ones in."""
+        pools = manager._pools
+        for _ in range(5):
+            manager.record_voice_latency("slow", 400)
+            manager.record_voice_latency("fast", 100)
+        manager.select_voice("en")
+        assert manager._pools is pools
+        assert manager.reweight() is True
+        assert manager._pools is not pools
+        assert manager.reweight() is False
+
+    def test_ranking(self, manager):
+        """Test that the ranking lists measured voices fastest first."""
+        for voice_id, latency in (("slow", 300), ("fast", 90), ("mid", 150)):
+            for _ in range(3):
+                manager.record_voice_latency(voice_id, latency)
+        ranking = manager.get_voice_latency_ranking("en")
+        assert [entry["voice_id"] for entry in ranking] == ["fast", "mid", "slow"]
+        assert ranking[0]["name"] == "Fast" and ranking[0]["language"] == "english"
+        assert ranking[-1]["weight_factor"] < 1.0
+
+    def test_without_tracker(self, voice_manager):
+        """Test that latency calls are harmless without a tracker."""
+        voice_manager.record_voice_latency("x", 100)
+        assert voice_manager.get_voice_latency_ranking() == []
@@ -103,3 +103,62 @@ class TestVoiceManager:
         with patch.dict('os.environ', {}, clear=True):
             voice_id = voice_manager.get_voice_id_from_env('nonexistent')
             assert voice_id is None
+
+
+class TestVoiceIndex:
+    """Test cases for the indexed, weighted voice selection."""
+
+    @pytest.fixture
+    def indexed_manager(self, tmp_path):
+        data = {
+            "english": [
+                {"id": "en_f_young", "name": "A", "gender": "female", "age_range": "young adult", "weight": 3},
+                {"id": "en_m_old", "name": "B", "gender": "male", "age_range": "elderly", "weight": 1},
+                {"id": "en_f_old", "name": "C", "gender": "female", "age_range": "elderly", "weight": 0},
+            ],
+            "spanish": [
+                {"id": "es_m_mid", "name": "D", "gender": "male", "age_range": "middle-aged"},
+            ],
+        }
+        path = tmp_path / "voices.json"
+        path.write_text(json.dumps(data))
+        return VoiceManager(voices_file=str(path))
+
+    def test_filter_by_gender_and_age(self, indexed_manager):
+        """Test selection filtered by gender and age range."""
+        assert indexed_manager.select_voice("en", gender="male")["id"] == "en_m_old"
+        assert indexed_manager.select_voice("en", age_range="young adult")["id"] == "en_f_young"
+        assert indexed_manager.select_voice("es", "male", "middle-aged")["id"] == "es_m_mid"
+
+    def test_no_match_returns_none(self, indexed_manager):
+        """Test that a filter with no voices returns None."""
+        assert indexed_manager.select_voice("es", gender="female") is None
+        assert indexed_manager.get_random_voice_for_language("es", gender="female") is None
+
+    def test_weights_respected(self, indexed_manager):
+        """Test that selection follows weights and zero weight is never picked."""
+        import random
+        rng = random.Random(42)
+        picks = [indexed_manager.select_voice("en", rng=rng)["id"] for _ in range(4000)]
+        assert "en_f_old" not in picks
+        ratio = picks.count("en_f_young") / picks.count("en_m_old")
+        assert 2.5 < ratio < 3.5
+
+    def test_language_aliases(self, indexed_manager):
+        """Test language code normalization."""
+        assert indexed_manager.select_voice("Spanish")["id"] == "es_m_mid"
+        assert indexed_manager.select_voice("ES")["id"] == "es_m_mid"
+
+    def test_large_catalog(self, tmp_path):
+        """Test indexing and filtered selection with thousands of voices."""
+        voices = [
+            {"id": f"v{i}", "name": f"V{i}", "gender": ("male", "female")[i % 2],
+             "age_range": ("young adult", "middle-aged", "elderly")[i % 3]}
+            for i in range(5000)
+        ]
+        path = tmp_path / "voices.json"
+        path.write_text(json.dumps({"english": voices, "spanish": []}))
+        vm = VoiceManager(voices_file=str(path))
+        for _ in range(100):
+            voice = vm.select_voice("en", gender="female", age_range="elderly")
+            assert voice["gender"] == "female" and voice["age_range"] == "elderly"